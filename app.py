@@ -1,12 +1,6 @@
 import streamlit as st
-import asyncio
-import pandas as pd
 import json
-import os
 from datetime import datetime
-import threading
-import queue
-import time
 from config import get_config
 
 # ── Page config ───────────────────────────────
@@ -341,6 +335,11 @@ with st.sidebar:
     st.markdown("#### ⚙️ Settings")
     min_score = st.slider("Minimum Lead Score", 1, 10, env_config.get('min_score', 7))
     max_concurrent = st.slider("Concurrent Scrapes", 1, 10, env_config.get('max_concurrent_scrapes', 5))
+    time_limit = st.number_input("Time Limit (minutes, 0 = none)", min_value=0, value=0, step=5,
+                                 help="Stop the run after this long and keep the partial results")
+    neighborhood_fanout = st.checkbox("Neighborhood Fan-out", value=env_config.get('neighborhood_fanout', False),
+                                      help="Also search each metro's neighborhoods (Bandra, Andheri, ...) until "
+                                           "they stop finding new businesses — costs extra SerpAPI searches")
 
     st.markdown("---")
     st.markdown("""
@@ -366,9 +365,9 @@ st.markdown("""
 
 # Import enhancements
 from enhancements import (
-    apply_advanced_filters, sort_leads, export_to_excel,
-    render_advanced_filters, render_analytics_dashboard,
-    render_lead_card_enhanced, render_real_time_progress
+    cached_leads_frame, cached_filtered_positions, filters_key, SORT_OPTIONS, render_export_controls,
+    render_advanced_filters, render_analytics_dashboard, render_results_view, render_live_leads,
+    HISTORY_WINDOWS, cached_history_aggregates, render_real_time_progress
 )
 
 # Auto-switch to Results tab if pipeline just completed
@@ -477,6 +476,12 @@ with tab1:
 
     st.markdown("---")
 
+    # Runs execute in the process-wide job manager (or the JOB_API_URL server);
+    # this session only submits and reads job state
+    from core.jobs import ACTIVE_STATUSES
+    from core.api_client import connect_jobs
+    job_manager = connect_jobs(env_config)
+
     # Run button
     if not st.session_state.running:
         if st.button("🚀 Start Lead Generation", type="primary", width="stretch"):
@@ -490,122 +495,81 @@ with tab1:
             elif not st.session_state.queries:
                 st.error("❌ Add at least one search query!")
             else:
+                st.session_state.job_id = job_manager.submit(
+                    env_config,
+                    queries=st.session_state.queries.copy(),
+                    min_score=min_score,
+                    max_concurrent_scrapes=max_concurrent,
+                    deadline=time_limit * 60 or None,
+                    neighborhood_fanout=neighborhood_fanout,
+                )
                 st.session_state.running = True
                 st.session_state.progress_log = []
                 st.session_state.results = None
+                st.session_state.live_leads = []
+                st.session_state.live_seq = 0
                 st.rerun()
     else:
-        st.button("⏳ Running...", disabled=True, width="stretch")
+        run_col, stop_col = st.columns([3, 1])
+        run_col.button("⏳ Running...", disabled=True, width="stretch")
+        if stop_col.button("⏹️ Stop", width="stretch"):
+            job_manager.cancel(st.session_state.job_id)
 
     # Progress display
-    if st.session_state.running:
-        st.markdown("#### ⚡ Pipeline Progress")
-        progress_container = st.container()
-
-        # Use config from .env
-        config = env_config
-
-        # Progress tracking
-        progress_data = {
-            'stage': 'Starting...',
-            'current': 0,
-            'total': 100,
-            'message': 'Initializing pipeline...',
-            'percentage': 0
-        }
-
-        def progress_cb(stage, current, total, message):
-            # Calculate overall progress based on stages
-            stage_weights = {
-                'search': (0, 20),      # 0-20%
-                'scrape': (20, 50),     # 20-50%
-                'score': (50, 80),      # 50-80%
-                'enrich': (80, 90),     # 80-90%
-                'save': (90, 100)       # 90-100%
-            }
-            
-            if stage in stage_weights:
-                start, end = stage_weights[stage]
-                if total > 0:
-                    stage_progress = (current / total)
-                    overall = start + (stage_progress * (end - start))
-                else:
-                    overall = start
-                
-                progress_data['stage'] = stage.upper()
-                progress_data['current'] = current
-                progress_data['total'] = total
-                progress_data['message'] = message
-                progress_data['percentage'] = int(overall)
-
-        import sys
-        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-        from pipeline import run_pipeline
-
-        # Run pipeline
-        try:
-            with progress_container:
-                # Progress UI elements
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                stage_text = st.empty()
-                
-                # Copy session state values to local variables (for thread safety)
-                queries_to_run = st.session_state.queries.copy()
-                
-                # Start pipeline in background
-                import threading
-                result_holder = {'result': None, 'error': None}
-                
-                def run_async_pipeline():
-                    try:
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        result = loop.run_until_complete(run_pipeline(
-                            config,
-                            queries=queries_to_run,
-                            progress_callback=progress_cb,
-                            min_score=min_score,
-                            max_concurrent_scrapes=max_concurrent,
-                        ))
-                        result_holder['result'] = result
-                    except Exception as e:
-                        result_holder['error'] = str(e)
-                
-                thread = threading.Thread(target=run_async_pipeline)
-                thread.start()
-                
-                # Update UI while pipeline runs
-                while thread.is_alive():
-                    progress_bar.progress(progress_data['percentage'] / 100)
-                    status_text.markdown(f"**{progress_data['stage']}** ({progress_data['current']}/{progress_data['total']}) — {progress_data['percentage']}%")
-                    stage_text.caption(progress_data['message'])
-                    time.sleep(0.5)
-                
-                thread.join()
-                
-                # Check for errors
-                if result_holder['error']:
-                    raise Exception(result_holder['error'])
-                
-                result = result_holder['result']
-                
-                # Complete!
-                progress_bar.progress(1.0)
-                status_text.markdown("**COMPLETE** — 100%")
-                
+    @st.fragment(run_every=1)
+    def job_progress():
+        job = job_manager.get(st.session_state.job_id)
+        if not job:
+            st.session_state.running = False
+            st.rerun()
+        if job['status'] == 'queued':
+            st.progress(0)
+            st.markdown(f"**QUEUED** — position {job.get('queue_position') or 1}, waiting for a free worker")
+        elif job['status'] == 'running':
+            st.progress(job['percentage'] / 100)
+            st.markdown(f"**{(job['stage'] or '').upper()}** ({job['current'] or 0}/{job['total'] or 0}) — {job['percentage']}%")
+            st.caption(job['message'] or '')
+        if job['status'] in ACTIVE_STATUSES:
+            # Pull only leads published since the last refresh
+            for seq, lead in job_manager.leads(job['job_id'], after=st.session_state.get('live_seq', 0)):
+                st.session_state.setdefault('live_leads', []).append(lead)
+                st.session_state.live_seq = seq
+            st.markdown("#### 🔴 Live Results")
+            render_live_leads(st.session_state.get('live_leads', []))
+        else:
+            st.session_state.running = False
+            result = job_manager.result(job['job_id'])
+            if result:
+                # Cancelled / time-boxed runs keep their partial result
                 st.session_state.results = result
-                st.session_state.running = False
                 st.session_state.show_results_tab = True  # Flag to show results
+            else:
+                st.session_state.job_error = job['error'] or job['message'] or job['status']
+            st.rerun()
 
-                st.success(f"✅ Pipeline Complete! Found **{len(result['qualified_leads'])}** qualified leads.")
-                st.info("🔄 Refreshing to show results...")
-                time.sleep(1)
-                st.rerun()
+    if st.session_state.running and st.session_state.get('job_id'):
+        st.markdown("#### ⚡ Pipeline Progress")
+        st.caption(f"Job `{st.session_state.job_id}`")
+        job_progress()
+    elif st.session_state.get('job_error'):
+        st.error(f"Pipeline error: {st.session_state.pop('job_error')}")
 
-        except Exception as e:
-            st.error(f"Pipeline error: {e}")
-            st.session_state.running = False
+    recent_jobs = job_manager.list_jobs(limit=10)
+    if recent_jobs:
+        with st.expander(f"🗂️ Recent jobs ({sum(j['status'] in ACTIVE_STATUSES for j in recent_jobs)} active)"):
+            for job in recent_jobs:
+                created = datetime.fromtimestamp(job['created_at']).strftime('%Y-%m-%d %H:%M')
+                label = f"`{job['job_id']}` · {created} · {len(job['queries'])} queries · **{job['status']}**"
+                if job['status'] == 'running':
+                    label += f" — {job['percentage']}%"
+                c1, c2 = st.columns([4, 1])
+                c1.markdown(label)
+                if job['status'] in ('done', 'cancelled') and job['finished_at'] and c2.button("Open", key=f"open_job_{job['job_id']}"):
+                    result = job_manager.result(job['job_id'])
+                    if result:
+                        st.session_state.results = result
+                        st.session_state.show_results_tab = True
+                        st.rerun()
 
 
 # ─────────────────────────────────────────────────────
@@ -614,9 +578,43 @@ with tab1:
 with tab2:
     if not st.session_state.results:
         st.info("Run the pipeline first to see results here.")
+        # Saved leads are served from the local store (no Sheets API call)
+        from core.storage import build_lead_store
+        store = build_lead_store(env_config)
+        mirror = None
+        try:
+            saved_count = store.count() if store else 0
+            if saved_count:
+                if st.button(f"📂 Load {saved_count} saved leads (local store)"):
+                    saved = store.read_leads()
+                    st.session_state.results = {
+                        'total_scraped': len(saved), 'qualified_leads': saved,
+                        'saved_to_sheet': 0, 'errors': [],
+                    }
+                    st.rerun()
+            elif env_config.get('sheet_id') and not env_config.get('sheet_partitioning'):
+                from core.mirror import open_sheet_mirror
+                mirror = open_sheet_mirror(env_config, env_config['sheet_id'])
+                mirror_status = mirror.status() if mirror else None
+                if mirror_status and mirror_status['row_count'] > 1:
+                    if st.button(f"📂 Load {mirror_status['row_count'] - 1} saved leads (local mirror)"):
+                        saved = mirror.read_leads()
+                        st.session_state.results = {
+                            'total_scraped': len(saved), 'qualified_leads': saved,
+                            'saved_to_sheet': len(saved), 'errors': [],
+                        }
+                        st.rerun()
+        finally:
+            if store:
+                store.close()
+            if mirror:
+                mirror.close()
     else:
         results = st.session_state.results
         leads = results.get('qualified_leads', [])
+        # Typed frame built once per run; filter / sort results are memoized on (run, filters)
+        run_id = results.setdefault('run_id', results.get('started_at') or f"loaded-{datetime.now().timestamp()}")
+        leads_df = cached_leads_frame(run_id, leads)
 
         # Summary metrics
         m1, m2, m3, m4, m5 = st.columns(5)
@@ -627,12 +625,18 @@ with tab2:
         with m3:
             st.markdown(f'<div class="metric-box"><div class="metric-value">{results["saved_to_sheet"]}</div><div class="metric-label">Saved to Sheet</div></div>', unsafe_allow_html=True)
         with m4:
-            avg = round(sum(l.get('lead_score',0) for l in leads) / len(leads), 1) if leads else 0
+            avg = round(float(leads_df['lead_score'].mean()), 1) if leads else 0
             st.markdown(f'<div class="metric-box"><div class="metric-value">{avg}</div><div class="metric-label">Avg Score</div></div>', unsafe_allow_html=True)
         with m5:
-            high = sum(1 for l in leads if l.get('urgency') == 'HIGH')
+            high = int((leads_df['urgency'] == 'HIGH').sum()) if leads else 0
             st.markdown(f'<div class="metric-box"><div class="metric-value">{high}</div><div class="metric-label">High Urgency</div></div>', unsafe_allow_html=True)
 
+        for note in results.get('degraded', []):
+            st.warning(f"⚠️ {note}")
+        for pruned in results.get('pruned_queries', []):
+            st.info(f"🔁 Skipped \"{' in '.join(pruned['query'])}\" — ~{pruned['redundancy']:.0%} of its results "
+                    f"expected from \"{' in '.join(pruned['covered_by'])}\"")
+
         st.markdown("---")
 
         # Advanced Filters
@@ -642,11 +646,11 @@ with tab2:
             with st.expander("🔍 Advanced Filters", expanded=False):
                 fc1, fc2, fc3 = st.columns(3)
                 with fc1:
-                    cities = sorted(set(l.get('city', '') for l in leads if l.get('city')))
+                    cities = sorted(c for c in leads_df['city'].cat.categories if c)
                     filter_city = st.multiselect("City", cities)
                     filter_score = st.slider("Min Score", 1, 10, 7)
                 with fc2:
-                    biztypes = sorted(set(l.get('business_type', '') for l in leads if l.get('business_type')))
+                    biztypes = sorted(b for b in leads_df['business_type'].cat.categories if b)
                     filter_biz = st.multiselect("Business Type", biztypes)
                     filter_urgency = st.multiselect("Urgency", ["HIGH", "MEDIUM", "LOW"])
                 with fc3:
@@ -657,63 +661,47 @@ with tab2:
                 must_have_whatsapp = st.checkbox("Must have WhatsApp")
         
         with col_sort:
-            sort_by = st.selectbox("Sort by", [
-                "Lead Score (High to Low)",
-                "Google Rating (High to Low)",
-                "Reviews (Most to Least)",
-                "Urgency (High to Low)",
-            ])
-        
+            sort_by = st.selectbox("Sort by", list(SORT_OPTIONS))
+        
+        # Apply filters + sorting (vectorized masks, cached per run / filter tuple)
+        filters = {
+            'score_range': (filter_score, 10),
+            'urgency': filter_urgency,
+            'min_rating': filter_rating,
+            'min_reviews': filter_reviews,
+            'must_have_website': must_have_website,
+            'must_have_whatsapp': must_have_whatsapp,
+            'cities': filter_city,
+            'business_types': filter_biz,
+        }
+        filter_tuple = filters_key(filters)
+        positions = cached_filtered_positions(run_id, filter_tuple, sort_by, leads)
+
         with col_export:
             st.markdown("#### Export")
             if leads:
-                # CSV Export
-                df = pd.DataFrame(leads)
-                csv = df.to_csv(index=False).encode()
-                st.download_button("📥 CSV", csv, "leads.csv", "text/csv", use_container_width=True)
-                
-                # Excel Export
-                excel_data = export_to_excel(leads)
-                st.download_button("📊 Excel", excel_data, "leads.xlsx", 
-                                 "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                 use_container_width=True)
+                render_export_controls(leads, positions, run_id, filter_tuple, sort_by)
 
-        # Apply filters
-        filtered = leads
-        if filter_city:
-            filtered = [l for l in filtered if l.get('city') in filter_city]
-        if filter_biz:
-            filtered = [l for l in filtered if l.get('business_type') in filter_biz]
-        if filter_urgency:
-            filtered = [l for l in filtered if l.get('urgency') in filter_urgency]
-        filtered = [l for l in filtered if l.get('lead_score', 0) >= filter_score]
-        filtered = [l for l in filtered if (l.get('google_rating') or 0) >= filter_rating]
-        filtered = [l for l in filtered if (l.get('google_reviews') or 0) >= filter_reviews]
-        if must_have_website:
-            filtered = [l for l in filtered if l.get('website') or l.get('raw_url')]
-        if must_have_whatsapp:
-            filtered = [l for l in filtered if l.get('has_whatsapp')]
-        
-        # Apply sorting
-        filtered = sort_leads(filtered, sort_by)
-
-        st.caption(f"Showing {len(filtered)} of {len(leads)} leads")
-        st.markdown("---")
-
-        # Lead cards with enhanced features
-        for idx, lead in enumerate(filtered):
-            render_lead_card_enhanced(lead, idx)
+        # One page of lead cards (or the compact table) — cost follows page size
+        render_results_view(leads, positions, run_id, filter_tuple, sort_by)
 
 
 # ─────────────────────────────────────────────────────
 # TAB 3: ANALYTICS
 # ─────────────────────────────────────────────────────
 with tab3:
-    if not st.session_state.results:
-        st.info("Run the pipeline first to see analytics.")
+    window = st.radio("Window", list(HISTORY_WINDOWS), horizontal=True, key="analytics_window")
+    if HISTORY_WINDOWS[window] is None:
+        if not st.session_state.results:
+            st.info("Run the pipeline first to see analytics.")
+        else:
+            # Summary precomputed by the pipeline (older / loaded results fall back to the lead list)
+            results = st.session_state.results
+            render_analytics_dashboard(results.get('qualified_leads', []), results.get('aggregates') or None)
     else:
-        leads = st.session_state.results.get('qualified_leads', [])
-        render_analytics_dashboard(leads)
+        history, runs = cached_history_aggregates(env_config.get('data_dir', ''), HISTORY_WINDOWS[window])
+        st.caption(f"{runs} runs from the local store")
+        render_analytics_dashboard([], history)
 
 
 # ─────────────────────────────────────────────────────
@@ -1194,6 +1182,8 @@ Tech Stack | Copyright Year | Source | Date Added | Tags | Notes | Status | Last
         **1. Target Specific Neighborhoods**
         - Instead of: "gym" + "Mumbai"
         - Try: "gym" + "Bandra Mumbai"
+        - Or turn on **Neighborhood Fan-out** in the sidebar: metro queries also search their
+          neighborhoods and stop once those stop finding new businesses
         - Result: More targeted, higher quality leads
         
         **2. Use Descriptive Keywords**
@@ -0,0 +1,82 @@
+"""
+Benchmark corpus: synthetic pages / SerpAPI payloads in three sizes,
+plus (optionally) real ones pulled from a record/replay fixture archive.
+"""
+import json
+from typing import Optional
+from urllib.parse import parse_qs
+
+from core.replay import FixtureArchive, synthetic_page, synthetic_serpapi
+from core.scraper import parse_serpapi_response, extract_signals
+from core.scorer import rule_based_score
+
+PAGE_SIZES = {'small': 1, 'typical': 12, 'huge': 150}
+SERP_SIZES = {'small': 5, 'typical': 20, 'huge': 100}
+LEAD_COUNTS = {'small': 50, 'typical': 500, 'huge': 5000}
+
+
+def synthetic_html(size: str) -> str:
+    """Synthetic page, repeated body blocks to reach small (~5KB) / typical / huge (~1MB) sizes"""
+    base = synthetic_page(f'{size}-bench.example-biz.in', '/')
+    head, _, rest = base.partition('<body>')
+    body, _, tail = rest.partition('</body>')
+    blocks = [body.replace('<h1>', f'<h2>Section {i}</h2><script>var x{i} = 1;</script><h1>') for i in range(PAGE_SIZES[size])]
+    return f"{head}<body>{''.join(blocks)}</body>{tail}"
+
+
+def hostile_pages() -> dict:
+    """Pages that made the contact regexes backtrack (long letter / whitespace runs)"""
+    url = 'https://hostile-bench.example-biz.in/'
+    return {
+        'hostile-spaces': ('a' * 5000 + ' ' * 5000 + 'at', url),
+        'hostile-words': (('word' + ' ' * 4000) * 10 + 'at', url),
+        'hostile-alnum': ('a' * 50000, url),
+    }
+
+
+def synthetic_leads(count: int, seed_query: str = 'dental clinic in Mumbai') -> list:
+    """Fully scored-looking leads for filter / serialization benchmarks"""
+    leads = []
+    page = synthetic_html('small')
+    n = 0
+    while len(leads) < count:
+        places = synthetic_serpapi(f'{seed_query} {n}', 20)
+        for lead in parse_serpapi_response(places, seed_query):
+            lead.update(extract_signals(page, f"https://{lead['website'] or 'none.in'}/"))
+            lead.update(rule_based_score(lead))
+            lead['lead_score'] = lead['rule_score'] + (len(lead['company_name']) % 3)
+            lead['urgency'] = ('HIGH', 'MEDIUM', 'LOW')[len(leads) % 3]
+            lead['estimated_deal_size'] = ('small', 'medium', 'large')[len(leads) % 3]
+            lead['city'] = ('Mumbai', 'Delhi', 'Pune', 'Chennai')[len(leads) % 4]
+            leads.append(lead)
+        n += 1
+    return leads[:count]
+
+
+def build_corpus(archive_path: Optional[str] = None) -> dict:
+    """
+    {'pages': {name: (html, url)}, 'serp': {name: (payload, query)}, 'leads': {name: [lead]}}
+    Recorded fixtures (if given) are added as 'recorded-*' entries.
+    """
+    corpus = {
+        'pages': {**{size: (synthetic_html(size), f'https://{size}-bench.example-biz.in/') for size in PAGE_SIZES},
+                  **hostile_pages()},
+        'serp': {size: (synthetic_serpapi('dental clinic in Mumbai', n), 'dental clinic in Mumbai') for size, n in SERP_SIZES.items()},
+        'leads': {size: synthetic_leads(n) for size, n in LEAD_COUNTS.items()},
+    }
+    if archive_path:
+        corpus_add_recorded(corpus, FixtureArchive.load(archive_path))
+    return corpus
+
+
+def corpus_add_recorded(corpus: dict, archive: FixtureArchive, limit: int = 3):
+    """Largest recorded pages and SerpAPI payloads join the synthetic corpus"""
+    pages = [e for e in archive.entries if e['provider'] == 'web' and e['status'] == 200]
+    for i, entry in enumerate(sorted(pages, key=lambda e: len(e['body']), reverse=True)[:limit]):
+        scheme, _, rest = entry['path'].lstrip('/').partition('/')
+        corpus['pages'][f'recorded-{i}'] = (entry['body'], f'{scheme}://{rest}')
+
+    serps = [e for e in archive.entries if e['provider'] == 'serpapi' and e['status'] == 200]
+    for i, entry in enumerate(sorted(serps, key=lambda e: len(e['body']), reverse=True)[:limit]):
+        params = parse_qs(entry['key'].partition('?')[2].split(' ')[0])
+        corpus['serp'][f'recorded-{i}'] = (json.loads(entry['body']), params.get('q', [''])[0])
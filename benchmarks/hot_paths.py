@@ -0,0 +1,161 @@
+"""
+Microbenchmarks for scraper / scorer / sheet-serialization hot paths.
+
+    python -m benchmarks.hot_paths --save-baseline      # first: record a baseline (on main)
+    python -m benchmarks.hot_paths                      # run + compare to baseline
+    python -m benchmarks.hot_paths --archive fixtures/run.jsonl.gz --filter extract_signals
+
+Reports ops/sec (best of N timing rounds) and per-call allocations
+(tracemalloc: peak bytes + blocks still held after the call). A case
+regresses when ops/sec drops or allocations grow past the thresholds
+vs the saved baseline. Timings are machine-specific, so baseline.json
+is not committed: record it on the machine that runs the comparison.
+Without one the run exits 2 rather than passing unchecked.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.corpus import build_corpus
+from core.scraper import extract_signals, extract_contacts, parse_serpapi_response
+from core.scorer import rule_based_score, build_ai_prompt
+from core.sheets import lead_to_row
+
+DEFAULT_BASELINE = Path(__file__).parent / 'baseline.json'
+SPEED_REGRESSION = 0.15   # >15% fewer ops/sec
+ALLOC_REGRESSION = 0.25   # >25% more peak bytes / retained blocks
+
+
+def collect_cases(corpus: dict) -> dict[str, Callable[[], object]]:
+    """name → zero-arg callable, one per (hot path, corpus entry)"""
+    from enhancements import apply_advanced_filters, leads_frame, filtered_positions
+
+    cases = {}
+    for name, (html, url) in corpus['pages'].items():
+        cases[f'extract_signals[{name}]'] = lambda html=html, url=url: extract_signals(html, url)
+        if name.startswith('hostile-'):
+            cases[f'extract_contacts[{name}]'] = lambda html=html, url=url: extract_contacts(html, url)
+    for name, (payload, query) in corpus['serp'].items():
+        cases[f'parse_serpapi_response[{name}]'] = lambda p=payload, q=query: parse_serpapi_response(p, q)
+
+    leads = corpus['leads']['typical']
+    cases['rule_based_score[typical x500]'] = lambda: [rule_based_score(l) for l in leads]
+    cases['build_ai_prompt[typical x500]'] = lambda: [build_ai_prompt(l) for l in leads]
+    cases['lead_to_row[typical x500]'] = lambda: [lead_to_row(l) for l in leads]
+
+    filters = {
+        'score_range': (5, 10), 'urgency': ['HIGH', 'MEDIUM'], 'min_rating': 3.5, 'min_reviews': 10,
+        'must_have_website': True, 'cities': ['Mumbai', 'Pune'],
+    }
+    for name, batch in corpus['leads'].items():
+        cases[f'apply_advanced_filters[{name} x{len(batch)}]'] = lambda b=batch: apply_advanced_filters(b, filters)
+        # Dashboard path: frame built once per run, then mask + sort per rerun
+        frame = leads_frame(batch)
+        cases[f'filtered_positions[{name} x{len(batch)}]'] = (
+            lambda df=frame: filtered_positions(df, filters, 'Lead Score (High to Low)'))
+    return cases
+
+
+def measure(fn: Callable, min_time: float = 0.2, repeat: int = 5) -> dict:
+    """ops/sec from the best timing round + allocations for a single call"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+
+    return {
+        'ops_per_sec': round(1 / best, 2) if best else float('inf'),
+        'us_per_op': round(best * 1e6, 1),
+        'retained_blocks': blocks,
+        'alloc_peak_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """Regression messages vs baseline (missing cases are skipped)"""
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if cur['ops_per_sec'] < base['ops_per_sec'] * (1 - SPEED_REGRESSION):
+            regressions.append(f"{name}: {cur['ops_per_sec']:,.0f} ops/s vs baseline {base['ops_per_sec']:,.0f}")
+        for key in ('retained_blocks', 'alloc_peak_kb'):
+            if base.get(key) and cur[key] > base[key] * (1 + ALLOC_REGRESSION):
+                regressions.append(f"{name}: {key} {cur[key]:,} vs baseline {base[key]:,}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='LeadGen hot-path microbenchmarks')
+    parser.add_argument('--archive', default='', help='add recorded pages / SerpAPI payloads from a fixture archive')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--filter', default='', help='only cases containing this substring')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per timing round')
+    parser.add_argument('--json', action='store_true', help='print raw results as JSON')
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(args.archive or None)
+    cases = {k: v for k, v in collect_cases(corpus).items() if args.filter in k}
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text())['results'] if baseline_path.exists() else {}
+
+    results = {}
+    print(f"{'case':48} {'ops/s':>12} {'µs/op':>10} {'retained':>8} {'peak KB':>9}  vs base")
+    for name, fn in cases.items():
+        r = measure(fn, min_time=args.min_time)
+        results[name] = r
+        base = baseline.get(name)
+        delta = f"{(r['ops_per_sec'] / base['ops_per_sec'] - 1) * 100:+.1f}%" if base else '—'
+        print(f"{name:48} {r['ops_per_sec']:>12,.1f} {r['us_per_op']:>10,.1f} {r['retained_blocks']:>8,} {r['alloc_peak_kb']:>9,.1f}  {delta}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        merged = {**baseline, **results}
+        baseline_path.write_text(json.dumps({
+            'saved_at': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'machine': platform.platform(),
+            'results': merged,
+        }, indent=2))
+        print(f"\n💾 Baseline saved → {baseline_path}")
+        return 0
+
+    if not baseline:
+        print(f"\n⚠️ No baseline at {baseline_path} — nothing was compared. "
+              f"Record one first (on main): python -m benchmarks.hot_paths --save-baseline")
+        return 2
+
+    regressions = compare(results, baseline)
+    if regressions:
+        print("\n❌ Regressions vs baseline:")
+        for msg in regressions:
+            print(f"  - {msg}")
+        return 1
+    print("\n✅ No regressions vs baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
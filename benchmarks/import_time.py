@@ -0,0 +1,105 @@
+"""
+Import-time / cold-start profile for each entry point.
+
+    python -m benchmarks.import_time                     # all profiles
+    python -m benchmarks.import_time --profile cron --top 20
+    python -m benchmarks.import_time --modules pipeline core.api
+
+Each profile imports what its entry point loads before the first
+upstream request, in a fresh interpreter (python -X importtime), N
+times. Reports the median wall time (interpreter start included), the
+import total and the slowest modules by cumulative time. Exits 1 when a
+profile loads a module it must not (e.g. streamlit in the cron path).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name → (modules imported before the first request, modules that must stay unloaded)
+PROFILES = {
+    'cron': (['cron_job', 'pipeline'], ['streamlit', 'pandas', 'openpyxl', 'gspread', 'google.oauth2',
+                                       'core.replay', 'aiohttp.web']),
+    'cron-api-client': (['cron_job', 'core.api_client'], ['streamlit', 'pandas', 'gspread', 'aiohttp', 'pipeline']),
+    'job-api-server': (['core.api', 'pipeline'], ['streamlit', 'pandas', 'openpyxl', 'gspread']),
+    'dashboard': (['streamlit', 'config', 'enhancements', 'core.jobs'], ['pandas', 'openpyxl', 'gspread']),
+}
+# Reported when loaded, whatever the profile
+HEAVY = ['streamlit', 'pandas', 'numpy', 'pyarrow', 'openpyxl', 'gspread', 'google.oauth2', 'aiohttp', 'requests']
+
+
+def profile_imports(modules: list, repeat: int = 5) -> dict:
+    """Median wall ms, median import total ms and per-module cumulative µs (from the median run)"""
+    code = '; '.join(f'import {m}' for m in modules)
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                              capture_output=True, text=True, env={**os.environ, 'PYTHONPATH': ROOT})
+        wall_ms = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0:
+            raise RuntimeError(f"import failed: {proc.stderr.strip().splitlines()[-1]}")
+        cumulative, top_level = {}, 0
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, us_cumulative, name = line.split('|')
+            cumulative[name.strip()] = int(us_cumulative)
+            if not name[1:].startswith(' '):   # nesting is shown as indentation
+                top_level += int(us_cumulative)
+        runs.append({'wall_ms': wall_ms, 'import_ms': top_level / 1000, 'modules': cumulative})
+    runs.sort(key=lambda r: r['wall_ms'])
+    median = runs[len(runs) // 2]
+    return {
+        'wall_ms': round(statistics.median(r['wall_ms'] for r in runs), 1),
+        'import_ms': round(statistics.median(r['import_ms'] for r in runs), 1),
+        'modules': median['modules'],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='LeadGen import-time / cold-start profile')
+    parser.add_argument('--profile', action='append', choices=list(PROFILES), help='default: all')
+    parser.add_argument('--modules', nargs='+', help='profile these modules instead')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='slowest modules to list per profile')
+    parser.add_argument('--json', action='store_true', help='print raw results as JSON')
+    args = parser.parse_args(argv)
+
+    profiles = {'custom': (args.modules, [])} if args.modules else {
+        name: PROFILES[name] for name in (args.profile or PROFILES)
+    }
+    failures, report = [], {}
+    for name, (modules, forbidden) in profiles.items():
+        r = profile_imports(modules, repeat=args.repeat)
+        loaded = r['modules']
+        report[name] = {k: v for k, v in r.items() if k != 'modules'}
+        report[name]['heavy_loaded'] = [m for m in HEAVY if m in loaded]
+        print(f"\n▶ {name}: import {', '.join(modules)}")
+        print(f"  wall {r['wall_ms']:.0f} ms (interpreter start included) · imports {r['import_ms']:.0f} ms")
+        print(f"  heavy modules loaded: {', '.join(report[name]['heavy_loaded']) or 'none'}")
+        slowest = sorted(((us, m) for m, us in loaded.items() if '.' not in m or m in modules), reverse=True)
+        for us, module in slowest[:args.top]:
+            print(f"    {us / 1000:8.1f} ms  {module}")
+        bad = [m for m in forbidden if m in loaded]
+        if bad:
+            failures.append(f"{name}: loads {', '.join(bad)}")
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    if failures:
+        print("\n❌ Cold-start regressions:")
+        for msg in failures:
+            print(f"  - {msg}")
+        return 1
+    print("\n✅ No forbidden imports")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,27 +3,33 @@ Configuration loader for LeadGen India
 Loads from Streamlit secrets, .env file, or environment variables
 """
 import os
+import sys
 import json
+import logging
 from pathlib import Path
 from typing import Optional
 
-# Priority 1: Try to load Streamlit secrets (for Streamlit Cloud)
-try:
-    import streamlit as st
-    if hasattr(st, 'secrets') and len(st.secrets) > 0:
-        print("✓ Loaded from Streamlit secrets")
-        # Copy secrets to environment variables
-        for key, value in st.secrets.items():
-            os.environ[key] = str(value)
-except:
-    pass
+logger = logging.getLogger(__name__)
+
+# Priority 1: Try to load Streamlit secrets (for Streamlit Cloud).
+# Only when running under Streamlit — headless runs (cron, job API) never import it.
+if 'streamlit' in sys.modules:
+    try:
+        import streamlit as st
+        if hasattr(st, 'secrets') and len(st.secrets) > 0:
+            logger.info("Loaded from Streamlit secrets")
+            # Copy secrets to environment variables
+            for key, value in st.secrets.items():
+                os.environ[key] = str(value)
+    except Exception:
+        pass
 
 # Priority 2: Try to load python-dotenv if available
 try:
     from dotenv import load_dotenv
     if Path('.env').exists():
         load_dotenv('.env')
-        print("✓ Loaded .env file")
+        logger.info("Loaded .env file")
 except ImportError:
     pass
 
@@ -74,6 +80,58 @@ def get_config() -> dict:
         'sheets_service_account_json': load_service_account_json(),
         'min_score': int(os.environ.get('MIN_SCORE', '7')),
         'max_concurrent_scrapes': int(os.environ.get('MAX_CONCURRENT', '5')),
+        'data_dir': os.environ.get('DATA_DIR', '.leadgen'),
+        'scrape_contact_page': os.environ.get('SCRAPE_CONTACT_PAGE', '1') not in ('0', 'false', 'False'),
+        'hunter_max_concurrent': int(os.environ.get('HUNTER_MAX_CONCURRENT', '3')),
+        'hunter_rate_per_sec': float(os.environ.get('HUNTER_RATE_PER_SEC', '5')),
+        'enrichment_ttl_days': float(os.environ.get('ENRICHMENT_TTL_DAYS', '30')),
+        'enrichment_negative_ttl_days': float(os.environ.get('ENRICHMENT_NEGATIVE_TTL_DAYS', '7')),
+        # API budgets (0 = unlimited)
+        'serpapi_daily_limit': int(os.environ.get('SERPAPI_DAILY_LIMIT', '0')),
+        'serpapi_monthly_limit': int(os.environ.get('SERPAPI_MONTHLY_LIMIT', '0')),
+        'groq_daily_tokens': int(os.environ.get('GROQ_DAILY_TOKENS', '0')),
+        'groq_monthly_tokens': int(os.environ.get('GROQ_MONTHLY_TOKENS', '0')),
+        'hunter_daily_limit': int(os.environ.get('HUNTER_DAILY_LIMIT', '0')),
+        'hunter_monthly_limit': int(os.environ.get('HUNTER_MONTHLY_LIMIT', '0')),
+        'budget_reserve_fraction': float(os.environ.get('BUDGET_RESERVE_FRACTION', '0.2')),
+        'sheets_chunk_rows': int(os.environ.get('SHEETS_CHUNK_ROWS', '500')),
+        'sheets_writes_per_minute': int(os.environ.get('SHEETS_WRITES_PER_MINUTE', '60')),
+        'storage_backend': os.environ.get('STORAGE_BACKEND', 'sqlite'),
+        'sheet_write_mode': os.environ.get('SHEET_WRITE_MODE', 'append'),
+        # '' = single Leads tab, 'monthly' = Leads_YYYY_MM tabs + Leads_Index
+        'sheet_partitioning': os.environ.get('SHEET_PARTITIONING', '').strip().lower(),
+        'sheet_mirror': os.environ.get('SHEET_MIRROR', '1') not in ('0', 'false', 'False'),
+        # Errors tab: batched flush triggers (core/errorsink.py)
+        'error_flush_size': int(os.environ.get('ERROR_FLUSH_SIZE', '50')),
+        'error_flush_interval': float(os.environ.get('ERROR_FLUSH_INTERVAL', '120')),
+        # Pipeline runs executing at once in the job manager (core/jobs.py); more wait queued
+        'max_concurrent_jobs': int(os.environ.get('MAX_CONCURRENT_JOBS', '2')),
+        # Neighborhood fan-out (core.scraper.fan_out_neighborhoods): metro queries also search
+        # LOCATION_MODIFIERS, N at a time, until a wave finds < min new businesses per search
+        'neighborhood_fanout': os.environ.get('NEIGHBORHOOD_FANOUT', '0') not in ('0', 'false', 'False'),
+        'fanout_concurrency': int(os.environ.get('FANOUT_CONCURRENCY', '2')),
+        'fanout_min_new_per_search': float(os.environ.get('FANOUT_MIN_NEW_PER_SEARCH', '5')),
+        # Query overlap planner (core/overlap.py): drop queries whose results earlier queries in the
+        # same city are predicted to cover beyond this share (learned from past runs)
+        'overlap_pruning': os.environ.get('OVERLAP_PRUNING', '1') not in ('0', 'false', 'False'),
+        'overlap_max_redundancy': float(os.environ.get('OVERLAP_MAX_REDUNDANCY', '0.7')),
+        # Cron queries planned from per-query yield history (core/scheduler.py); off = WEEKLY_SCHEDULE as-is
+        'adaptive_schedule': os.environ.get('ADAPTIVE_SCHEDULE', '1') not in ('0', 'false', 'False'),
+        # Incremental re-scan of stored leads (core/refresh.py): after its run the cron job revalidates
+        # up to REFRESH_BATCH sites (0 = off) unchecked for REFRESH_INTERVAL_DAYS, re-scoring changed ones
+        'refresh_batch': int(os.environ.get('REFRESH_BATCH', '100')),
+        'refresh_interval_days': float(os.environ.get('REFRESH_INTERVAL_DAYS', '14')),
+        # Cron time box (0 = none): the run stops and saves partial results after this long
+        'cron_deadline_minutes': float(os.environ.get('CRON_DEADLINE_MINUTES', '60')),
+        # HTTP job API (core/api.py): the server binds host/port; with JOB_API_URL set the
+        # dashboard and cron job submit runs to that server instead of running them in-process
+        'job_api_host': os.environ.get('JOB_API_HOST', '127.0.0.1'),
+        'job_api_port': int(os.environ.get('JOB_API_PORT', '8800')),
+        'job_api_url': os.environ.get('JOB_API_URL', ''),
+        'job_api_token': os.environ.get('JOB_API_TOKEN', ''),
+        # Record / replay (core/replay.py)
+        'upstream_base_url': os.environ.get('UPSTREAM_BASE_URL', ''),
+        'record_fixtures': os.environ.get('RECORD_FIXTURES', ''),
     }
 
 
@@ -0,0 +1,97 @@
+"""
+Run analytics as mergeable aggregates.
+
+The pipeline feeds each qualified lead into a LeadAggregates as it is
+enriched and stores the summary with the run results, so the dashboard
+never rescans lead lists. The local lead store keeps a summary of the
+leads each run newly inserted; historical windows merge those, so a
+business found again by later runs is counted once.
+"""
+from collections import Counter
+from typing import Iterable, Optional
+
+COUNTER_FIELDS = ('by_city', 'by_business_type', 'by_score', 'by_urgency', 'by_scored_by')
+
+
+class LeadAggregates:
+    """Counts, histograms and sums — add() is O(1), merge() is O(keys)"""
+
+    def __init__(self):
+        self.total = 0
+        self.score_sum = 0.0
+        self.rating_sum = 0.0
+        self.rated = 0
+        self.with_email = 0
+        self.with_website = 0
+        self.with_whatsapp = 0
+        self.by_city = Counter()
+        self.by_business_type = Counter()
+        self.by_score = Counter()
+        self.by_urgency = Counter()
+        self.by_scored_by = Counter()
+
+    def add(self, lead: dict):
+        self.total += 1
+        score = int(lead.get('lead_score') or 0)
+        self.score_sum += score
+        if lead.get('google_rating'):
+            self.rating_sum += float(lead['google_rating'])
+            self.rated += 1
+        self.with_email += bool(lead.get('email'))
+        self.with_website += bool(lead.get('website') or lead.get('raw_url'))
+        self.with_whatsapp += bool(lead.get('has_whatsapp'))
+        self.by_city[lead.get('city') or 'Unknown'] += 1
+        self.by_business_type[lead.get('business_type') or 'Unknown'] += 1
+        self.by_score[str(score)] += 1
+        self.by_urgency[lead.get('urgency') or 'Unknown'] += 1
+        self.by_scored_by[lead.get('scored_by') or 'Unknown'] += 1
+
+    def merge(self, other: 'LeadAggregates') -> 'LeadAggregates':
+        for field in ('total', 'score_sum', 'rating_sum', 'rated', 'with_email', 'with_website', 'with_whatsapp'):
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        for field in COUNTER_FIELDS:
+            getattr(self, field).update(getattr(other, field))
+        return self
+
+    @property
+    def avg_score(self) -> float:
+        return round(self.score_sum / self.total, 1) if self.total else 0.0
+
+    @property
+    def avg_rating(self) -> float:
+        return round(self.rating_sum / self.rated, 2) if self.rated else 0.0
+
+    @property
+    def high_urgency(self) -> int:
+        return self.by_urgency.get('HIGH', 0)
+
+    def to_dict(self) -> dict:
+        data = {field: getattr(self, field) for field in
+                ('total', 'score_sum', 'rating_sum', 'rated', 'with_email', 'with_website', 'with_whatsapp')}
+        data.update({field: dict(getattr(self, field)) for field in COUNTER_FIELDS})
+        data.update({'avg_score': self.avg_score, 'avg_rating': self.avg_rating, 'high_urgency': self.high_urgency})
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> 'LeadAggregates':
+        agg = cls()
+        for field in ('total', 'score_sum', 'rating_sum', 'rated', 'with_email', 'with_website', 'with_whatsapp'):
+            setattr(agg, field, (data or {}).get(field, 0))
+        for field in COUNTER_FIELDS:
+            setattr(agg, field, Counter((data or {}).get(field) or {}))
+        return agg
+
+    @classmethod
+    def from_leads(cls, leads: Iterable[dict]) -> 'LeadAggregates':
+        agg = cls()
+        for lead in leads:
+            agg.add(lead)
+        return agg
+
+
+def merge_aggregates(summaries: Iterable[dict]) -> LeadAggregates:
+    """One LeadAggregates from stored to_dict() summaries"""
+    total = LeadAggregates()
+    for summary in summaries:
+        total.merge(LeadAggregates.from_dict(summary))
+    return total
@@ -0,0 +1,256 @@
+"""
+HTTP job API — one warm process runs every pipeline job.
+
+Serve:   python -m core.api --port 8800
+Clients: JOB_API_URL=http://127.0.0.1:8800 streamlit run app.py
+         JOB_API_URL=http://127.0.0.1:8800 python cron_job.py
+
+Endpoints (JSON unless noted; Authorization: Bearer JOB_API_TOKEN if set):
+    POST /jobs                  {"queries": [[type, city], ...], "min_score", "max_concurrent_scrapes", "deadline",
+                                 "neighborhood_fanout", "prune_overlap", "budget_reserve_fraction"}
+    GET  /jobs                  recent jobs
+    GET  /jobs/{id}             job state / progress
+    GET  /jobs/{id}/events      SSE: progress, lead (id = seq), done — resumes from Last-Event-ID
+    GET  /jobs/{id}/leads       qualified leads streamed so far (?after=seq)
+    GET  /jobs/{id}/result      final (or partial) result, 409 while running
+    POST /jobs/{id}/cancel
+    GET  /health
+
+Jobs run in the process-wide JobManager (core/jobs.py), so they share the
+worker pool, aiohttp session, caches and Sheets client across requests.
+The client side lives in core/api_client.py.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+from functools import partial
+from typing import Optional
+
+from aiohttp import web
+
+from core.jobs import JobManager, get_job_manager, ACTIVE_STATUSES
+
+logger = logging.getLogger(__name__)
+
+SSE_POLL_INTERVAL = 0.5
+
+
+def _parse_bool(value) -> bool:
+    """JSON true/false, 0/1 or their string forms ("false" is False) — raises ValueError otherwise"""
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('1', 'true', 'yes', 'on'):
+        return True
+    if text in ('0', 'false', 'no', 'off'):
+        return False
+    raise ValueError(f'expected a boolean, got {value!r}')
+
+
+PIPELINE_OPTIONS = {'min_score': int, 'max_concurrent_scrapes': int, 'deadline': float,
+                    'neighborhood_fanout': _parse_bool, 'prune_overlap': _parse_bool}
+CONFIG_OVERRIDES = {'budget_reserve_fraction': float}   # per-run config the caller may set
+# Inclusive (min, max) per numeric option, None = unbounded
+OPTION_RANGES = {'min_score': (1, 10), 'max_concurrent_scrapes': (1, None), 'deadline': (0, None),
+                 'budget_reserve_fraction': (0, 1)}
+
+_dumps = partial(json.dumps, default=str)
+MANAGER_KEY = web.AppKey('manager', JobManager)
+CONFIG_KEY = web.AppKey('config', dict)
+
+
+# ─────────────────────────────────────────────
+# SERVER
+# ─────────────────────────────────────────────
+
+def _json(data, status: int = 200) -> web.Response:
+    return web.json_response(data, status=status, dumps=_dumps)
+
+
+def _error(message: str, status: int) -> web.Response:
+    return _json({'error': message}, status=status)
+
+
+def _bad_request(message: str) -> web.HTTPBadRequest:
+    return web.HTTPBadRequest(text=_dumps({'error': message}), content_type='application/json')
+
+
+def _int_param(value: Optional[str], name: str, default: int) -> int:
+    """Non-negative integer query parameter / header — 400 on anything else"""
+    if value is None or value == '':
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise _bad_request(f'{name} must be a non-negative integer')
+    return number
+
+
+def _option(name: str, cast, value):
+    """Cast a run option and check OPTION_RANGES — raises ValueError when out of range"""
+    try:
+        value = cast(value)
+    except (ValueError, TypeError):
+        raise ValueError(f'invalid {name}: {value!r}') from None
+    low, high = OPTION_RANGES.get(name, (None, None))
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f'{name} must be a finite number')
+    if (low is not None and value < low) or (high is not None and value > high):
+        bounds = f'between {low} and {high}' if high is not None else f'at least {low}'
+        raise ValueError(f'{name} must be {bounds}')
+    return value
+
+
+@web.middleware
+async def _auth(request: web.Request, handler):
+    token = request.app[CONFIG_KEY].get('job_api_token', '')
+    if token and request.path != '/health' and request.headers.get('Authorization') != f'Bearer {token}':
+        return _error('unauthorized', 401)
+    return await handler(request)
+
+
+def _parse_run_request(body: dict) -> tuple[list, dict, dict]:
+    """(queries, pipeline kwargs, config overrides) — raises ValueError on a malformed request"""
+    queries = body.get('queries') or []
+    if not isinstance(queries, list) or not all(
+        isinstance(q, (list, tuple)) and len(q) == 2 and all(isinstance(v, str) and v.strip() for v in q)
+        for q in queries
+    ):
+        raise ValueError('queries must be a list of [business_type, city] pairs')
+    kwargs = {name: _option(name, cast, body[name]) for name, cast in PIPELINE_OPTIONS.items()
+              if body.get(name) is not None}
+    overrides = {name: _option(name, cast, body[name]) for name, cast in CONFIG_OVERRIDES.items()
+                 if body.get(name) is not None}
+    return [tuple(q) for q in queries], kwargs, overrides
+
+
+async def submit_job(request: web.Request) -> web.Response:
+    try:
+        body = await request.json()
+        if not isinstance(body, dict):
+            raise ValueError('expected a JSON object')
+        queries, kwargs, overrides = _parse_run_request(body)
+    except (ValueError, TypeError) as e:
+        raise _bad_request(str(e) or 'invalid JSON body')
+    manager = request.app[MANAGER_KEY]
+    job_id = manager.submit({**request.app[CONFIG_KEY], **overrides}, queries, owner=str(body.get('owner', ''))[:40], **kwargs)
+    return _json(manager.get(job_id), status=202)
+
+
+async def list_jobs(request: web.Request) -> web.Response:
+    limit = min(_int_param(request.query.get('limit'), 'limit', 20), 200)
+    return _json(request.app[MANAGER_KEY].list_jobs(limit))
+
+
+async def get_job(request: web.Request) -> web.Response:
+    job = request.app[MANAGER_KEY].get(request.match_info['job_id'])
+    return _json(job) if job else _error('unknown job', 404)
+
+
+async def job_leads(request: web.Request) -> web.Response:
+    manager = request.app[MANAGER_KEY]
+    job_id = request.match_info['job_id']
+    if not manager.get(job_id):
+        return _error('unknown job', 404)
+    after = _int_param(request.query.get('after'), 'after', 0)
+    return _json([{'seq': seq, 'lead': lead} for seq, lead in manager.leads(job_id, after)])
+
+
+async def job_result(request: web.Request) -> web.Response:
+    manager = request.app[MANAGER_KEY]
+    job = manager.get(request.match_info['job_id'])
+    if not job:
+        return _error('unknown job', 404)
+    if job['status'] in ACTIVE_STATUSES:
+        return _error(f"job is {job['status']}", 409)
+    result = manager.result(job['job_id'])
+    return _json(result) if result else _error(job['error'] or f"job {job['status']} without a result", 410)
+
+
+async def cancel_job(request: web.Request) -> web.Response:
+    manager = request.app[MANAGER_KEY]
+    job_id = request.match_info['job_id']
+    if not manager.get(job_id):
+        return _error('unknown job', 404)
+    return _json({'job_id': job_id, 'cancelling': manager.cancel(job_id)})
+
+
+async def _send_event(resp: web.StreamResponse, event: str, data, event_id: Optional[int] = None):
+    frame = f"event: {event}\n"
+    if event_id is not None:
+        frame += f"id: {event_id}\n"
+    frame += f"data: {_dumps(data)}\n\n"
+    await resp.write(frame.encode())
+
+
+async def job_events(request: web.Request) -> web.StreamResponse:
+    """SSE stream: progress on every state change, one lead event per qualified lead, then done"""
+    manager = request.app[MANAGER_KEY]
+    job_id = request.match_info['job_id']
+    if not manager.get(job_id):
+        return _error('unknown job', 404)
+    after = _int_param(request.headers.get('Last-Event-ID') or request.query.get('after'), 'after', 0)
+    resp = web.StreamResponse(headers={'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache'})
+    await resp.prepare(request)
+    last_state = None
+    while True:
+        job = manager.get(job_id)
+        for seq, lead in manager.leads(job_id, after):
+            await _send_event(resp, 'lead', {'seq': seq, 'lead': lead}, event_id=seq)
+            after = seq
+        state = (job['status'], job['stage'], job['current'], job['message'])
+        if state != last_state:
+            await _send_event(resp, 'progress', job)
+            last_state = state
+        if job['status'] not in ACTIVE_STATUSES:
+            await _send_event(resp, 'done', job)
+            return resp
+        await asyncio.sleep(SSE_POLL_INTERVAL)
+
+
+async def health(request: web.Request) -> web.Response:
+    manager = request.app[MANAGER_KEY]
+    active = [j for j in manager.list_jobs(50) if j['status'] in ACTIVE_STATUSES]
+    return _json({'ok': True, 'workers': manager.max_workers,
+                  'running': sum(j['status'] == 'running' for j in active),
+                  'queued': sum(j['status'] == 'queued' for j in active)})
+
+
+def build_app(config: dict, manager: Optional[JobManager] = None) -> web.Application:
+    app = web.Application(middlewares=[_auth])
+    app[CONFIG_KEY] = config
+    app[MANAGER_KEY] = manager or get_job_manager(config)
+    app.router.add_post('/jobs', submit_job)
+    app.router.add_get('/jobs', list_jobs)
+    app.router.add_get('/jobs/{job_id}', get_job)
+    app.router.add_get('/jobs/{job_id}/events', job_events)
+    app.router.add_get('/jobs/{job_id}/leads', job_leads)
+    app.router.add_get('/jobs/{job_id}/result', job_result)
+    app.router.add_post('/jobs/{job_id}/cancel', cancel_job)
+    app.router.add_get('/health', health)
+    return app
+
+
+def main(argv: Optional[list] = None):
+    from config import get_config
+
+    parser = argparse.ArgumentParser(description='LeadGen HTTP job API')
+    parser.add_argument('--host', default=None, help='default: JOB_API_HOST')
+    parser.add_argument('--port', type=int, default=None, help='default: JOB_API_PORT')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    config = get_config()
+    host = args.host or config['job_api_host']
+    port = args.port or config['job_api_port']
+    app = build_app(config)
+    print(f"🛰️ LeadGen job API on http://{host}:{port} ({app[MANAGER_KEY].max_workers} workers)")
+    web.run_app(app, host=host, port=port, print=None)
+
+
+if __name__ == '__main__':
+    main()
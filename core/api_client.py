@@ -0,0 +1,87 @@
+"""
+Client for the HTTP job API (core/api.py).
+
+Kept apart from the server so thin clients (cron with JOB_API_URL set)
+import only `requests` — not aiohttp, the pipeline or the job manager.
+"""
+import json
+from typing import Optional
+
+import requests
+
+
+class JobAPIClient:
+    """
+    Blocking client with the JobManager read/submit interface, so the
+    dashboard and cron job can use a remote server in its place.
+    """
+
+    def __init__(self, base_url: str, token: str = '', timeout: float = 10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._http = requests.Session()
+        if token:
+            self._http.headers['Authorization'] = f'Bearer {token}'
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        return self._http.request(method, f'{self.base_url}{path}', **kwargs)
+
+    def submit(self, config: Optional[dict], queries: list, owner: str = '', **pipeline_kwargs) -> str:
+        """config is ignored — the server runs with its own keys and settings"""
+        body = {'queries': [list(q) for q in queries], 'owner': owner, **pipeline_kwargs}
+        resp = self._request('POST', '/jobs', json=body)
+        resp.raise_for_status()
+        return resp.json()['job_id']
+
+    def get(self, job_id: str) -> Optional[dict]:
+        resp = self._request('GET', f'/jobs/{job_id}')
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        return resp.json()
+
+    def result(self, job_id: str) -> Optional[dict]:
+        resp = self._request('GET', f'/jobs/{job_id}/result')
+        if resp.status_code in (404, 409, 410):
+            return None
+        resp.raise_for_status()
+        return resp.json()
+
+    def leads(self, job_id: str, after: int = 0) -> list:
+        resp = self._request('GET', f'/jobs/{job_id}/leads', params={'after': after})
+        resp.raise_for_status()
+        return [(item['seq'], item['lead']) for item in resp.json()]
+
+    def list_jobs(self, limit: int = 20) -> list:
+        resp = self._request('GET', '/jobs', params={'limit': limit})
+        resp.raise_for_status()
+        return resp.json()
+
+    def cancel(self, job_id: str) -> bool:
+        resp = self._request('POST', f'/jobs/{job_id}/cancel')
+        return resp.ok and resp.json().get('cancelling', False)
+
+    def events(self, job_id: str, after: int = 0):
+        """Yield (event, data) from the SSE stream until the job finishes"""
+        headers = {'Last-Event-ID': str(after)} if after else {}
+        with self._request('GET', f'/jobs/{job_id}/events', headers=headers, stream=True,
+                           timeout=(self.timeout, None)) as resp:
+            resp.raise_for_status()
+            event, data = 'message', []
+            for line in resp.iter_lines(decode_unicode=True):
+                if line.startswith('event:'):
+                    event = line[6:].strip()
+                elif line.startswith('data:'):
+                    data.append(line[5:].strip())
+                elif not line and data:
+                    yield event, json.loads('\n'.join(data))
+                    event, data = 'message', []
+
+
+def connect_jobs(config: dict):
+    """JobAPIClient when JOB_API_URL is set, else the in-process JobManager"""
+    if config.get('job_api_url'):
+        return JobAPIClient(config['job_api_url'], config.get('job_api_token', ''))
+    from core.jobs import get_job_manager
+    return get_job_manager(config)
@@ -0,0 +1,179 @@
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+from typing import Optional
+
+from core.cache import data_path
+from core.scorer import EST_TOKENS_PER_AI_CALL
+
+logger = logging.getLogger(__name__)
+
+# ── Units per provider: SerpAPI = searches, Groq = tokens, Hunter = requests
+PROVIDERS = ('serpapi', 'groq', 'hunter')
+
+# ── Rough per-run shape used for pre-run estimates
+EST_RESULTS_PER_QUERY = 20
+EST_AI_CANDIDATE_RATE = 0.6     # leads passing the rule pre-filter with ai_needed
+EST_QUALIFIED_RATE = 0.4        # leads reaching enrichment
+EST_HUNTER_RATE = 0.5           # of those, without a confident on-site email / cache hit
+
+# budget.db is shared by concurrent job-manager runs and cron: wait for the
+# write lock instead of failing with "database is locked"
+BUSY_TIMEOUT = 30.0
+
+
+class BudgetManager:
+    """
+    Persistent per-provider usage accounting, per day and per month.
+
+    limits: {provider: {'daily': n, 'monthly': n}} — 0 / missing = unlimited.
+    reserve_fraction: share of each limit this caller must leave untouched
+    (dashboard runs leave headroom for the scheduled cron job).
+    reserve() checks and records in one transaction, so runs sharing
+    budget.db can't both take the last units.
+    """
+
+    def __init__(self, path: str, limits: dict, reserve_fraction: float = 0.0):
+        self.limits = limits
+        self.reserve_fraction = max(0.0, min(1.0, reserve_fraction))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS usage ("
+            " provider TEXT NOT NULL, period TEXT NOT NULL, units REAL NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (provider, period))"
+        )
+        self._conn.commit()
+        self.exhausted: set[str] = set()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _periods(now: Optional[datetime] = None) -> tuple[str, str]:
+        now = now or datetime.now()
+        return f"d:{now.strftime('%Y-%m-%d')}", f"m:{now.strftime('%Y-%m')}"
+
+    def _usage(self, provider: str) -> dict:
+        day, month = self._periods()
+        rows = dict(self._conn.execute(
+            "SELECT period, units FROM usage WHERE provider = ? AND period IN (?, ?)",
+            (provider, day, month),
+        ).fetchall())
+        return {'daily': rows.get(day, 0), 'monthly': rows.get(month, 0)}
+
+    def _left(self, provider: str, used: dict) -> Optional[float]:
+        left = None
+        for window, limit in (self.limits.get(provider) or {}).items():
+            if not limit:
+                continue
+            allowed = limit * (1 - self.reserve_fraction)
+            window_left = allowed - used.get(window, 0)
+            left = window_left if left is None else min(left, window_left)
+        return left
+
+    def _add(self, provider: str, units: float):
+        for period in self._periods():
+            self._conn.execute(
+                "INSERT INTO usage (provider, period, units) VALUES (?, ?, ?) "
+                "ON CONFLICT(provider, period) DO UPDATE SET units = units + excluded.units",
+                (provider, period, units),
+            )
+
+    def _exhausted(self, provider: str, left: float, units: float):
+        if provider not in self.exhausted:
+            logger.warning(f"Budget exhausted for {provider} ({left:.0f} left, need {units:.0f})")
+        self.exhausted.add(provider)
+
+    def usage(self, provider: str) -> dict:
+        with self._lock:
+            return self._usage(provider)
+
+    def remaining(self, provider: str) -> Optional[float]:
+        """Units left before the tightest limit (None = unlimited)"""
+        return self._left(provider, self.usage(provider))
+
+    def can_spend(self, provider: str, units: float = 1) -> bool:
+        """Read-only check (nothing is reserved) — use reserve() before spending"""
+        left = self.remaining(provider)
+        if left is None or left >= units:
+            return True
+        self._exhausted(provider, left, units)
+        return False
+
+    def reserve(self, provider: str, units: float = 1) -> bool:
+        """Record `units` if they fit every limit, atomically across processes; False = over budget"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                left = self._left(provider, self._usage(provider))
+                ok = left is None or left >= units
+                if ok:
+                    self._add(provider, units)
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                raise
+        if not ok:
+            self._exhausted(provider, left, units)
+        return ok
+
+    def record(self, provider: str, units: float = 1):
+        """Add actual usage (negative units hand back part of a reservation)"""
+        if not units:
+            return
+        with self._lock:
+            self._add(provider, units)
+            self._conn.commit()
+
+    def snapshot(self) -> dict:
+        """Usage + remaining per provider, for run results / dashboards"""
+        return {
+            p: {**self.usage(p), 'remaining': self.remaining(p), 'exhausted': p in self.exhausted}
+            for p in PROVIDERS
+        }
+
+
+def estimate_run_cost(queries: list, num_results: int = EST_RESULTS_PER_QUERY, neighborhood_fanout: bool = False) -> dict:
+    """Upper-bound estimate of what a query list will consume (fan-out: every neighborhood searched)"""
+    searches = len(queries)
+    if neighborhood_fanout:
+        from core.scraper import LOCATION_MODIFIERS
+        searches += sum(len(LOCATION_MODIFIERS.get(city, [])) for _, city in queries)
+    leads = searches * num_results
+    ai_calls = round(leads * EST_AI_CANDIDATE_RATE)
+    hunter_calls = round(leads * EST_QUALIFIED_RATE * EST_HUNTER_RATE)
+    return {
+        'serpapi': searches,
+        'groq': ai_calls * EST_TOKENS_PER_AI_CALL,
+        'hunter': hunter_calls,
+        'est_leads': leads,
+        'est_ai_calls': ai_calls,
+    }
+
+
+def check_run_budget(budget: BudgetManager, estimate: dict) -> list[str]:
+    """Human-readable warnings for providers the estimate would overrun"""
+    warnings = []
+    for provider in PROVIDERS:
+        left = budget.remaining(provider)
+        if left is not None and estimate.get(provider, 0) > left:
+            warnings.append(f"{provider}: estimated {estimate[provider]:,.0f} > {max(left, 0):,.0f} remaining — run will degrade")
+    return warnings
+
+
+def build_budget_manager(config: dict) -> BudgetManager:
+    """Budget manager for a pipeline run, limits from config"""
+    limits = {
+        'serpapi': {'daily': config.get('serpapi_daily_limit', 0), 'monthly': config.get('serpapi_monthly_limit', 0)},
+        'groq': {'daily': config.get('groq_daily_tokens', 0), 'monthly': config.get('groq_monthly_tokens', 0)},
+        'hunter': {'daily': config.get('hunter_daily_limit', 0), 'monthly': config.get('hunter_monthly_limit', 0)},
+    }
+    return BudgetManager(
+        data_path(config, 'budget.db'),
+        limits,
+        reserve_fraction=float(config.get('budget_reserve_fraction', 0)),
+    )
@@ -0,0 +1,134 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = '.leadgen'
+
+
+def data_path(config: dict, filename: str) -> str:
+    """Resolve a file inside the local data dir (created on first use)"""
+    data_dir = (config or {}).get('data_dir') or DEFAULT_DATA_DIR
+    os.makedirs(data_dir, exist_ok=True)
+    return os.path.join(data_dir, filename)
+
+
+# ── Work owned by a process: dashboard workers, the job API server and cron
+# can share one data dir, so rows they own (jobs, spooled errors) carry
+# process_token() and a process only takes over work whose owner is gone.
+
+def _boot_id() -> str:
+    try:
+        with open('/proc/sys/kernel/random/boot_id') as f:
+            return f.read().strip()
+    except OSError:
+        return ''   # not Linux: pid checks only
+
+
+BOOT_ID = _boot_id()
+
+
+def process_token() -> str:
+    """'<pid>@<boot id>' of the current process"""
+    return f"{os.getpid()}@{BOOT_ID}"
+
+
+def process_alive(token: str) -> bool:
+    """
+    Whether the process behind a process_token() may still be running:
+    False for empty tokens and tokens from an earlier boot. Where a pid
+    can't be probed (Windows) the owner is assumed alive.
+    """
+    pid, _, boot_id = (token or '').partition('@')
+    if not pid.isdigit() or boot_id != BOOT_ID:
+        return False
+    if int(pid) == os.getpid() or os.name == 'nt':
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True   # exists but belongs to another user
+    return True
+
+
+class TTLCache:
+    """
+    Small persistent key/value cache on SQLite with per-entry expiry.
+    Values are stored as JSON, so anything json-serializable works.
+    """
+
+    def __init__(self, path: str, table: str = 'cache'):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """Return (hit, value). Expired entries count as a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if not row or row[1] < time.time():
+            return False, None
+        try:
+            return True, json.loads(row[0])
+        except json.JSONDecodeError:
+            return False, None
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now + ttl_seconds),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+            return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_open_caches: dict[tuple, TTLCache] = {}
+_open_caches_lock = threading.Lock()
+
+
+def open_cache(config: dict, filename: str, table: str = 'cache') -> Optional[TTLCache]:
+    """
+    Cache in the data dir, or None if the disk isn't usable. One instance
+    per file/table is shared process-wide (concurrent jobs reuse it).
+    """
+    try:
+        key = (os.path.abspath(data_path(config, filename)), table)
+        with _open_caches_lock:
+            if key not in _open_caches:
+                _open_caches[key] = TTLCache(key[0], table=table)
+            return _open_caches[key]
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Cache disabled ({filename}): {e}")
+        return None
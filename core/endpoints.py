@@ -0,0 +1,44 @@
+"""
+Upstream URLs for a run: live providers, or the local replay stand-in
+(core/replay.py) when UPSTREAM_BASE_URL is set. Kept apart from the
+replay harness so production scraping never imports it (or aiohttp.web).
+"""
+from urllib.parse import urlsplit
+
+
+def resolve_endpoints(config: dict) -> dict:
+    """
+    Upstream URLs for a run. With UPSTREAM_BASE_URL set every provider —
+    and every scraped website — is routed to the local stand-in server.
+    """
+    base = (config.get('upstream_base_url') or '').rstrip('/')
+    if not base:
+        return {
+            'serpapi': 'https://serpapi.com/search',
+            'groq': 'https://api.groq.com/openai/v1/chat/completions',
+            'hunter': 'https://api.hunter.io/v2/domain-search',
+            'web': '',
+        }
+    return {
+        'serpapi': f'{base}/serpapi/search',
+        'groq': f'{base}/groq/openai/v1/chat/completions',
+        'hunter': f'{base}/hunter/v2/domain-search',
+        'web': f'{base}/web',
+    }
+
+
+def to_standin_url(url: str, web_base: str) -> str:
+    """https://acme.in/contact → {web_base}/https/acme.in/contact"""
+    if not web_base:
+        return url
+    parts = urlsplit(url)
+    tail = f"/{parts.scheme or 'https'}/{parts.netloc}{parts.path or '/'}"
+    return web_base + tail + (f'?{parts.query}' if parts.query else '')
+
+
+def from_standin_url(url: str, web_base: str) -> str:
+    """Inverse of to_standin_url — scraped signals (e.g. SSL) see the real URL"""
+    if not web_base or not url.startswith(web_base + '/'):
+        return url
+    scheme, _, rest = url[len(web_base) + 1:].partition('/')
+    return f'{scheme}://{rest}'
@@ -0,0 +1,166 @@
+import asyncio
+import aiohttp
+import logging
+from typing import Optional
+
+from core.cache import TTLCache, open_cache
+from core.ratelimit import RateLimiter, shared_limiter
+from core.scraper import extract_domain
+from core.sheets import lookup_email_hunter, HUNTER_URL
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+# Hunter results change slowly; "no email found" is rechecked sooner
+HUNTER_TTL_DAYS = 30
+HUNTER_NEGATIVE_TTL_DAYS = 7
+
+
+class HunterEnricher:
+    """
+    Domain-keyed Hunter.io lookups for one pipeline run.
+
+    - Persistent cache: hits skip the API entirely; empty results are cached
+      with a shorter TTL so dead domains don't burn credits every run.
+    - Rate limiter: caps concurrency/request rate and backs off on 429;
+      build_hunter_enricher() shares one per API key across concurrent runs.
+    - In-flight sharing: leads on the same domain await one request.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, api_key: str,
+                 cache: Optional[TTLCache] = None, limiter: Optional[RateLimiter] = None,
+                 budget=None, url: str = HUNTER_URL, ttl_days: float = HUNTER_TTL_DAYS, negative_ttl_days: float = HUNTER_NEGATIVE_TTL_DAYS):
+        self.session = session
+        self.api_key = api_key
+        self.cache = cache
+        self.limiter = limiter or RateLimiter('hunter', max_concurrent=3, per_second=5)
+        self._rate_limited_at_start = self.limiter.rate_limited   # the limiter may be shared across runs
+        self.budget = budget
+        self.url = url
+        self.ttl = ttl_days * DAY
+        self.negative_ttl = negative_ttl_days * DAY
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.stats = {
+            'lookups': 0,
+            'cache_hits': 0,
+            'negative_cache_hits': 0,
+            'shared_inflight': 0,
+            'api_calls': 0,
+            'api_failures': 0,
+            'rate_limited': 0,
+            'skipped_onsite_email': 0,
+            'skipped_budget': 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.api_key)
+
+    async def lookup(self, website: str) -> dict:
+        """Contact data for a website's domain ({} if none / lookup failed)"""
+        domain = extract_domain(website)
+        if not domain or not self.enabled:
+            return {}
+        self.stats['lookups'] += 1
+
+        if self.cache:
+            hit, cached = self.cache.get(f"hunter:{domain}")
+            if hit:
+                self.stats['cache_hits'] += 1
+                if not cached:
+                    self.stats['negative_cache_hits'] += 1
+                return dict(cached)
+
+        task = self._inflight.get(domain)
+        if task:
+            self.stats['shared_inflight'] += 1
+        else:
+            task = asyncio.ensure_future(self._fetch(domain))
+            self._inflight[domain] = task
+            task.add_done_callback(lambda _t, d=domain: self._inflight.pop(d, None))
+        result = await asyncio.shield(task)
+        return dict(result or {})
+
+    async def _fetch(self, domain: str) -> Optional[dict]:
+        if self.budget and not self.budget.reserve('hunter'):
+            self.stats['skipped_budget'] += 1
+            return None
+        self.stats['api_calls'] += 1
+        result = await lookup_email_hunter(self.session, domain, self.api_key, limiter=self.limiter, url=self.url)
+        if self.budget and result is None:
+            self.budget.record('hunter', -1)   # failed lookups aren't billed
+        self.stats['rate_limited'] = self.limiter.rate_limited - self._rate_limited_at_start
+        if result is None:
+            # Transient failure — don't cache, next run retries
+            self.stats['api_failures'] += 1
+            return None
+        if self.cache:
+            self.cache.set(f"hunter:{domain}", result, self.ttl if result else self.negative_ttl)
+        return result
+
+
+def fill_phone_from_site(lead: dict) -> dict:
+    """A lead without a Maps phone gets the site's first tel: number, else its WhatsApp number"""
+    if lead.get('phone'):
+        return lead
+    sources = lead.get('contact_sources') or {}
+    if lead.get('site_phones'):
+        lead['phone'] = lead['site_phones'][0]
+        lead['phone_source'] = sources.get('phone', '')
+    elif lead.get('whatsapp_number'):
+        lead['phone'] = lead['whatsapp_number']
+        lead['phone_source'] = sources.get('whatsapp', '')
+    return lead
+
+
+async def enrich_lead(enricher: HunterEnricher, lead: dict) -> dict:
+    """
+    Fill the lead's email (and a missing phone from the site). An email on
+    the site's own domain (or a subdomain) skips Hunter entirely; otherwise
+    Hunter is tried and an on-site email found as a mailto / plain-text
+    match is the fallback — "info at site dot com" guesses never are.
+    `email_source` records where it came from.
+    """
+    fill_phone_from_site(lead)
+    site_email = lead.get('site_email', '')
+    site_source = (lead.get('contact_sources') or {}).get('email', '')
+
+    if site_email and lead.get('site_email_confident'):
+        lead['email'] = site_email
+        lead['email_source'] = site_source
+        enricher.stats['skipped_onsite_email'] += 1
+        return lead
+
+    if enricher.enabled and lead.get('website'):
+        hunter_data = await enricher.lookup(lead['website'])
+        if hunter_data.get('email'):
+            lead.update(hunter_data)
+            lead['email_source'] = 'hunter'
+            return lead
+
+    if site_email and not lead.get('email') and not site_source.endswith(':obfuscated'):
+        lead['email'] = site_email
+        lead['email_source'] = site_source
+    return lead
+
+
+def build_hunter_enricher(session: aiohttp.ClientSession, config: dict, budget=None, url: str = HUNTER_URL) -> HunterEnricher:
+    """Create the run's enricher from pipeline config"""
+    cache = open_cache(config, 'enrichment_cache.db', table='hunter') if config.get('enrichment_cache', True) else None
+    limiter = shared_limiter(
+        'hunter',
+        config.get('hunter_key', ''),
+        max_concurrent=int(config.get('hunter_max_concurrent', 3)),
+        per_second=float(config.get('hunter_rate_per_sec', 5)),
+    )
+    return HunterEnricher(
+        session,
+        config.get('hunter_key', ''),
+        cache=cache,
+        limiter=limiter,
+        budget=budget,
+        url=url,
+        ttl_days=float(config.get('enrichment_ttl_days', HUNTER_TTL_DAYS)),
+        negative_ttl_days=float(config.get('enrichment_negative_ttl_days', HUNTER_NEGATIVE_TTL_DAYS)),
+    )
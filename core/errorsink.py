@@ -0,0 +1,241 @@
+"""
+Buffered error sink for pipeline runs.
+
+Errors are aggregated by (node, message) with counts in memory — add()
+never touches disk — and written to the Errors tab in one batched append
+at stage boundaries, or when the number of pending groups / the time
+since the last flush crosses a threshold. Each flush first moves the
+in-memory groups into a local SQLite spool, so anything not written
+(Sheets down, no Sheets configured) stays there and goes out with a
+later flush.
+
+Spooled groups belong to a run: concurrent runs sharing errors.db each
+flush their own. Groups of a finished run (close()) or of a run whose
+process died are taken over by the next flush that has a writer.
+"""
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Optional
+
+from core.cache import data_path, process_token, process_alive
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SIZE = 50           # pending (node, message) groups
+FLUSH_INTERVAL = 120      # seconds since the last flush
+MAX_MESSAGE_LEN = 200
+
+_HOST_RE = re.compile(r'\b(?:https?://)?[\w-]+(?:\.[\w-]+)+(?::\d+)?(?:/\S*)?')
+
+
+def normalize_message(message: str) -> str:
+    """Group key for a message: hosts / URLs masked so one outage is one row"""
+    return _HOST_RE.sub('<host>', str(message).strip())[:MAX_MESSAGE_LEN]
+
+
+SPOOL_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS pending_errors ("
+    " run_id TEXT NOT NULL, owner TEXT NOT NULL, node TEXT NOT NULL, message TEXT NOT NULL,"
+    " count INTEGER NOT NULL, first_seen TEXT NOT NULL, last_seen TEXT NOT NULL, lead_info TEXT,"
+    " PRIMARY KEY (run_id, node, message))"
+)
+
+
+class ErrorSink:
+    """
+    writer: fn(rows) appending Errors-tab rows in one call, or None to
+    keep errors local only (they stay spooled). Rows are ERRORS_HEADERS-shaped:
+    [last seen, message, node, sample lead info, count, first seen].
+    run_id scopes the spooled groups (default: a fresh id).
+    """
+
+    def __init__(self, path: str = ':memory:', writer: Optional[Callable[[list], None]] = None,
+                 flush_size: int = FLUSH_SIZE, flush_interval: float = FLUSH_INTERVAL, run_id: str = ''):
+        self.writer = writer
+        self.run_id = run_id or uuid.uuid4().hex
+        self.owner = process_token()
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.totals: dict[tuple, int] = {}   # this run, across flushes
+        self._last_flush = time.monotonic()
+        self._retry_at = 0.0                 # after a failed flush, triggers wait one interval
+        self._flush_task = None
+        self._buffer: dict[tuple, list] = {}   # (node, message) → [count, first seen, last seen, lead info]
+        self._spooled = 0                      # this run's groups left in the spool by the last flush
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("BEGIN IMMEDIATE")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(pending_errors)")]
+        if columns and 'run_id' not in columns:
+            # Spool from before groups were scoped to runs: keep it as an ownerless run
+            self._conn.execute("ALTER TABLE pending_errors RENAME TO pending_errors_unscoped")
+            self._conn.execute(SPOOL_SCHEMA)
+            self._conn.execute(
+                "INSERT INTO pending_errors SELECT '', '', node, message, count, first_seen, last_seen, lead_info"
+                " FROM pending_errors_unscoped")
+            self._conn.execute("DROP TABLE pending_errors_unscoped")
+        self._conn.execute(SPOOL_SCHEMA)
+        self._conn.commit()
+
+    def add(self, node: str, error: str, lead_info: str = ''):
+        """Record one error in memory; may schedule a flush (never blocks on disk or Sheets)"""
+        message = normalize_message(error)
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            group = self._buffer.setdefault((node, message), [0, now, now, ''])
+            group[0] += 1
+            group[2:] = [now, str(lead_info)[:MAX_MESSAGE_LEN]]
+            self.totals[(node, message)] = self.totals.get((node, message), 0) + 1
+        if self.due():
+            self._schedule_flush()
+
+    def pending(self) -> int:
+        """This run's groups not yet written (buffered or spooled)"""
+        with self._lock:
+            spooled = {tuple(row) for row in self._conn.execute(
+                "SELECT node, message FROM pending_errors WHERE run_id = ?", (self.run_id,))}
+            return len(spooled | set(self._buffer))
+
+    def due(self) -> bool:
+        return bool(self.writer) and time.monotonic() >= self._retry_at and (
+            len(self._buffer) + self._spooled >= self.flush_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if not self._flush_task or self._flush_task.done():
+            self._flush_task = loop.create_task(self.flush_async())
+
+    def _spill(self):
+        """Move buffered groups into the spool (caller holds the lock)"""
+        buffer, self._buffer = self._buffer, {}
+        if not buffer:
+            return
+        self._conn.executemany(
+            "INSERT INTO pending_errors VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(run_id, node, message) DO UPDATE SET count = count + excluded.count,"
+            " last_seen = excluded.last_seen, lead_info = excluded.lead_info",
+            [(self.run_id, self.owner, node, message, count, first, last, info)
+             for (node, message), (count, first, last, info) in buffer.items()],
+        )
+        self._conn.commit()
+
+    def _adopt_orphans(self):
+        """Take over groups of finished runs / dead processes (one transaction, so only one run gets them)"""
+        owners = [row[0] for row in self._conn.execute(
+            "SELECT DISTINCT owner FROM pending_errors WHERE run_id != ?", (self.run_id,))]
+        dead = [owner for owner in owners if not process_alive(owner)]
+        if not dead:
+            return
+        marks = ', '.join('?' for _ in dead)
+        self._conn.execute(
+            "INSERT INTO pending_errors SELECT ?, ?, node, message, count, first_seen, last_seen, lead_info"
+            f" FROM pending_errors WHERE run_id != ? AND owner IN ({marks})"
+            " ON CONFLICT(run_id, node, message) DO UPDATE SET count = count + excluded.count,"
+            " first_seen = MIN(first_seen, excluded.first_seen), last_seen = MAX(last_seen, excluded.last_seen)",
+            (self.run_id, self.owner, self.run_id, *dead),
+        )
+        self._conn.execute(f"DELETE FROM pending_errors WHERE run_id != ? AND owner IN ({marks})",
+                           (self.run_id, *dead))
+        self._conn.commit()
+
+    def flush(self) -> int:
+        """
+        Write this run's pending groups (and any orphaned ones) in one append.
+        Returns rows written — 0 on failure or without a writer, when
+        everything stays spooled.
+        """
+        self._last_flush = time.monotonic()
+        with self._lock:
+            self._spill()
+            if not self.writer:
+                return 0
+            self._adopt_orphans()
+            pending = self._conn.execute(
+                "SELECT node, message, count, first_seen, last_seen, lead_info FROM pending_errors WHERE run_id = ?",
+                (self.run_id,),
+            ).fetchall()
+        if not pending:
+            return 0
+        rows = [[last, message, node, info or '', count, first]
+                for node, message, count, first, last, info in pending]
+        try:
+            self.writer(rows)
+        except Exception as e:
+            logger.error(f"Error sink flush failed ({len(rows)} groups kept for retry): {e}")
+            self._retry_at = time.monotonic() + self.flush_interval
+            self._spooled = len(rows)
+            return 0
+        with self._lock:
+            # Subtract what was written; errors added meanwhile stay pending
+            self._conn.executemany(
+                "UPDATE pending_errors SET count = count - ? WHERE run_id = ? AND node = ? AND message = ?",
+                [(count, self.run_id, node, message) for node, message, count, *_ in pending],
+            )
+            self._conn.execute("DELETE FROM pending_errors WHERE run_id = ? AND count <= 0", (self.run_id,))
+            self._conn.commit()
+            self._spooled = self._conn.execute(
+                "SELECT COUNT(*) FROM pending_errors WHERE run_id = ?", (self.run_id,)).fetchone()[0]
+        return len(pending)
+
+    async def flush_async(self) -> int:
+        return await asyncio.to_thread(self.flush)
+
+    async def checkpoint(self) -> int:
+        """Stage boundary: wait for any scheduled flush, then flush the rest"""
+        if self._flush_task and not self._flush_task.done():
+            await self._flush_task
+        return await self.flush_async()
+
+    async def close(self):
+        """
+        End of run: let a scheduled flush finish, flush what is left (unless
+        the last flush failed just now), then release this run's unwritten
+        groups to later flushes and close the spool.
+        """
+        if self._flush_task and not self._flush_task.done():
+            try:
+                await self._flush_task
+            except Exception as e:
+                logger.error(f"Error sink flush failed: {e}")
+        if time.monotonic() >= self._retry_at:
+            await self.flush_async()
+        await asyncio.to_thread(self._release)
+
+    def _release(self):
+        with self._lock:
+            self._spill()
+            self._conn.execute("UPDATE pending_errors SET owner = '' WHERE run_id = ?", (self.run_id,))
+            self._conn.commit()
+            self._conn.close()
+
+    def summary(self, limit: int = 20) -> list[dict]:
+        """This run's errors, most frequent first"""
+        top = sorted(self.totals.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+        return [{'node': node, 'message': message, 'count': count} for (node, message), count in top]
+
+
+def open_error_sink(config: dict, writer: Optional[Callable[[list], None]] = None, run_id: str = '') -> ErrorSink:
+    """Spooled sink in the data dir (in-memory if the disk is unusable)"""
+    kwargs = {
+        'writer': writer,
+        'run_id': run_id,
+        'flush_size': int(config.get('error_flush_size', FLUSH_SIZE)),
+        'flush_interval': float(config.get('error_flush_interval', FLUSH_INTERVAL)),
+    }
+    try:
+        return ErrorSink(data_path(config, 'errors.db'), **kwargs)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Error spool disabled, keeping errors in memory: {e}")
+        return ErrorSink(**kwargs)
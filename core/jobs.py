@@ -0,0 +1,282 @@
+"""
+Process-wide pipeline job manager.
+
+Runs execute on one background event loop owned by the manager, not on
+Streamlit script threads. At most `max_workers` run at once and the rest
+wait in a queue. Jobs share one aiohttp session, and the on-disk caches
+are shared through core.cache.open_cache. Job state and progress are
+persisted to jobs.db, so any session (or another process sharing the
+data dir) can read them by job id. The UI only reads job state.
+
+cancel(job_id) stops a job cooperatively: queued jobs never start, running
+ones wind down and keep their partial result (status 'cancelled').
+
+Qualified leads are published to job_leads as the pipeline finishes
+each one, so the dashboard can show them while the run continues.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+
+import aiohttp
+
+from core.cache import data_path, process_token, process_alive
+
+logger = logging.getLogger(__name__)
+
+# Overall progress: share of the bar each pipeline stage covers
+STAGE_WEIGHTS = {
+    'search': (0, 20),
+    'scrape': (20, 50),
+    'score': (50, 80),
+    'enrich': (80, 90),
+    'save': (90, 95),
+    'sync': (95, 100),
+}
+PROGRESS_WRITE_INTERVAL = 0.5   # seconds between persisted progress updates
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def overall_percentage(stage: str, current: int, total: int) -> int:
+    start, end = STAGE_WEIGHTS.get(stage, (0, 0))
+    if stage not in STAGE_WEIGHTS:
+        return 0
+    return int(start + (current / total if total > 0 else 0) * (end - start))
+
+
+class JobStore:
+    """
+    jobs table: one row per run, progress columns updated while it runs.
+    `process` is the pid@boot-id of the process executing the job, so a
+    process sharing the data dir can tell live jobs from orphaned ones.
+    """
+
+    def __init__(self, path: str):
+        self.process = process_token()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY, status TEXT NOT NULL, owner TEXT,"
+            " created_at REAL NOT NULL, started_at REAL, finished_at REAL,"
+            " queries TEXT, stage TEXT, current INTEGER, total INTEGER, message TEXT,"
+            " percentage INTEGER DEFAULT 0, error TEXT, result TEXT, process TEXT)"
+        )
+        if 'process' not in [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN process TEXT")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_leads ("
+            " job_id TEXT NOT NULL, seq INTEGER NOT NULL, data TEXT NOT NULL, PRIMARY KEY (job_id, seq))"
+        )
+        self._conn.commit()
+
+    def create(self, job_id: str, queries: list, owner: str = ''):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, owner, process, created_at, queries, stage, message)"
+                " VALUES (?, 'queued', ?, ?, ?, ?, 'queued', 'Waiting for a free worker...')",
+                (job_id, owner, self.process, time.time(), json.dumps(queries)),
+            )
+            self._conn.commit()
+
+    def update(self, job_id: str, **fields):
+        if 'result' in fields:
+            fields['result'] = json.dumps(fields['result'], default=str)
+        columns = ', '.join(f"{k} = ?" for k in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE job_id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT job_id, status, owner, created_at, started_at, finished_at, queries, stage,"
+                " current, total, message, percentage, error FROM jobs WHERE job_id = ?",
+                (job_id,),
+            )
+            row = cur.fetchone()
+            names = [d[0] for d in cur.description]
+        if not row:
+            return None
+        job = dict(zip(names, row))
+        job['queries'] = json.loads(job['queries'] or '[]')
+        return job
+
+    def result(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def add_lead(self, job_id: str, lead: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO job_leads SELECT ?, COALESCE(MAX(seq), 0) + 1, ? FROM job_leads WHERE job_id = ?",
+                (job_id, json.dumps(lead, default=str), job_id),
+            )
+            self._conn.commit()
+
+    def leads(self, job_id: str, after: int = 0) -> list:
+        """[(seq, lead)] published after seq `after`, in publish order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, data FROM job_leads WHERE job_id = ? AND seq > ? ORDER BY seq", (job_id, after)
+            ).fetchall()
+        return [(seq, json.loads(data)) for seq, data in rows]
+
+    def list(self, limit: int = 20) -> list:
+        with self._lock:
+            ids = [r[0] for r in self._conn.execute(
+                "SELECT job_id FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()]
+        return [self.get(job_id) for job_id in ids]
+
+    def queue_position(self, job_id: str) -> int:
+        """1-based position among queued jobs (0 = not queued)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at"
+            ).fetchall()
+        ids = [r[0] for r in rows]
+        return ids.index(job_id) + 1 if job_id in ids else 0
+
+    def interrupt_stale(self) -> int:
+        """Jobs left queued / running by a process that has exited can't resume"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, process FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+            now = time.time()
+            stale = [(now, job_id) for job_id, process in rows if not process_alive(process or '')]
+            self._conn.executemany(
+                "UPDATE jobs SET status = 'interrupted', finished_at = ?, message = 'Worker process exited'"
+                " WHERE job_id = ? AND status IN ('queued', 'running')",
+                stale,
+            )
+            self._conn.commit()
+            return len(stale)
+
+
+class JobManager:
+    """Bounded pool of pipeline runs on a dedicated event loop thread"""
+
+    def __init__(self, path: str, max_workers: int = 2):
+        self.store = JobStore(path)
+        stale = self.store.interrupt_stale()
+        if stale:
+            logger.warning(f"Marked {stale} unfinished jobs from exited processes as interrupted")
+        self.max_workers = max_workers
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._cancel_events: dict[str, asyncio.Event] = {}
+        self._thread = threading.Thread(target=self._run_loop, name='leadgen-jobs', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ready.set()
+        self._loop.run_forever()
+
+    def _shared_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=20, ssl=False))
+        return self._session
+
+    def submit(self, config: dict, queries: list, owner: str = '', **pipeline_kwargs) -> str:
+        """Queue a pipeline run; returns its job id immediately"""
+        job_id = uuid.uuid4().hex[:12]
+        self.store.create(job_id, [list(q) for q in queries], owner)
+        self._cancel_events[job_id] = asyncio.Event()
+        asyncio.run_coroutine_threadsafe(self._run_job(job_id, config, queries, pipeline_kwargs), self._loop)
+        return job_id
+
+    async def _run_job(self, job_id: str, config: dict, queries: list, pipeline_kwargs: dict):
+        from pipeline import run_pipeline
+
+        cancel_event = self._cancel_events[job_id]
+        async with self._slots:
+            if cancel_event.is_set():
+                self._cancel_events.pop(job_id, None)
+                self.store.update(job_id, status='cancelled', finished_at=time.time(), message='Cancelled before start')
+                return
+            self.store.update(job_id, status='running', started_at=time.time(), stage='starting',
+                              message='Initializing pipeline...')
+            last_write = 0.0
+            last_stage = None
+
+            def progress(stage, current, total, message=''):
+                nonlocal last_write, last_stage
+                now = time.monotonic()
+                # Persist on stage change, at the end of a stage, or every PROGRESS_WRITE_INTERVAL
+                if stage == last_stage and current < total and now - last_write < PROGRESS_WRITE_INTERVAL:
+                    return
+                last_write, last_stage = now, stage
+                self.store.update(job_id, stage=stage, current=current, total=total, message=message,
+                                  percentage=overall_percentage(stage, current, total))
+
+            try:
+                result = await run_pipeline(config, queries=queries, progress_callback=progress,
+                                            session=self._shared_session(),
+                                            lead_callback=lambda lead: self.store.add_lead(job_id, lead),
+                                            cancel_event=cancel_event, **pipeline_kwargs)
+                result['job_id'] = job_id
+                partial = result.get('partial')
+                message = f"Found {len(result['qualified_leads'])} qualified leads"
+                if partial:
+                    message += f" (partial: {partial['reason']})"
+                self.store.update(job_id, status='cancelled' if partial and partial['reason'] == 'cancelled' else 'done',
+                                  finished_at=time.time(), stage='done', percentage=100, message=message,
+                                  result=result)
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+                self.store.update(job_id, status='failed', finished_at=time.time(), error=str(e)[:500])
+            finally:
+                self._cancel_events.pop(job_id, None)
+
+    def cancel(self, job_id: str) -> bool:
+        """Ask a queued / running job to stop. False if it already finished."""
+        event = self._cancel_events.get(job_id)
+        if event is None:
+            return False
+        self._loop.call_soon_threadsafe(event.set)
+        self.store.update(job_id, message='Cancelling — finishing in-flight work...')
+        return True
+
+    # ── read side (UI) ─────────────────────────
+
+    def get(self, job_id: str) -> Optional[dict]:
+        job = self.store.get(job_id)
+        if job and job['status'] == 'queued':
+            job['queue_position'] = self.store.queue_position(job_id)
+        return job
+
+    def result(self, job_id: str) -> Optional[dict]:
+        return self.store.result(job_id)
+
+    def leads(self, job_id: str, after: int = 0) -> list:
+        """Qualified leads streamed so far: [(seq, lead)] newer than `after`"""
+        return self.store.leads(job_id, after)
+
+    def list_jobs(self, limit: int = 20) -> list:
+        return self.store.list(limit)
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager(config: dict) -> JobManager:
+    """The process-wide manager (created on first use)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(data_path(config, 'jobs.db'), max_workers=int(config.get('max_concurrent_jobs', 2)))
+        return _manager
@@ -0,0 +1,231 @@
+"""
+Local SQLite mirror of a Google Sheets tab.
+
+Dedup and dashboard reads hit the mirror instead of downloading the
+whole tab. sync() costs one batch_get: header row + last known row
+(checksum) + every row past the last known row count. If the checksum
+changes (rows edited / deleted / re-sorted in the sheet) it falls back
+to a full resync. A full resync can also be requested explicitly:
+
+    python -m core.mirror --resync
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from core.cache import data_path
+from core.sheets import LEADS_HEADERS, row_to_lead, dedup_key, sheet_cell, rowcol_to_a1
+
+logger = logging.getLogger(__name__)
+
+
+def _row_hash(row: list) -> str:
+    values = [str(v) for v in row]
+    while values and values[-1] == '':
+        values.pop()
+    return hashlib.sha1(json.dumps(values).encode()).hexdigest()
+
+
+class SheetMirror:
+    """Incrementally synced local copy of one sheet tab"""
+
+    def __init__(self, path: str, sheet_id: str, tab: str = 'Leads', width: int = len(LEADS_HEADERS)):
+        self.sheet_id = sheet_id
+        self.tab = tab
+        self.last_col = rowcol_to_a1(1, width)[:-1]
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS mirror_meta (
+                sheet_id TEXT, tab TEXT, row_count INTEGER, header_hash TEXT,
+                last_row_hash TEXT, synced_at REAL, PRIMARY KEY (sheet_id, tab));
+            CREATE TABLE IF NOT EXISTS mirror_rows (
+                sheet_id TEXT, tab TEXT, row_num INTEGER, name_key TEXT, phone TEXT,
+                row_json TEXT, PRIMARY KEY (sheet_id, tab, row_num));
+            CREATE INDEX IF NOT EXISTS idx_mirror_key ON mirror_rows (sheet_id, tab, name_key, phone);
+        """)
+        self._conn.commit()
+
+    # ── metadata ───────────────────────────────
+
+    def _meta(self) -> Optional[dict]:
+        row = self._conn.execute(
+            "SELECT row_count, header_hash, last_row_hash, synced_at FROM mirror_meta WHERE sheet_id = ? AND tab = ?",
+            (self.sheet_id, self.tab),
+        ).fetchone()
+        if not row:
+            return None
+        return {'row_count': row[0], 'header_hash': row[1], 'last_row_hash': row[2], 'synced_at': row[3]}
+
+    def _save_meta(self, row_count: int, header: list, last_row: list):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO mirror_meta VALUES (?, ?, ?, ?, ?, ?)",
+            (self.sheet_id, self.tab, row_count, _row_hash(header), _row_hash(last_row), time.time()),
+        )
+
+    def _insert_rows(self, start_row: int, rows: list):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO mirror_rows VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (self.sheet_id, self.tab, start_row + i, *dedup_key(row_to_lead(row)), json.dumps(row))
+                for i, row in enumerate(rows)
+            ],
+        )
+
+    # ── sync ───────────────────────────────────
+
+    def sync(self, worksheet, full: bool = False) -> dict:
+        """Bring the mirror up to date. Returns {'mode', 'rows_read', 'row_count'}."""
+        with self._lock:
+            meta = self._meta()
+            if full or not meta or meta['row_count'] < 2:
+                return self._full_sync(worksheet)
+
+            n = meta['row_count']
+            header, last_row, new_rows = worksheet.batch_get([
+                f'A1:{self.last_col}1',
+                f'A{n}:{self.last_col}{n}',
+                f'A{n + 1}:{self.last_col}',
+            ])
+            header = header[0] if header else []
+            last_row = last_row[0] if last_row else []
+            if _row_hash(header) != meta['header_hash'] or _row_hash(last_row) != meta['last_row_hash']:
+                logger.info(f"Sheet mirror checksum changed for '{self.tab}' — full resync")
+                return self._full_sync(worksheet)
+
+            new_rows = [list(r) for r in new_rows]
+            if new_rows:
+                self._insert_rows(n + 1, new_rows)
+                self._save_meta(n + len(new_rows), header, new_rows[-1])
+                self._conn.commit()
+            return {'mode': 'incremental', 'rows_read': len(new_rows), 'row_count': n + len(new_rows)}
+
+    def _full_sync(self, worksheet) -> dict:
+        values = worksheet.get_all_values()
+        self._conn.execute("DELETE FROM mirror_rows WHERE sheet_id = ? AND tab = ?", (self.sheet_id, self.tab))
+        header = values[0] if values else []
+        if len(values) > 1:
+            self._insert_rows(2, values[1:])
+        self._save_meta(len(values), header, values[-1] if values else [])
+        self._conn.commit()
+        return {'mode': 'full', 'rows_read': len(values), 'row_count': len(values)}
+
+    def record_appended(self, rows: list):
+        """Mirror rows we just appended ourselves — no re-read needed"""
+        if not rows:
+            return
+        with self._lock:
+            meta = self._meta()
+            if not meta:
+                return
+            start = meta['row_count'] + 1
+            rows = [[sheet_cell(v) for v in row] for row in rows]
+            self._insert_rows(start, rows)
+            self._conn.execute(
+                "UPDATE mirror_meta SET row_count = ?, last_row_hash = ?, synced_at = ? WHERE sheet_id = ? AND tab = ?",
+                (start + len(rows) - 1, _row_hash(rows[-1]), time.time(), self.sheet_id, self.tab),
+            )
+            self._conn.commit()
+
+    def record_updated(self, rows: dict):
+        """Mirror rows we just rewrote in place: {row_num: full row}"""
+        if not rows:
+            return
+        with self._lock:
+            meta = self._meta()
+            if not meta:
+                return
+            for row_num, row in rows.items():
+                row = [sheet_cell(v) for v in row]
+                self._insert_rows(row_num, [row])
+                if row_num == meta['row_count']:
+                    self._conn.execute(
+                        "UPDATE mirror_meta SET last_row_hash = ? WHERE sheet_id = ? AND tab = ?",
+                        (_row_hash(row), self.sheet_id, self.tab),
+                    )
+            self._conn.commit()
+
+    # ── reads ──────────────────────────────────
+
+    def existing_keys(self) -> set:
+        """(company_name, phone) dedup keys, same shape as get_existing_leads()"""
+        with self._lock:
+            return set(self._conn.execute(
+                "SELECT name_key, phone FROM mirror_rows WHERE sheet_id = ? AND tab = ?",
+                (self.sheet_id, self.tab),
+            ).fetchall())
+
+    def row_index(self) -> dict:
+        """(company_name, phone) → sheet row number (first occurrence)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name_key, phone, MIN(row_num) FROM mirror_rows WHERE sheet_id = ? AND tab = ? GROUP BY name_key, phone",
+                (self.sheet_id, self.tab),
+            ).fetchall()
+        return {(name, phone): row_num for name, phone, row_num in rows}
+
+    def rows_by_key(self) -> dict:
+        """(company_name, phone) → (row number, row values), first occurrence — for upserts"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name_key, phone, row_num, row_json FROM mirror_rows WHERE sheet_id = ? AND tab = ? ORDER BY row_num",
+                (self.sheet_id, self.tab),
+            ).fetchall()
+        index = {}
+        for name, phone, row_num, row_json in rows:
+            index.setdefault((name, phone), (row_num, json.loads(row_json)))
+        return index
+
+    def read_leads(self, limit: Optional[int] = None) -> list:
+        """Mirrored rows as lead dicts, newest first"""
+        sql = "SELECT row_json FROM mirror_rows WHERE sheet_id = ? AND tab = ? ORDER BY row_num DESC"
+        params = [self.sheet_id, self.tab]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [row_to_lead(json.loads(r[0])) for r in rows]
+
+    def status(self) -> Optional[dict]:
+        with self._lock:
+            return self._meta()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_sheet_mirror(config: dict, sheet_id: str, tab: str = 'Leads') -> Optional[SheetMirror]:
+    """Mirror for the configured sheet, or None if disabled / disk unusable"""
+    if not sheet_id or not config.get('sheet_mirror', True):
+        return None
+    try:
+        return SheetMirror(data_path(config, 'sheet_mirror.db'), sheet_id, tab)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Sheet mirror disabled: {e}")
+        return None
+
+
+if __name__ == '__main__':
+    import argparse
+    from config import get_config
+    from core.sheets import get_sheets_client
+
+    parser = argparse.ArgumentParser(description='Sync the local Leads sheet mirror')
+    parser.add_argument('--resync', action='store_true', help='full resync instead of incremental')
+    parser.add_argument('--tab', default='Leads')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    config = get_config()
+    gc = get_sheets_client(config['sheets_service_account_json'])
+    mirror = open_sheet_mirror(config, config['sheet_id'], args.tab)
+    if not gc or not mirror:
+        raise SystemExit("Sheets not configured (SHEET_ID + service account required)")
+    stats = mirror.sync(gc.open_by_key(config['sheet_id']).worksheet(args.tab), full=args.resync)
+    print(f"✓ Mirror {stats['mode']} sync: read {stats['rows_read']} rows, {stats['row_count']} rows total")
@@ -0,0 +1,168 @@
+"""
+Query overlap planner.
+
+Near-synonym queries in one city ("gym" / "fitness center" / "crossfit",
+"ca firm" / "chartered accountant") return many of the same places, and
+each one costs a SerpAPI search before dedup throws the repeats away.
+The model learns from the result name keys recorded per query in
+query_stats.db (core/scheduler.py) how much of one category's results
+another category's search already returns:
+
+    coverage(a → b) = |A ∩ B| / |B|
+
+It is read directly for a city where both ran, and pooled across cities
+for categories that never ran side by side in the city being planned.
+plan_queries() goes city by city, keeps the query adding the most
+expected unique businesses next, and drops a query once the kept ones
+are predicted to cover more than `max_redundancy` of its results.
+
+    python -m core.overlap --queries "gym:Mumbai" "fitness center:Mumbai" "crossfit:Mumbai"
+    python -m core.overlap --day 2            # a WEEKLY_SCHEDULE day
+"""
+import logging
+import sqlite3
+from typing import Optional
+
+from core.scheduler import open_query_scheduler, pair_key, run_credits
+
+logger = logging.getLogger(__name__)
+
+MIN_SUPPORT = 10                # results behind a coverage figure before it is trusted
+DEFAULT_RESULTS_PER_QUERY = 20  # Maps results per search, before any history
+DEFAULT_TOKENS_PER_LEAD = 660   # core.budget: EST_AI_CANDIDATE_RATE × EST_TOKENS_PER_AI_CALL
+
+
+class OverlapModel:
+    """Pairwise result coverage between (business_type, city) queries, from recorded result sets"""
+
+    def __init__(self, result_sets: dict, tokens_per_lead: float = DEFAULT_TOKENS_PER_LEAD):
+        self.sets = result_sets
+        self.tokens_per_lead = tokens_per_lead
+        shared, total, sizes = {}, {}, {}
+        by_city = {}
+        for (category, city), keys in result_sets.items():
+            by_city.setdefault(city, []).append((category, keys))
+            sizes.setdefault(category, []).append(len(keys))
+        for pairs in by_city.values():
+            for a, keys_a in pairs:
+                for b, keys_b in pairs:
+                    if a != b:
+                        shared[a, b] = shared.get((a, b), 0) + len(keys_a & keys_b)
+                        total[a, b] = total.get((a, b), 0) + len(keys_b)
+        self._pooled = {ab: shared[ab] / total[ab] for ab in total if total[ab] >= MIN_SUPPORT}
+        self._category_size = {c: sum(n) / len(n) for c, n in sizes.items()}
+
+    def coverage(self, kept: tuple, query: tuple) -> float:
+        """Share of `query`'s results that `kept`'s search is expected to return too"""
+        (a, city_a), (b, city_b) = pair_key(*kept), pair_key(*query)
+        if city_a != city_b:
+            return 0.0
+        if a == b:
+            return 1.0
+        keys_a, keys_b = self.sets.get((a, city_a)), self.sets.get((b, city_b))
+        if keys_a is not None and keys_b and len(keys_b) >= MIN_SUPPORT:
+            return len(keys_a & keys_b) / len(keys_b)
+        return self._pooled.get((a, b), 0.0)
+
+    def redundancy(self, kept: list, query: tuple) -> float:
+        """Share of `query`'s results expected to be covered by the kept queries (treated as independent)"""
+        fresh = 1.0
+        for k in kept:
+            fresh *= 1 - self.coverage(k, query)
+        return 1 - fresh
+
+    def expected_results(self, query: tuple) -> float:
+        pair = pair_key(*query)
+        if pair in self.sets:
+            return float(len(self.sets[pair]))
+        return float(self._category_size.get(pair[0], DEFAULT_RESULTS_PER_QUERY))
+
+
+def load_overlap_model(config: dict) -> Optional[OverlapModel]:
+    """Model over query_stats.db (empty without history: only exact repeats overlap), None if unreadable"""
+    scheduler = open_query_scheduler(config)
+    if scheduler is None:
+        return None
+    try:
+        sets = scheduler.result_sets()
+        runs = [r for history in scheduler.history().values() for r in history]
+        unique = sum(r['unique_leads'] for r in runs)
+        tokens_per_lead = sum(r['ai_tokens'] for r in runs) / unique if unique else DEFAULT_TOKENS_PER_LEAD
+        return OverlapModel(sets, tokens_per_lead=tokens_per_lead)
+    except sqlite3.Error as e:
+        logger.warning(f"Query overlap history unreadable: {e}")
+        return None
+    finally:
+        scheduler.close()
+
+
+def plan_queries(queries: list, model: OverlapModel, max_redundancy: float = 0.7) -> list:
+    """
+    One row per query, in input order: {'query', 'action' ('keep' / 'drop'),
+    'expected_results', 'expected_unique', 'redundancy', 'covered_by', 'searches', 'credits'}.
+    expected_unique is what the query adds on top of the kept queries before it
+    in its city (for a dropped query: what running it anyway would add).
+    """
+    rows = [{'query': tuple(q), 'action': 'keep', 'expected_results': model.expected_results(q),
+             'expected_unique': 0.0, 'redundancy': 0.0, 'covered_by': None} for q in queries]
+    by_city = {}
+    for i, row in enumerate(rows):
+        by_city.setdefault(pair_key(*row['query'])[1], []).append(i)
+
+    for indices in by_city.values():
+        kept, remaining = [], list(indices)
+        while remaining:
+            for i in remaining:
+                rows[i]['redundancy'] = model.redundancy([rows[k]['query'] for k in kept], rows[i]['query'])
+                rows[i]['expected_unique'] = rows[i]['expected_results'] * (1 - rows[i]['redundancy'])
+            viable = [i for i in remaining if rows[i]['redundancy'] <= max_redundancy]
+            if not viable:
+                break
+            best = max(viable, key=lambda i: (rows[i]['expected_unique'], -i))
+            kept.append(best)
+            remaining.remove(best)
+        for i in remaining:
+            rows[i]['action'] = 'drop'
+            rows[i]['covered_by'] = max((rows[k]['query'] for k in kept), key=lambda q: model.coverage(q, rows[i]['query']))
+
+    for row in rows:
+        row['searches'] = 1 if row['action'] == 'keep' else 0
+        row['credits'] = round(run_credits(row['searches'], row['searches'] * row['expected_unique'] * model.tokens_per_lead), 2)
+        row['expected_results'] = round(row['expected_results'], 1)
+        row['expected_unique'] = round(row['expected_unique'], 1)
+        row['redundancy'] = round(row['redundancy'], 2)
+    return rows
+
+
+def format_report(rows: list) -> str:
+    """Dry-run table: expected unique yield and credits per query, with totals"""
+    lines = [f"{'query':<40} {'action':<6} {'results':>7} {'unique':>6} {'overlap':>7} {'credits':>7}  covered by"]
+    for row in rows:
+        category, city = row['query']
+        covered = ' in '.join(row['covered_by']) if row['covered_by'] else ''
+        lines.append(f"{category + ' in ' + city:<40} {row['action']:<6} {row['expected_results']:>7} "
+                     f"{row['expected_unique']:>6} {row['redundancy']:>7.0%} {row['credits']:>7}  {covered}")
+    kept = [r for r in rows if r['action'] == 'keep']
+    unique = sum(r['expected_unique'] for r in kept)
+    lines.append(f"\n{len(kept)}/{len(rows)} queries kept: ≈{unique:.0f} unique businesses for "
+                 f"{sum(r['credits'] for r in kept):.2f} credits ({len(rows) - len(kept)} searches saved, "
+                 f"≈{sum(r['expected_unique'] for r in rows) - unique:.0f} unique businesses forgone)")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import argparse
+    from config import get_config
+    from cron_job import WEEKLY_SCHEDULE
+
+    parser = argparse.ArgumentParser(description='Dry run: predicted overlap, unique yield and credits for a query list')
+    parser.add_argument('--queries', nargs='+', metavar='TYPE:CITY', help='default: a WEEKLY_SCHEDULE day')
+    parser.add_argument('--day', type=int, default=0, help='WEEKLY_SCHEDULE day (0 = Monday)')
+    parser.add_argument('--max-redundancy', type=float, default=None, help='default: OVERLAP_MAX_REDUNDANCY')
+    args = parser.parse_args()
+
+    config = get_config()
+    queries = [tuple(q.rsplit(':', 1)) for q in args.queries] if args.queries else WEEKLY_SCHEDULE[args.day]
+    model = load_overlap_model(config) or OverlapModel({})   # unreadable history: exact repeats only
+    max_redundancy = args.max_redundancy if args.max_redundancy is not None else config['overlap_max_redundancy']
+    print(format_report(plan_queries(queries, model, max_redundancy)))
@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import weakref
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Per-provider limiter: caps concurrent requests, spaces request starts
+    to `per_second`, and backs off for everyone after a 429.
+
+    Usage:
+        async with limiter:
+            ... one upstream request ...
+        if resp.status == 429:
+            limiter.penalize(retry_after)
+    """
+
+    def __init__(self, name: str, max_concurrent: int = 2, per_second: float = 1.0):
+        self.name = name
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrent))
+        self._interval = 1.0 / per_second if per_second and per_second > 0 else 0.0
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+        self._strikes = 0
+        self.rate_limited = 0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        try:
+            await self._wait_turn()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+
+    async def _wait_turn(self):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            start = max(now, self._next_slot, self._blocked_until)
+            self._next_slot = start + self._interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def penalize(self, retry_after: Optional[float] = None) -> float:
+        """Register a 429 — block new requests for Retry-After or an exponential backoff"""
+        self.rate_limited += 1
+        self._strikes += 1
+        wait = retry_after if retry_after else min(60.0, 2.0 ** self._strikes)
+        loop = asyncio.get_running_loop()
+        self._blocked_until = max(self._blocked_until, loop.time() + wait)
+        logger.warning(f"{self.name}: rate limited, backing off {wait:.1f}s")
+        return wait
+
+    def reset_backoff(self):
+        """Call after a successful request so the next 429 starts from a short wait"""
+        self._strikes = 0
+
+
+# One limiter per (provider, API key) per event loop: concurrent runs on the
+# job manager's loop share the provider's rate, they don't each get their own.
+# (asyncio primitives are loop-bound, so another loop gets its own limiter.)
+_shared = weakref.WeakKeyDictionary()   # loop → {(name, key hash): RateLimiter}
+_shared_lock = threading.Lock()
+
+
+def shared_limiter(name: str, api_key: str, max_concurrent: int = 2, per_second: float = 1.0) -> RateLimiter:
+    """Process-wide limiter for `name` + `api_key` on the running loop (settings from the first caller)"""
+    key = (name, hashlib.sha256(api_key.encode()).hexdigest())
+    loop = asyncio.get_running_loop()
+    with _shared_lock:
+        limiters = _shared.setdefault(loop, {})
+        if key not in limiters:
+            limiters[key] = RateLimiter(name, max_concurrent=max_concurrent, per_second=per_second)
+        return limiters[key]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header in seconds (HTTP-date form is ignored)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
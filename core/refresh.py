@@ -0,0 +1,215 @@
+"""
+Incremental re-scan of stored leads.
+
+Stored leads go stale: businesses add WhatsApp buttons or booking
+widgets, redesign, or let SSL lapse. refresh_leads() walks leads.db in
+priority order (highest score first, then least recently checked; closed
+leads skipped) and revalidates each site with a conditional GET, using
+the ETag / Last-Modified from its previous check:
+
+- 304, or a body with the same content hash → only the check time moves
+- new content → extract_signals(); only if the hash of the scoring
+  signals (SIGNAL_FIELDS) differs from the stored lead's is the lead
+  re-scored (rule → AI within the Groq budget), updated in place (user
+  fields kept) and queued for Sheets sync
+
+Unchanged sites cost a validator round trip and no AI calls. Leads with
+no site of their own (none, or Instagram / directory pages) are skipped:
+spotting a new website takes a Maps search, not a revalidation.
+
+    python -m core.refresh --limit 200 --min-age-days 14
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+import aiohttp
+
+from core.budget import build_budget_manager
+from core.endpoints import resolve_endpoints
+from core.scorer import score_lead
+from core.scraper import revalidate_website, extract_signals, is_weak_site, is_directory_site
+from core.storage import build_lead_store, SQLiteLeadStore, sync_to_sheets
+
+logger = logging.getLogger(__name__)
+
+# rule_based_score() / build_ai_prompt() inputs read from the homepage
+SIGNAL_FIELDS = (
+    'has_ssl', 'has_mobile_viewport', 'has_whatsapp', 'has_booking_form', 'has_chatbot', 'has_online_payment',
+    'has_contact_form', 'has_gallery', 'has_testimonials', 'has_blog', 'has_social_links',
+    'copyright_year', 'tech_stack_detected',
+)
+# AI prompt text, refreshed along with changed signals
+PAGE_FIELDS = ('page_title', 'meta_desc', 'headings', 'page_snippet')
+CLOSED_STATUSES = ('won', 'lost', 'closed', 'not interested')
+
+
+def signal_hash(signals: dict) -> str:
+    values = [sorted(signals.get(f) or []) if f == 'tech_stack_detected' else signals.get(f) for f in SIGNAL_FIELDS]
+    return hashlib.sha1(json.dumps(values, default=str).encode()).hexdigest()
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha1(re.sub(r'\s+', ' ', html).strip().encode()).hexdigest()
+
+
+def signal_changes(old: dict, new: dict) -> list:
+    """['has_whatsapp: False→True', ...] for the signals that differ"""
+    return [f"{f}: {old.get(f)}→{new.get(f)}" for f in SIGNAL_FIELDS
+            if signal_hash({f: old.get(f)}) != signal_hash({f: new.get(f)})]
+
+
+async def refresh_leads(config: dict, limit: Optional[int] = None, min_age_days: Optional[float] = None,
+                        session: Optional[aiohttp.ClientSession] = None,
+                        progress_callback: Optional[Callable] = None,
+                        cancel_event: Optional[asyncio.Event] = None, deadline: Optional[float] = None) -> dict:
+    """
+    Revalidate up to `limit` stored leads not checked for `min_age_days`
+    and re-score the ones whose signals changed. Returns counts plus
+    'changes': [{'company_name', 'changes', 'old_score', 'new_score'}].
+    """
+    limit = config.get('refresh_batch', 100) if limit is None else limit
+    min_age_days = config.get('refresh_interval_days', 14) if min_age_days is None else min_age_days
+    results = {'checked': 0, 'not_modified': 0, 'unchanged': 0, 'changed': 0, 'failed': 0, 'skipped': 0,
+               'ai_calls': 0, 'bytes': 0, 'saved_to_sheet': 0, 'changes': [], 'errors': []}
+
+    def progress(current, total, message):
+        if progress_callback:
+            progress_callback('refresh', current, total, message)
+
+    store = build_lead_store(config)
+    if not isinstance(store, SQLiteLeadStore):
+        results['errors'].append('Lead refresh needs the local lead store (STORAGE_BACKEND=sqlite)')
+        return results
+
+    budget = mirror = None
+    try:
+        started = time.monotonic()
+
+        def stopped() -> bool:
+            return bool((cancel_event and cancel_event.is_set()) or (deadline and time.monotonic() - started > deadline))
+
+        candidates = await asyncio.to_thread(
+            store.refresh_candidates, time.time() - min_age_days * 86400, limit, CLOSED_STATUSES)
+        progress(0, len(candidates), f"Revalidating {len(candidates)} stored leads...")
+
+        budget = build_budget_manager(config)
+        endpoints = resolve_endpoints(config)
+        semaphore = asyncio.Semaphore(int(config.get('max_concurrent_scrapes', 5)))
+        ai_semaphore = asyncio.Semaphore(3)
+        done = 0
+
+        async def check(lead_id: int, lead: dict, state: dict):
+            nonlocal done
+            async with semaphore:
+                if stopped():
+                    return
+                url = lead.get('raw_url') or lead.get('website') or ''
+                now = time.time()
+                if not url or is_weak_site(url) or is_directory_site(url):
+                    await asyncio.to_thread(store.record_refresh, lead_id, checked_at=now)
+                    results['skipped'] += 1
+                    return
+                fetch = await revalidate_website(session, url, state['etag'] or '', state['last_modified'] or '',
+                                                 web_base=endpoints['web'])
+            results['checked'] += 1
+            done += 1
+            progress(done, len(candidates), f"Checked: {lead.get('company_name', '')[:40]}")
+
+            if fetch['status'] == 'failed':
+                results['failed'] += 1
+                await asyncio.to_thread(store.record_refresh, lead_id, checked_at=now, failures=state['failures'] + 1)
+                return
+            validators = {'etag': fetch['etag'], 'last_modified': fetch['last_modified']}
+            if fetch['status'] == 'not_modified':
+                results['not_modified'] += 1
+                await asyncio.to_thread(store.record_refresh, lead_id, checked_at=now, failures=0, **validators)
+                return
+
+            results['bytes'] += len(fetch['html'])
+            page_hash = content_hash(fetch['html'])
+            signals = extract_signals(fetch['html'], fetch['final_url']) if page_hash != state['content_hash'] else None
+            new_hash = signal_hash(signals) if signals else state['signal_hash']
+            if not signals or new_hash == (state['signal_hash'] or signal_hash(lead)):
+                results['unchanged'] += 1
+                await asyncio.to_thread(store.record_refresh, lead_id, checked_at=now, failures=0, content_hash=page_hash,
+                                        signal_hash=new_hash, **validators)
+                return
+
+            # Signals moved: re-score on the fresh homepage (contacts stay as first scraped)
+            changes = signal_changes(lead, signals)
+            old_score = lead.get('lead_score')
+            lead.update({f: signals[f] for f in SIGNAL_FIELDS + PAGE_FIELDS}, scrape_failed=False, scrape_error='')
+            async with ai_semaphore:
+                await score_lead(session, lead, config.get('openrouter_key', ''), budget=budget, groq_url=endpoints['groq'])
+            results['ai_calls'] += lead.get('scored_by') == 'AI'
+            lead['signal_changes'] = ', '.join(changes)
+            lead['refreshed_at'] = datetime.now().strftime('%Y-%m-%d')
+            await asyncio.to_thread(store.update_lead, lead_id, lead)
+            await asyncio.to_thread(store.record_refresh, lead_id, checked_at=now, failures=0, content_hash=page_hash,
+                                    signal_hash=new_hash, changed_at=now, **validators)
+            results['changed'] += 1
+            results['changes'].append({'company_name': lead.get('company_name', ''), 'changes': changes,
+                                       'old_score': old_score, 'new_score': lead.get('lead_score')})
+
+        own_session = session is None
+        if own_session:
+            session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=10, ssl=False))
+        try:
+            await asyncio.gather(*(check(*c) for c in candidates))
+        finally:
+            if own_session:
+                await session.close()
+        results['partial'] = results['checked'] + results['skipped'] < len(candidates)
+
+        # Changed leads are pending sync again; push them as updates to their sheet rows
+        if results['changed'] and config.get('sheet_id') and config.get('sheets_service_account_json'):
+            from core.sheets import get_sheets_client, INDEX_TAB
+            from core.mirror import open_sheet_mirror
+            gc = await asyncio.to_thread(get_sheets_client, config['sheets_service_account_json'])
+            partition = config.get('sheet_partitioning', '')
+            if gc:
+                mirror = open_sheet_mirror(config, config['sheet_id'], INDEX_TAB if partition else 'Leads')
+                sync = await sync_to_sheets(store, gc, config['sheet_id'], mirror=mirror, mode='upsert', partition=partition,
+                                            max_rows=int(config.get('sheets_chunk_rows', 500)),
+                                            writes_per_minute=int(config.get('sheets_writes_per_minute', 60)))
+                results['saved_to_sheet'] = sync['saved'] + sync['updated']
+                if sync['errors']:
+                    results['errors'].append(f"Google Sheets sync failed ({sync['pending']} pending)")
+            else:
+                results['errors'].append('Google Sheets auth failed')
+
+        progress(len(candidates), len(candidates),
+                 f"Refreshed {results['checked']} leads: {results['changed']} changed, "
+                 f"{results['not_modified'] + results['unchanged']} unchanged, {results['failed']} failed")
+        return results
+    finally:
+        store.close()
+        if budget is not None:
+            budget.close()
+        if mirror is not None:
+            mirror.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    from config import get_config
+
+    parser = argparse.ArgumentParser(description='Revalidate stored leads and re-score the ones whose sites changed')
+    parser.add_argument('--limit', type=int, default=None, help='default: REFRESH_BATCH')
+    parser.add_argument('--min-age-days', type=float, default=None, help='default: REFRESH_INTERVAL_DAYS')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    report = asyncio.run(refresh_leads(
+        get_config(), limit=args.limit, min_age_days=args.min_age_days,
+        progress_callback=lambda stage, current, total, msg: logger.info(f"[{current}/{total}] {msg}"),
+    ))
+    for change in report.pop('changes'):
+        print(f"{change['company_name']}: {change['old_score']} → {change['new_score']} ({', '.join(change['changes'])})")
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,420 @@
+"""
+Record / replay harness for upstream HTTP (SerpAPI, Groq, Hunter.io, websites).
+
+Record:  RECORD_FIXTURES=fixtures/run.jsonl.gz python cron_job.py
+         → every upstream exchange is captured (secrets stripped).
+Replay:  python -m core.replay serve --archive fixtures/run.jsonl.gz --latency-ms 80 --rate-limit-rate 0.05
+         UPSTREAM_BASE_URL=http://127.0.0.1:8900 python cron_job.py
+Bench:   python -m core.replay bench --archive fixtures/run.jsonl.gz --multiplier 20
+
+Requests with no recording get deterministic synthetic responses, so
+throughput runs can go far beyond the recorded query volume. Synthetic
+pages carry an ETag and answer a matching If-None-Match with 304;
+--site-change-rate serves a changed page for that share of sites (for
+exercising python -m core.refresh). URL routing to the stand-in lives
+in core/endpoints.py, so production code never imports this harness.
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import random
+import time
+from typing import Optional
+from urllib.parse import urlencode
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Live host → provider name (also the stand-in path prefix)
+PROVIDER_HOSTS = {
+    'serpapi.com': 'serpapi',
+    'api.groq.com': 'groq',
+    'api.hunter.io': 'hunter',
+}
+SECRET_PARAMS = {'api_key', 'key', 'token', 'access_token'}
+
+
+def _classify(url) -> tuple[str, str]:
+    """(provider, provider-relative path) for a live URL"""
+    host = (url.host or '').lower()
+    for live_host, provider in PROVIDER_HOSTS.items():
+        if host == live_host or host.endswith('.' + live_host):
+            return provider, url.path
+    netloc = url.host if url.is_default_port() else f'{url.host}:{url.port}'
+    return 'web', f'/{url.scheme}/{netloc}{url.path or "/"}'
+
+
+def exchange_key(provider: str, method: str, path: str, query, body: bytes = b'') -> str:
+    """Stable match key — secrets dropped, params sorted, JSON bodies hashed"""
+    params = sorted((k, v) for k, v in query if k not in SECRET_PARAMS)
+    key = f'{method.upper()} {provider}{path}'
+    if params:
+        key += '?' + urlencode(params)
+    if body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True).encode()
+        except (ValueError, UnicodeDecodeError):
+            pass
+        key += ' #' + hashlib.sha1(body).hexdigest()[:16]
+    return key
+
+
+# ─────────────────────────────────────────────
+# FIXTURE ARCHIVE
+# ─────────────────────────────────────────────
+
+class FixtureArchive:
+    """Recorded exchanges as gzipped JSONL, indexed for replay"""
+
+    def __init__(self, entries: Optional[list] = None):
+        self.entries = entries or []
+        self._by_key: dict[str, list] = {}
+        self._by_path: dict[str, list] = {}
+        self._cursor: dict[str, int] = {}
+        for entry in self.entries:
+            self._index(entry)
+
+    def _index(self, entry: dict):
+        for key in [entry['key'], *entry.get('aliases', [])]:
+            self._by_key.setdefault(key, []).append(entry)
+        self._by_path.setdefault(f"{entry['method']} {entry['provider']}{entry['path']}", []).append(entry)
+
+    def add(self, entry: dict):
+        self.entries.append(entry)
+        self._index(entry)
+
+    def match(self, key: str, path_key: str, provider: str) -> Optional[dict]:
+        """Exact key first; API calls fall back to any response for the same endpoint"""
+        pool = self._by_key.get(key)
+        if not pool and provider != 'web':
+            pool = self._by_path.get(path_key)
+            key = path_key
+        if not pool:
+            return None
+        i = self._cursor.get(key, 0)
+        self._cursor[key] = i + 1
+        return pool[i % len(pool)]
+
+    def save(self, path: str):
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry) + '\n')
+        logger.info(f"Recorded {len(self.entries)} upstream exchanges → {path}")
+
+    @classmethod
+    def load(cls, path: str) -> 'FixtureArchive':
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            return cls([json.loads(line) for line in f if line.strip()])
+
+
+# ─────────────────────────────────────────────
+# RECORD MODE
+# ─────────────────────────────────────────────
+
+def recording_session_kwargs(archive: FixtureArchive) -> dict:
+    """
+    aiohttp.ClientSession kwargs that capture every exchange into `archive`.
+    Request bodies come from a trace config; responses are captured on read().
+    """
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx, params):
+        ctx.body_chunks = []
+
+    async def on_chunk_sent(session, ctx, params):
+        ctx.body_chunks.append(params.chunk)
+
+    async def on_request_end(session, ctx, params):
+        params.response._fixture_request_body = b''.join(getattr(ctx, 'body_chunks', []))
+
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_chunk_sent.append(on_chunk_sent)
+    trace.on_request_end.append(on_request_end)
+
+    class RecordingResponse(aiohttp.ClientResponse):
+        _fixture_request_body = b''
+        _fixture_recorded = False
+
+        async def read(self) -> bytes:
+            body = await super().read()
+            if not self._fixture_recorded:
+                self._fixture_recorded = True
+                self._record(body)
+            return body
+
+        def _record(self, body: bytes):
+            request_url = self.request_info.url
+            provider, path = _classify(request_url)
+            # Redirected pages are replayed directly under every URL in the chain
+            aliases = []
+            for hop in self.history:
+                hop_provider, hop_path = _classify(hop.request_info.url)
+                aliases.append(exchange_key(hop_provider, hop.method, hop_path, hop.request_info.url.query.items()))
+            archive.add({
+                'key': exchange_key(provider, self.method, path, request_url.query.items(), self._fixture_request_body),
+                'aliases': aliases,
+                'provider': provider,
+                'method': self.method.upper(),
+                'path': path,
+                'status': self.status,
+                'content_type': self.headers.get('Content-Type', ''),
+                'retry_after': self.headers.get('Retry-After'),
+                'body': body.decode('utf-8', errors='replace'),
+                'recorded_at': time.time(),
+            })
+
+    return {'trace_configs': [trace], 'response_class': RecordingResponse}
+
+
+# ─────────────────────────────────────────────
+# SYNTHETIC UPSTREAMS (no recording for the request)
+# ─────────────────────────────────────────────
+
+SYNTH_WORDS = ['Shree', 'Royal', 'Sai', 'Elite', 'Green', 'Urban', 'Classic', 'Prime', 'Star', 'Lotus', 'Sunrise', 'Metro']
+
+
+def _rng(*parts) -> random.Random:
+    return random.Random(hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest())
+
+
+def synthetic_serpapi(query: str, num: int = 20) -> dict:
+    rng = _rng('serpapi', query)
+    places = []
+    for i in range(num):
+        name = f"{rng.choice(SYNTH_WORDS)} {rng.choice(SYNTH_WORDS)} {query.split(' in ')[0].title()} {i}"
+        slug = ''.join(c for c in name.lower() if c.isalnum())[:24]
+        roll = rng.random()
+        website = '' if roll < 0.25 else (f'https://instagram.com/{slug}' if roll < 0.35 else f'https://{slug}.example-biz.in')
+        places.append({
+            'title': name,
+            'website': website,
+            'phone': f'+91 98{rng.randint(10000000, 99999999)}',
+            'address': f'{rng.randint(1, 300)} Main Road',
+            'rating': round(rng.uniform(3.2, 4.9), 1),
+            'reviews': rng.randint(0, 800),
+            'type': query.split(' in ')[0],
+        })
+    return {'local_results': places}
+
+
+def synthetic_page(host: str, path: str, version: int = 0) -> str:
+    rng = _rng('web', host, path, *([version] if version else []))
+    bits = {
+        'viewport': '<meta name="viewport" content="width=device-width, initial-scale=1">',
+        'whatsapp': f'<a href="https://wa.me/9198{rng.randint(10000000, 99999999)}">WhatsApp</a>',
+        'booking': '<a href="https://calendly.com/x">Book now</a>',
+        'email': f'<a href="mailto:info@{host}">Email us</a>',
+        'form': '<form action="/contact"><input name="q"></form>',
+        'gallery': '<section id="gallery">Our work</section>',
+    }
+    body = ''.join(v for v in bits.values() if rng.random() < 0.5)
+    filler = ' '.join(rng.choice(SYNTH_WORDS) for _ in range(rng.randint(50, 600)))
+    return (f'<html><head><title>{host}</title>{bits["viewport"] if "viewport" in body else ""}'
+            f'<meta name="description" content="Welcome to {host}"></head><body><h1>{host}</h1>'
+            f'{body}<p>{filler}</p><footer>© {rng.randint(2012, 2025)} {host}</footer></body></html>')
+
+
+def synthetic_groq(body: bytes) -> dict:
+    rng = _rng('groq', hashlib.sha1(body).hexdigest())
+    content = {
+        'lead_score': rng.randint(4, 10),
+        'service_opportunity': rng.choice(['Website Redesign', 'SEO', 'WhatsApp Automation', 'Online Booking']),
+        'gaps_found': 'Synthetic replay response.',
+        'reasoning': 'Synthetic replay response.',
+        'recommended_pitch': 'Aapki website ko modern banate hain.',
+        'urgency': rng.choice(['HIGH', 'MEDIUM', 'LOW']),
+        'estimated_deal_size': rng.choice(['small', 'medium', 'large']),
+    }
+    return {
+        'choices': [{'message': {'content': json.dumps(content)}}],
+        'usage': {'total_tokens': rng.randint(800, 1200)},
+    }
+
+
+def synthetic_hunter(domain: str) -> dict:
+    rng = _rng('hunter', domain)
+    if rng.random() < 0.5:
+        return {'data': {'emails': []}}
+    return {'data': {'emails': [{'value': f'contact@{domain}', 'first_name': rng.choice(SYNTH_WORDS), 'last_name': ''}]}}
+
+
+# ─────────────────────────────────────────────
+# STAND-IN SERVER
+# ─────────────────────────────────────────────
+
+class StandInServer:
+    """
+    Local aiohttp server replaying recorded upstreams.
+
+    latency_ms / jitter_ms: per-response delay
+    error_rate:             share of requests answered with 503
+    rate_limit_rate:        share of API requests answered with 429 + Retry-After
+    site_change_rate:       share of synthetic sites serving a changed page (per seed)
+    """
+
+    def __init__(self, archive: Optional[FixtureArchive] = None, latency_ms: float = 0, jitter_ms: float = 0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 1.0,
+                 seed: int = 0, synthetic: bool = True, site_change_rate: float = 0.0):
+        self.archive = archive or FixtureArchive()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.synthetic = synthetic
+        self.site_change_rate = site_change_rate
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ''
+        self.stats = {'requests': 0, 'replayed': 0, 'synthetic': 0, 'not_found': 0, 'errors_injected': 0, 'rate_limited': 0}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route('*', '/{provider}/{tail:.*}', self.handle)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f'http://{host}:{port}'
+        return self.base_url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        self.stats['requests'] += 1
+        provider = request.match_info['provider']
+        path = '/' + request.match_info['tail']
+        body = await request.read()
+
+        delay = self.latency_ms + (self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        if provider != 'web' and self._rng.random() < self.rate_limit_rate:
+            self.stats['rate_limited'] += 1
+            return web.Response(status=429, headers={'Retry-After': str(self.retry_after)}, text='rate limited')
+        if self._rng.random() < self.error_rate:
+            self.stats['errors_injected'] += 1
+            return web.Response(status=503, text='injected error')
+
+        key = exchange_key(provider, request.method, path, request.query.items(), body)
+        entry = self.archive.match(key, f'{request.method.upper()} {provider}{path}', provider)
+        if entry:
+            self.stats['replayed'] += 1
+            headers = {'Retry-After': entry['retry_after']} if entry.get('retry_after') else None
+            return web.Response(status=entry['status'], text=entry['body'], headers=headers,
+                                content_type=(entry.get('content_type') or 'text/html').split(';')[0])
+
+        if self.synthetic:
+            self.stats['synthetic'] += 1
+            return self._synthetic(provider, path, request, body)
+        self.stats['not_found'] += 1
+        return web.Response(status=404, text='no fixture')
+
+    def _synthetic(self, provider: str, path: str, request: web.Request, body: bytes) -> web.Response:
+        if provider == 'serpapi':
+            return web.json_response(synthetic_serpapi(request.query.get('q', ''), int(request.query.get('num', 20))))
+        if provider == 'groq':
+            return web.json_response(synthetic_groq(body))
+        if provider == 'hunter':
+            return web.json_response(synthetic_hunter(request.query.get('domain', '')))
+        _, _, rest = path.lstrip('/').partition('/')
+        host, _, page = rest.partition('/')
+        version = int(_rng('change', host, self.seed).random() < self.site_change_rate) if self.site_change_rate else 0
+        text = synthetic_page(host, '/' + page, version)
+        etag = f'"{hashlib.sha1(text.encode()).hexdigest()[:16]}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(text=text, content_type='text/html', headers={'ETag': etag})
+
+
+# ─────────────────────────────────────────────
+# THROUGHPUT BENCH
+# ─────────────────────────────────────────────
+
+async def run_replay_bench(archive_path: str = '', queries: Optional[list] = None, multiplier: int = 1,
+                           **server_options) -> dict:
+    """Run the full pipeline against the stand-in at `multiplier`× the query volume"""
+    from pipeline import run_pipeline, DEFAULT_QUERIES
+
+    archive = FixtureArchive.load(archive_path) if archive_path else FixtureArchive()
+    server = StandInServer(archive, **server_options)
+    base = await server.start()
+    base_queries = queries or DEFAULT_QUERIES
+    # Suffix repeated copies so each is a distinct (synthetic) search
+    bench_queries = [
+        (biz if n == 0 else f'{biz} {n}', city)
+        for n in range(multiplier) for biz, city in base_queries
+    ]
+    config = {
+        'serpapi_key': 'replay', 'openrouter_key': 'replay', 'hunter_key': 'replay',
+        'upstream_base_url': base, 'search_delay': 0, 'ai_delay': 0, 'enrichment_cache': False,
+        'data_dir': '.leadgen/replay',
+    }
+    start = time.perf_counter()
+    try:
+        result = await run_pipeline(config, queries=bench_queries)
+    finally:
+        await server.stop()
+    elapsed = time.perf_counter() - start
+    return {
+        'queries': len(bench_queries),
+        'leads_scraped': result['total_scraped'],
+        'qualified': len(result['qualified_leads']),
+        'elapsed_s': round(elapsed, 2),
+        'leads_per_s': round(result['total_scraped'] / elapsed, 1) if elapsed else 0,
+        'upstream': server.stats,
+    }
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description='LeadGen upstream record/replay harness')
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name in ('serve', 'bench'):
+        p = sub.add_parser(name)
+        p.add_argument('--archive', default='', help='fixture archive (.jsonl.gz) recorded with RECORD_FIXTURES')
+        p.add_argument('--latency-ms', type=float, default=0)
+        p.add_argument('--jitter-ms', type=float, default=0)
+        p.add_argument('--error-rate', type=float, default=0.0)
+        p.add_argument('--rate-limit-rate', type=float, default=0.0)
+        p.add_argument('--retry-after', type=float, default=1.0)
+        p.add_argument('--seed', type=int, default=0)
+        p.add_argument('--site-change-rate', type=float, default=0.0, help='share of synthetic sites serving a changed page')
+        p.add_argument('--no-synthetic', action='store_true', help='404 instead of synthesizing unrecorded requests')
+    sub.choices['serve'].add_argument('--host', default='127.0.0.1')
+    sub.choices['serve'].add_argument('--port', type=int, default=8900)
+    sub.choices['bench'].add_argument('--multiplier', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s %(message)s')
+    options = dict(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                   rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+                   seed=args.seed, synthetic=not args.no_synthetic, site_change_rate=args.site_change_rate)
+
+    if args.command == 'bench':
+        report = asyncio.run(run_replay_bench(args.archive, multiplier=args.multiplier, **options))
+        print(json.dumps(report, indent=2))
+        return
+
+    archive = FixtureArchive.load(args.archive) if args.archive else FixtureArchive()
+    server = StandInServer(archive, **options)
+    print(f"🎭 Stand-in upstreams on http://{args.host}:{args.port} ({len(archive.entries)} recorded exchanges)")
+    print(f"   UPSTREAM_BASE_URL=http://{args.host}:{args.port}")
+    web.run_app(server.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == '__main__':
+    main()
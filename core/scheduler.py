@@ -0,0 +1,300 @@
+"""
+Yield-driven query scheduler for the cron job.
+
+Every run records, per (business_type, city) pair, what the query cost
+and what it produced: unique leads, leads new to the store, qualified
+and new qualified leads, SerpAPI searches and (estimated) Groq tokens.
+plan() picks the day's queries by expected new qualified leads per
+credit:
+
+- every pair is ranked by a recency-weighted yield, shrunk towards its
+  category's yield (untried pairs get the category yield alone), plus
+  a UCB-style exploration bonus that shrinks as a pair accumulates runs
+- a share of each day's slots is reserved for untried pairs
+- at most MAX_PER_CATEGORY picks per category per day
+- pairs whose last EXHAUSTED_RUNS runs found nothing new rest for
+  REST_DAYS, and no pair repeats within MIN_GAP_DAYS
+
+The static weekly schedule is the seed: on a cold start the plan is
+exactly today's seed, and the seed's categories × cities (plus every
+pair seen in history) form the candidate pool.
+
+    python -m core.scheduler                  # pair history + today's plan
+    python -m core.scheduler --day 2 --top 30
+"""
+import json
+import logging
+import math
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from core.cache import data_path
+
+logger = logging.getLogger(__name__)
+
+# ── Cost model: one SerpAPI search is one credit; Groq tokens are cheap next to
+# the monthly search quota (a query's AI scoring is ~13k tokens ≈ 0.25 credit)
+GROQ_TOKENS_PER_CREDIT = 50_000
+
+# ── Planning knobs
+RECENCY_DECAY = 0.5         # weight of each older run relative to the next newer one
+PRIOR_WEIGHT = 1.0          # pseudo-runs of the category prior mixed into a pair's estimate
+DEFAULT_PRIOR = 1.0         # new qualified leads per credit assumed before any history
+EXPLORATION_WEIGHT = 0.5    # UCB bonus, as a multiple of the overall mean yield
+EXPLORE_SHARE = 0.2         # share of daily slots reserved for untried pairs
+EXHAUSTED_RUNS = 2          # consecutive runs with no new qualified lead → rest
+REST_DAYS = 21
+MIN_GAP_DAYS = 7            # Maps results barely move within a week
+# Runs are stamped when they finish, so last week's run of a weekly slot is a
+# little under 7 days old when the next plan is made; gaps are measured with
+# this much slack so a pair comes back on the same weekday
+GAP_SLACK_SECONDS = 12 * 3600
+MAX_PER_CATEGORY = 2        # per day, so one strong category can't take every slot
+
+
+def pair_key(business_type: str, city: str) -> tuple[str, str]:
+    return business_type.strip().lower(), city.strip()
+
+
+def run_credits(serpapi_credits: float, ai_tokens: float) -> float:
+    return serpapi_credits + ai_tokens / GROQ_TOKENS_PER_CREDIT
+
+
+class QueryScheduler:
+    """
+    query_runs: one row per (run, pair) with yield and cost.
+    query_results: the name keys each (run, pair) returned (core/overlap.py).
+    """
+
+    def __init__(self, path: str, seed: Optional[dict] = None):
+        self.seed = {day: [pair_key(*q) for q in queries] for day, queries in (seed or {}).items()}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_runs ("
+            " run_id TEXT NOT NULL, business_type TEXT NOT NULL, city TEXT NOT NULL, ran_at REAL NOT NULL,"
+            " results INTEGER NOT NULL, unique_leads INTEGER NOT NULL, new_unique INTEGER NOT NULL,"
+            " qualified INTEGER NOT NULL, new_qualified INTEGER NOT NULL,"
+            " serpapi_credits REAL NOT NULL, ai_tokens REAL NOT NULL, partial INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (run_id, business_type, city))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_query_runs_pair ON query_runs (business_type, city, ran_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_results ("
+            " run_id TEXT NOT NULL, business_type TEXT NOT NULL, city TEXT NOT NULL, ran_at REAL NOT NULL,"
+            " name_keys TEXT NOT NULL, PRIMARY KEY (run_id, business_type, city))"
+        )
+        self._conn.commit()
+
+    # ── history ────────────────────────────────
+
+    def record(self, result: dict, ran_at: Optional[float] = None) -> int:
+        """Store a pipeline result's query_stats; returns the number of pairs recorded"""
+        ran_at = ran_at or time.time()
+        partial = 1 if result.get('partial') else 0
+        rows = [
+            (result['run_id'], *pair_key(s['business_type'], s['city']), ran_at, s['results'], s['unique'],
+             s['new_unique'], s['qualified'], s['new_qualified'], s['serpapi_credits'], s['ai_tokens'], partial)
+            for s in result.get('query_stats') or []
+        ]
+        keys = [
+            (result['run_id'], *pair_key(s['business_type'], s['city']), ran_at, json.dumps(s['result_keys']))
+            for s in result.get('query_stats') or [] if s.get('result_keys')
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO query_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.executemany("INSERT OR REPLACE INTO query_results VALUES (?, ?, ?, ?, ?)", keys)
+            self._conn.commit()
+        return len(rows)
+
+    def history(self) -> dict:
+        """{pair: [run dicts, oldest first]}"""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT business_type, city, ran_at, results, unique_leads, new_unique, qualified, new_qualified,"
+                " serpapi_credits, ai_tokens, partial FROM query_runs ORDER BY ran_at"
+            )
+            names = [d[0] for d in cur.description]
+            rows = cur.fetchall()
+        runs = {}
+        for row in rows:
+            run = dict(zip(names, row))
+            runs.setdefault((run['business_type'], run['city']), []).append(run)
+        return runs
+
+    def result_sets(self) -> dict:
+        """{pair: set of name keys} from each pair's latest recorded run"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT business_type, city, name_keys FROM query_results ORDER BY ran_at"
+            ).fetchall()
+        return {(category, city): set(json.loads(keys)) for category, city, keys in rows}
+
+    # ── estimates ──────────────────────────────
+
+    @staticmethod
+    def _yields(runs: list) -> list:
+        """New qualified leads per credit for each complete run (partial runs undercount)"""
+        return [r['new_qualified'] / max(run_credits(r['serpapi_credits'], r['ai_tokens']), 1e-9)
+                for r in runs if not r['partial']]
+
+    def pair_stats(self, now: Optional[float] = None) -> dict:
+        """{pair: stats} for every candidate pair — yield estimate, runs, rest / gap state"""
+        now = now or time.time()
+        history = self.history()
+        yields = {pair: self._yields(runs) for pair, runs in history.items()}
+
+        all_yields = [y for ys in yields.values() for y in ys]
+        overall = sum(all_yields) / len(all_yields) if all_yields else DEFAULT_PRIOR
+        by_category = {}
+        for (category, _), ys in yields.items():
+            by_category.setdefault(category, []).extend(ys)
+        category_prior = {c: sum(ys) / len(ys) for c, ys in by_category.items() if ys}
+
+        categories = {c for pairs in self.seed.values() for c, _ in pairs}
+        cities = {city for pairs in self.seed.values() for _, city in pairs}
+        candidates = {(c, city) for c in categories for city in cities} | set(history)
+        total_runs = sum(len(ys) for ys in yields.values())
+
+        stats = {}
+        for pair in candidates:
+            runs = history.get(pair, [])
+            ys = yields.get(pair, [])
+            prior = category_prior.get(pair[0], overall)
+            # Recency-weighted mean, shrunk towards the category prior
+            weights = [RECENCY_DECAY ** (len(ys) - 1 - i) for i in range(len(ys))]
+            estimate = (sum(w * y for w, y in zip(weights, ys)) + PRIOR_WEIGHT * prior) / (sum(weights) + PRIOR_WEIGHT)
+            bonus = EXPLORATION_WEIGHT * overall * math.sqrt(math.log(total_runs + 1) / (len(ys) + 1))
+            last_run = runs[-1]['ran_at'] if runs else None
+            complete = [r for r in runs if not r['partial']]
+            exhausted = (len(complete) >= EXHAUSTED_RUNS
+                         and all(r['new_qualified'] == 0 for r in complete[-EXHAUSTED_RUNS:]))
+            if exhausted and now - last_run < REST_DAYS * 86400 - GAP_SLACK_SECONDS:
+                state = 'resting'
+            elif last_run and now - last_run < MIN_GAP_DAYS * 86400 - GAP_SLACK_SECONDS:
+                state = 'recent'
+            else:
+                state = 'ready'
+            stats[pair] = {
+                'runs': len(runs),
+                'estimate': round(estimate, 3),
+                'score': round(estimate + bonus, 3),
+                'new_qualified': sum(r['new_qualified'] for r in runs),
+                'credits': round(sum(run_credits(r['serpapi_credits'], r['ai_tokens']) for r in runs), 2),
+                'last_run': last_run,
+                'state': state,
+            }
+        return stats
+
+    # ── planning ───────────────────────────────
+
+    def plan(self, day: Optional[datetime] = None, n: Optional[int] = None, overlap=None,
+             max_redundancy: float = 0.7) -> list:
+        """
+        The day's queries: [{'query': (business_type, city), 'reason', 'expected'}]
+        reason is 'explore' (untried pair), 'exploit' (pair with history) or 'seed'
+        (cold start). `expected` is new qualified leads per credit.
+        overlap: core.overlap.OverlapModel — a pair whose results the day's earlier
+        picks are predicted to cover beyond max_redundancy is passed over.
+        """
+        day = day or datetime.now()
+        seed_today = self.seed.get(day.weekday()) or self.seed.get(0) or []
+        n = n or len(seed_today)
+        stats = self.pair_stats(now=day.timestamp())
+        ready = {pair: s for pair, s in stats.items() if s['state'] == 'ready'}
+        rng = random.Random(day.strftime('%Y-%m-%d'))   # same plan for a re-run on the same day
+
+        # Best expected yield (+ exploration bonus) first; ties — all of them on a
+        # cold start — go to today's seed, then at random
+        ranked = sorted(ready, key=lambda p: (-ready[p]['score'], p not in seed_today, rng.random()))
+        untried = [p for p in ranked if ready[p]['runs'] == 0]
+        tried = any(s['runs'] for s in stats.values())
+
+        picks, per_category = [], {}
+
+        def take(pairs, limit):
+            for pair in pairs:
+                if limit <= 0 or len(picks) >= n:
+                    return
+                if any(pair == p for p, _ in picks) or per_category.get(pair[0], 0) >= MAX_PER_CATEGORY:
+                    continue
+                if overlap and overlap.redundancy([p for p, _ in picks], pair) > max_redundancy:
+                    continue
+                per_category[pair[0]] = per_category.get(pair[0], 0) + 1
+                if not tried:
+                    picks.append((pair, 'seed' if pair in seed_today else 'explore'))
+                else:
+                    picks.append((pair, 'exploit' if ready[pair]['runs'] else 'explore'))
+                limit -= 1
+
+        take(untried, max(1, round(n * EXPLORE_SHARE)))
+        take(ranked, n)
+        return [{'query': pair, 'reason': reason, 'expected': ready[pair]['estimate']} for pair, reason in picks]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_query_scheduler(config: dict, seed: Optional[dict] = None) -> Optional[QueryScheduler]:
+    """Scheduler on query_stats.db, or None if the disk is unusable (callers fall back to the seed)"""
+    try:
+        return QueryScheduler(data_path(config, 'query_stats.db'), seed)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Adaptive schedule disabled: {e}")
+        return None
+
+
+def tally_query_yield(query_stats: list, searched: list, qualified: list, known_keys: Optional[set]) -> list:
+    """
+    Fill query_stats (one dict per executed query) from the run's leads.
+    searched: [(query index, lead)] for every unique lead, attributed to the
+    query that found it first. known_keys: store dedup keys from before this
+    run's save (None = unknown, every lead counts as new).
+    """
+    from core.scorer import EST_TOKENS_PER_AI_CALL
+    from core.sheets import dedup_key
+
+    qualified_ids = {id(lead) for lead in qualified}
+    for i, lead in searched:
+        stats = query_stats[i]
+        new = known_keys is None or dedup_key(lead) not in known_keys
+        stats['new_unique'] += new
+        if id(lead) in qualified_ids:
+            stats['qualified'] += 1
+            stats['new_qualified'] += new
+        if lead.get('scored_by') == 'AI':
+            stats['ai_tokens'] += EST_TOKENS_PER_AI_CALL
+    return query_stats
+
+
+if __name__ == '__main__':
+    import argparse
+    from config import get_config
+    from cron_job import WEEKLY_SCHEDULE
+
+    parser = argparse.ArgumentParser(description='Query yield history and the adaptive cron plan')
+    parser.add_argument('--day', type=int, default=None, help='weekday to plan for (0 = Monday), default today')
+    parser.add_argument('--top', type=int, default=20, help='pairs to list')
+    args = parser.parse_args()
+
+    scheduler = open_query_scheduler(get_config(), WEEKLY_SCHEDULE)
+    if scheduler is None:
+        raise SystemExit('query_stats.db is not usable')
+    stats = scheduler.pair_stats()
+    listed = sorted(stats.items(), key=lambda kv: (kv[1]['runs'] == 0, -kv[1]['score']))[:args.top]
+    print(f"{'pair':<42} {'runs':>4} {'new qual':>8} {'credits':>8} {'est/credit':>10} {'score':>6}  state")
+    for (category, city), s in listed:
+        print(f"{category + ' in ' + city:<42} {s['runs']:>4} {s['new_qualified']:>8} {s['credits']:>8} "
+              f"{s['estimate']:>10} {s['score']:>6}  {s['state']}")
+    day = datetime.now()
+    if args.day is not None:
+        day += timedelta(days=(args.day - day.weekday()) % 7)
+    print(f"\nPlan for {day.strftime('%A %Y-%m-%d')}:")
+    for pick in scheduler.plan(day):
+        category, city = pick['query']
+        print(f"  {pick['reason']:<8} {category} in {city}  (≈{pick['expected']} new qualified / credit)")
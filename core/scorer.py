@@ -14,6 +14,9 @@ AI_MODEL = "llama-3.3-70b-versatile"  # Fast + Free on Groq
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 OPENROUTER_MODEL = "meta-llama/llama-3.1-8b-instruct:free"
 
+# Budget pre-check per AI call (~700 prompt + 400 max completion tokens)
+EST_TOKENS_PER_AI_CALL = 1100
+
 
 # ─────────────────────────────────────────────
 # RULE-BASED SCORING
@@ -167,8 +170,9 @@ Respond with JSON:
 }}"""
 
 
-async def ai_score_lead(session: aiohttp.ClientSession, lead: dict, api_key: str, retries: int = 3) -> dict:
-    """Call Groq AI to score a single lead (fast + free!)"""
+async def ai_score_lead(session: aiohttp.ClientSession, lead: dict, api_key: str, retries: int = 3, budget=None,
+                        url: str = GROQ_URL) -> dict:
+    """Call Groq AI to score a single lead (fast + free!). Token usage is recorded on `budget`."""
     prompt = build_ai_prompt(lead)
 
     for attempt in range(retries):
@@ -189,7 +193,7 @@ async def ai_score_lead(session: aiohttp.ClientSession, lead: dict, api_key: str
                 "Content-Type": "application/json"
             }
 
-            async with session.post(GROQ_URL, json=payload, headers=headers,
+            async with session.post(url, json=payload, headers=headers,
                                      timeout=aiohttp.ClientTimeout(total=30)) as resp:
                 if resp.status == 429:
                     wait = (attempt + 1) * 5
@@ -206,6 +210,8 @@ async def ai_score_lead(session: aiohttp.ClientSession, lead: dict, api_key: str
                     return {}
 
                 data = await resp.json()
+                if budget:
+                    budget.record('groq', (data.get('usage') or {}).get('total_tokens', 0))
                 content = data.get('choices', [{}])[0].get('message', {}).get('content', '')
                 content = content.strip().replace('```json', '').replace('```', '').strip()
                 return json.loads(content)
@@ -225,8 +231,24 @@ async def ai_score_lead(session: aiohttp.ClientSession, lead: dict, api_key: str
 # COMBINED SCORING PIPELINE
 # ─────────────────────────────────────────────
 
-async def score_lead(session: aiohttp.ClientSession, lead: dict, openrouter_key: str) -> dict:
-    """Full scoring pipeline: rule-based → AI if needed"""
+def apply_rule_fallback(lead: dict, rule_result: Optional[dict] = None, scored_by: str = 'RULE_FALLBACK') -> dict:
+    """Fill the AI fields from the rule score (AI failed, skipped, or out of budget)"""
+    rule_result = rule_result or rule_based_score(lead)
+    lead.update(rule_result)
+    lead['lead_score'] = rule_result['rule_score']
+    lead['service_opportunity'] = 'Digital Presence Upgrade'
+    lead['gaps_found'] = ', '.join(rule_result['rule_gaps'][:3])
+    lead['reasoning'] = f"Rule-based score: {rule_result['rule_score']}/10 based on {len(rule_result['rule_gaps'])} missing signals"
+    lead['recommended_pitch'] = f"Aapke business ki digital presence mein improvements ki zaroorat hai — {', '.join(rule_result['rule_gaps'][:2])}"
+    lead['urgency'] = 'MEDIUM'
+    lead['estimated_deal_size'] = 'medium'
+    lead['scored_by'] = scored_by
+    return lead
+
+
+async def score_lead(session: aiohttp.ClientSession, lead: dict, openrouter_key: str, budget=None,
+                     groq_url: str = GROQ_URL) -> dict:
+    """Full scoring pipeline: rule-based → AI if needed (and within the Groq budget)"""
 
     # Step 1: Rule-based fast scoring
     rule_result = rule_based_score(lead)
@@ -234,7 +256,15 @@ async def score_lead(session: aiohttp.ClientSession, lead: dict, openrouter_key:
 
     # Step 2: AI scoring for promising leads
     if rule_result.get('ai_needed') and openrouter_key:
-        ai_result = await ai_score_lead(session, lead, openrouter_key)
+        if budget and not budget.reserve('groq', EST_TOKENS_PER_AI_CALL):
+            return apply_rule_fallback(lead, rule_result, scored_by='RULE_BUDGET')
+
+        try:
+            ai_result = await ai_score_lead(session, lead, openrouter_key, budget=budget, url=groq_url)
+        finally:
+            if budget:
+                # ai_score_lead records the actual tokens; hand back the estimate held for the call
+                budget.record('groq', -EST_TOKENS_PER_AI_CALL)
         if ai_result:
             # AI score takes precedence, but we keep rule gaps too
             lead['lead_score'] = ai_result.get('lead_score', rule_result['rule_score'])
@@ -247,14 +277,7 @@ async def score_lead(session: aiohttp.ClientSession, lead: dict, openrouter_key:
             lead['scored_by'] = 'AI'
         else:
             # AI failed — use rule score
-            lead['lead_score'] = rule_result['rule_score']
-            lead['service_opportunity'] = 'Digital Presence Upgrade'
-            lead['gaps_found'] = ', '.join(rule_result['rule_gaps'][:3])
-            lead['reasoning'] = f"Rule-based score: {rule_result['rule_score']}/10 based on {len(rule_result['rule_gaps'])} missing signals"
-            lead['recommended_pitch'] = f"Aapke business ki digital presence mein improvements ki zaroorat hai — {', '.join(rule_result['rule_gaps'][:2])}"
-            lead['urgency'] = 'MEDIUM'
-            lead['estimated_deal_size'] = 'medium'
-            lead['scored_by'] = 'RULE_FALLBACK'
+            apply_rule_fallback(lead, rule_result)
     else:
         # No website / weak site → use rule score directly
         lead['lead_score'] = rule_result['rule_score']
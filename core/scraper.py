@@ -1,10 +1,13 @@
 import asyncio
 import aiohttp
+import html as html_lib
 import re
-from urllib.parse import urlparse
-from typing import Optional
+from urllib.parse import urlparse, urljoin
+from typing import Callable, Optional
 import logging
 
+from core.endpoints import to_standin_url, from_standin_url
+
 logger = logging.getLogger(__name__)
 
 SKIP_DOMAINS = [
@@ -20,7 +23,7 @@ SKIP_DOMAINS = [
 
 WEAK_DOMAINS = ['instagram.com', 'facebook.com', 'sites.google.com', 'linktr.ee', 'linktree.com']
 
-# Industry-specific search modifiers for better targeting
+# Neighborhoods per metro — fan_out_neighborhoods() deepens a city query with them
 LOCATION_MODIFIERS = {
     'Mumbai': ['Bandra', 'Andheri', 'Powai', 'Juhu', 'Colaba'],
     'Delhi': ['South Delhi', 'Connaught Place', 'Saket', 'Dwarka', 'Rohini'],
@@ -62,7 +65,11 @@ def is_directory_site(url: str) -> bool:
     return any(s in domain for s in SKIP_DOMAINS)
 
 
-async def fetch_serpapi_results(session: aiohttp.ClientSession, query: str, api_key: str, num_results: int = 20) -> list:
+SERPAPI_URL = 'https://serpapi.com/search'
+
+
+async def fetch_serpapi_results(session: aiohttp.ClientSession, query: str, api_key: str, num_results: int = 20,
+                                url: str = SERPAPI_URL) -> list:
     """Fetch Google Maps results from SerpAPI"""
     params = {
         'engine': 'google_maps',
@@ -74,7 +81,7 @@ async def fetch_serpapi_results(session: aiohttp.ClientSession, query: str, api_
         'gl': 'in'
     }
     try:
-        async with session.get('https://serpapi.com/search', params=params, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+        async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=30)) as resp:
             if resp.status == 200:
                 data = await resp.json()
                 return parse_serpapi_response(data, query)
@@ -86,6 +93,46 @@ async def fetch_serpapi_results(session: aiohttp.ClientSession, query: str, api_
         return []
 
 
+async def fan_out_neighborhoods(session: aiohttp.ClientSession, business_type: str, city: str, api_key: str,
+                                merge: Callable[[list], int], reserve_search: Callable[[], bool],
+                                concurrency: int = 2, min_new_per_search: float = 5.0,
+                                url: str = SERPAPI_URL) -> dict:
+    """
+    Deepen a city query with its LOCATION_MODIFIERS neighborhoods
+    ("gym in Bandra, Mumbai", ...), `concurrency` searches at a time.
+    merge(leads) dedups a batch into the run and returns how many
+    businesses were new. After each wave, expansion stops if it found
+    fewer than `min_new_per_search` new businesses per search — the
+    city is saturated and further neighborhoods would mostly repeat.
+    reserve_search() is asked before every search (budget / stop checks).
+    Returns {'searches', 'results', 'new', 'saturated'}.
+    """
+    neighborhoods = list(LOCATION_MODIFIERS.get(city, []))
+    stats = {'searches': 0, 'results': 0, 'new': 0, 'saturated': False}
+    while neighborhoods:
+        wave = []
+        while neighborhoods and len(wave) < concurrency and reserve_search():
+            wave.append(neighborhoods.pop(0))
+        if not wave:
+            break
+        batches = await asyncio.gather(*(
+            fetch_serpapi_results(session, f"{business_type} in {area}, {city}", api_key, url=url) for area in wave
+        ))
+        new = 0
+        for area, leads in zip(wave, batches):
+            for lead in leads:
+                # The parser can't split "type in area, city" — label from the parent query
+                lead.update(business_type=business_type, city=city, neighborhood=area)
+            stats['results'] += len(leads)
+            new += merge(leads)
+        stats['searches'] += len(wave)
+        stats['new'] += new
+        if new / len(wave) < min_new_per_search:
+            stats['saturated'] = bool(neighborhoods)
+            break
+    return stats
+
+
 def parse_serpapi_response(data: dict, query: str) -> list:
     """Parse SerpAPI response into lead dicts"""
     results = (
@@ -151,8 +198,14 @@ def parse_serpapi_response(data: dict, query: str) -> list:
     return leads
 
 
-async def scrape_website(session: aiohttp.ClientSession, url: str) -> dict:
-    """Scrape a website and extract signals"""
+async def scrape_website(session: aiohttp.ClientSession, url: str, fetch_contact_page: bool = False,
+                         web_base: str = '') -> dict:
+    """
+    Scrape a website and extract signals.
+    fetch_contact_page: if the homepage has no confident email, also try
+    the site's contact page for emails / phones / WhatsApp.
+    web_base: route the fetch through the replay stand-in (core.replay).
+    """
     if not url:
         return _empty_signals(no_website=True)
 
@@ -163,19 +216,222 @@ async def scrape_website(session: aiohttp.ClientSession, url: str) -> dict:
         return _empty_signals(no_website=True)
 
     try:
-        async with session.get(url, headers=HEADERS, timeout=aiohttp.ClientTimeout(total=12), allow_redirects=True, ssl=False) as resp:
+        async with session.get(to_standin_url(url, web_base), headers=HEADERS, timeout=aiohttp.ClientTimeout(total=12), allow_redirects=True, ssl=False) as resp:
             if resp.status >= 400:
                 return _empty_signals(scrape_failed=True)
 
             html = await resp.text(errors='ignore')
-            final_url = str(resp.url)
-            return extract_signals(html, final_url)
+            final_url = from_standin_url(str(resp.url), web_base)
+            signals = extract_signals(html, final_url)
 
     except asyncio.TimeoutError:
         return _empty_signals(scrape_failed=True, reason='timeout')
     except Exception as e:
         return _empty_signals(scrape_failed=True, reason=str(e)[:100])
 
+    if fetch_contact_page and not signals['site_email_confident']:
+        contact_url = find_contact_page_url(html, final_url)
+        contact_html = await _fetch_html(session, to_standin_url(contact_url, web_base))
+        if contact_html:
+            extra = extract_contacts(contact_html, final_url, source='contact_page')
+            signals.update(merge_contacts(signals, extra))
+    return signals
+
+
+async def revalidate_website(session: aiohttp.ClientSession, url: str, etag: str = '', last_modified: str = '',
+                             web_base: str = '') -> dict:
+    """
+    Conditional GET of a previously scraped homepage (If-None-Match /
+    If-Modified-Since). Returns {'status': 'not_modified' | 'fetched' | 'failed',
+    'etag', 'last_modified', 'html', 'final_url', 'error'}; on a 304 the
+    validators sent are kept.
+    """
+    if not url.startswith('http'):
+        url = 'https://' + url
+    headers = dict(HEADERS)
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    result = {'status': 'failed', 'etag': etag, 'last_modified': last_modified, 'html': '', 'final_url': url, 'error': ''}
+    try:
+        async with session.get(to_standin_url(url, web_base), headers=headers, timeout=aiohttp.ClientTimeout(total=12),
+                               allow_redirects=True, ssl=False) as resp:
+            if resp.status == 304:
+                result['status'] = 'not_modified'
+            elif resp.status >= 400:
+                result['error'] = f'HTTP {resp.status}'
+            else:
+                result.update(
+                    status='fetched', html=await resp.text(errors='ignore'),
+                    final_url=from_standin_url(str(resp.url), web_base),
+                    etag=resp.headers.get('ETag', ''), last_modified=resp.headers.get('Last-Modified', ''),
+                )
+    except asyncio.TimeoutError:
+        result['error'] = 'timeout'
+    except Exception as e:
+        result['error'] = str(e)[:100]
+    return result
+
+
+async def _fetch_html(session: aiohttp.ClientSession, url: str) -> str:
+    """Best-effort GET for secondary pages — '' on any failure"""
+    try:
+        async with session.get(url, headers=HEADERS, timeout=aiohttp.ClientTimeout(total=8), allow_redirects=True, ssl=False) as resp:
+            if resp.status >= 400:
+                return ''
+            return await resp.text(errors='ignore')
+    except Exception:
+        return ''
+
+
+def find_contact_page_url(html: str, base_url: str) -> str:
+    """Contact page linked from the homepage, falling back to /contact"""
+    base_domain = extract_domain(base_url)
+    for href in re.findall(r'<a[^>]+href=["\']([^"\'#]+)["\']', html, re.IGNORECASE):
+        if 'contact' in href.lower() and not href.lower().startswith(('mailto:', 'tel:', 'javascript:')):
+            candidate = urljoin(base_url, href)
+            if extract_domain(candidate) == base_domain:
+                return candidate
+    return urljoin(base_url, '/contact')
+
+
+# ─────────────────────────────────────────────
+# CONTACT EXTRACTION (emails / phones / WhatsApp)
+# ─────────────────────────────────────────────
+
+# Page HTML is untrusted: every quantifier is bounded and the local part must
+# start at a boundary, so matching stays linear on long runs of letters / spaces
+# (benchmarks/hot_paths.py has hostile-page cases)
+EMAIL_RE = re.compile(
+    r'(?<![a-z0-9._%+\-])[a-z0-9][a-z0-9._%+\-]{0,63}@[a-z0-9\-]{1,63}(?:\.[a-z0-9\-]{1,63}){0,8}\.[a-z]{2,24}',
+    re.IGNORECASE,
+)
+MAILTO_RE = re.compile(r'href=["\']mailto:([^"\'?]+)', re.IGNORECASE)
+TEL_RE = re.compile(r'href=["\']tel:([^"\']+)', re.IGNORECASE)
+WHATSAPP_RE = re.compile(r'(?:wa\.me/|api\.whatsapp\.com/send/?\?phone=|whatsapp\.com/send/?\?phone=)\+?(\d{8,15})', re.IGNORECASE)
+# "info [at] site [dot] com", "info(at)site(dot)in", "info AT site DOT com"
+OBFUSCATED_EMAIL_RE = re.compile(
+    r'(?<![a-z0-9._%+\-])([a-z0-9._%+\-]{1,64})\s{0,3}(?:\[at\]|\(at\)|\{at\}|\s{1,3}at\s{1,3})\s{0,3}'
+    r'([a-z0-9\-]{1,63}(?:\s{0,3}(?:\[dot\]|\(dot\)|\{dot\}|\s{1,3}dot\s{1,3}|\.)\s{0,3}[a-z0-9\-]{1,63}){1,8})',
+    re.IGNORECASE,
+)
+DOT_RE = re.compile(r'\s{0,3}(?:\[dot\]|\(dot\)|\{dot\}|\s{1,3}dot\s{1,3})\s{0,3}', re.IGNORECASE)
+
+JUNK_EMAIL_DOMAINS = ('example.com', 'domain.com', 'sentry.io', 'wixpress.com', 'sentry-next.wixpress.com', 'yourdomain.com', 'email.com')
+JUNK_EMAIL_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.css', '.js')
+FREE_EMAIL_DOMAINS = ('gmail.com', 'yahoo.com', 'yahoo.co.in', 'hotmail.com', 'outlook.com', 'rediffmail.com', 'icloud.com')
+
+
+def _clean_email(email: str) -> str:
+    email = email.strip().strip('.').lower()
+    if not EMAIL_RE.fullmatch(email):
+        return ''
+    domain = email.split('@', 1)[1]
+    if domain.endswith(JUNK_EMAIL_DOMAINS) or email.endswith(JUNK_EMAIL_SUFFIXES):
+        return ''
+    return email
+
+
+def normalize_phone(raw: str) -> str:
+    """Digits (with leading + kept) — Indian 10-digit numbers get +91"""
+    raw = html_lib.unescape(raw or '')
+    digits = re.sub(r'\D', '', raw)
+    if len(digits) == 10:
+        return '+91' + digits
+    if len(digits) == 11 and digits.startswith('0'):
+        return '+91' + digits[1:]
+    if len(digits) == 12 and digits.startswith('91'):
+        return '+' + digits
+    if 8 <= len(digits) <= 15:
+        return ('+' if raw.strip().startswith('+') else '') + digits
+    return ''
+
+
+def extract_contacts(html: str, url: str, source: str = 'website') -> dict:
+    """
+    Pull on-page contact data. Every value is tagged with where it came from
+    (`<source>:mailto`, `<source>:text`, `<source>:obfuscated`, `<source>:tel`,
+    `<source>:wa.me`) so enrichment savings can be measured.
+    """
+    site_domain = extract_domain(url)
+    text = html_lib.unescape(html)
+
+    emails = {}  # email -> source tag, first (strongest) source wins
+    for raw in MAILTO_RE.findall(text):
+        email = _clean_email(raw.split(',')[0])
+        if email:
+            emails.setdefault(email, f'{source}:mailto')
+    for raw in EMAIL_RE.findall(text):
+        email = _clean_email(raw)
+        if email:
+            emails.setdefault(email, f'{source}:text')
+    for user, domain in OBFUSCATED_EMAIL_RE.findall(text):
+        email = _clean_email(f"{user}@{DOT_RE.sub('.', domain)}")
+        if email:
+            emails.setdefault(email, f'{source}:obfuscated')
+
+    phones = {}
+    for raw in TEL_RE.findall(text):
+        phone = normalize_phone(raw)
+        if phone:
+            phones.setdefault(phone, f'{source}:tel')
+
+    whatsapp = ''
+    match = WHATSAPP_RE.search(text)
+    if match:
+        whatsapp = normalize_phone(match.group(1))
+
+    # Best email: on the site's own domain (or a subdomain) > mailto link > anything else
+    def on_site_domain(email):
+        domain = email.split('@', 1)[1]
+        return bool(site_domain) and (domain == site_domain or domain.endswith('.' + site_domain))
+
+    def rank(item):
+        email, src = item
+        return (not on_site_domain(email), not src.endswith(':mailto'), email.split('@', 1)[1] in FREE_EMAIL_DOMAINS)
+
+    best_email, best_source = min(emails.items(), key=rank) if emails else ('', '')
+    # Confident = on the business's own domain; a mailto to a free-mail or third-party
+    # address still ranks first but doesn't replace the Hunter lookup
+    confident = bool(best_email) and on_site_domain(best_email)
+
+    sources = {}
+    if best_email:
+        sources['email'] = best_source
+    if phones:
+        sources['phone'] = next(iter(phones.values()))
+    if whatsapp:
+        sources['whatsapp'] = f'{source}:wa.me'
+
+    return {
+        'site_email': best_email,
+        'site_email_confident': confident,
+        'site_emails': list(emails)[:5],
+        'site_phones': list(phones)[:5],
+        'whatsapp_number': whatsapp,
+        'contact_sources': sources,
+    }
+
+
+def merge_contacts(primary: dict, extra: dict) -> dict:
+    """Fill gaps in `primary` contacts from `extra` (e.g. the contact page)"""
+    merged = {
+        'site_emails': list(dict.fromkeys(primary.get('site_emails', []) + extra.get('site_emails', [])))[:5],
+        'site_phones': list(dict.fromkeys(primary.get('site_phones', []) + extra.get('site_phones', [])))[:5],
+        'contact_sources': dict(primary.get('contact_sources', {})),
+    }
+    if extra.get('site_email') and (extra.get('site_email_confident') or not primary.get('site_email')):
+        merged['site_email'] = extra['site_email']
+        merged['site_email_confident'] = extra['site_email_confident']
+        merged['contact_sources']['email'] = extra['contact_sources']['email']
+    if extra.get('whatsapp_number') and not primary.get('whatsapp_number'):
+        merged['whatsapp_number'] = extra['whatsapp_number']
+        merged['contact_sources']['whatsapp'] = extra['contact_sources']['whatsapp']
+    if 'phone' in extra.get('contact_sources', {}) and 'phone' not in merged['contact_sources']:
+        merged['contact_sources']['phone'] = extra['contact_sources']['phone']
+    return merged
+
 
 def extract_signals(html: str, url: str) -> dict:
     """Extract digital presence signals from HTML"""
@@ -231,6 +487,8 @@ def extract_signals(html: str, url: str) -> dict:
     has_blog = any(x in html_lower for x in ['/blog', '/news', '/articles', 'blog post'])
     has_social_links = any(x in html_lower for x in ['instagram.com', 'facebook.com', 'twitter.com', 'linkedin.com'])
 
+    contacts = extract_contacts(html, url)
+
     return {
         'page_title': page_title,
         'meta_desc': meta_desc,
@@ -251,6 +509,7 @@ def extract_signals(html: str, url: str) -> dict:
         'tech_stack_detected': tech_stack,
         'no_website': False,
         'scrape_failed': False,
+        **contacts,
     }
 
 
@@ -264,4 +523,6 @@ def _empty_signals(no_website=False, scrape_failed=False, reason='') -> dict:
         'copyright_year': None, 'tech_stack_detected': [],
         'no_website': no_website, 'scrape_failed': scrape_failed,
         'scrape_error': reason,
+        'site_email': '', 'site_email_confident': False, 'site_emails': [],
+        'site_phones': [], 'whatsapp_number': '', 'contact_sources': {},
     }
@@ -1,10 +1,16 @@
-import gspread
-from google.oauth2.service_account import Credentials
+import asyncio
 import aiohttp
 import logging
+from contextlib import nullcontext
 from datetime import datetime
+from typing import Optional
+import hashlib
 import json
 import os
+import threading
+import weakref
+
+from core.ratelimit import RateLimiter, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
@@ -25,20 +31,89 @@ LEADS_HEADERS = [
     'Source', 'Date Added', 'Tags', 'Notes', 'Status', 'Last Contact'
 ]
 
-ERRORS_HEADERS = ['Timestamp', 'Error', 'Node', 'Lead Info']
+ERRORS_HEADERS = ['Timestamp', 'Error', 'Node', 'Lead Info', 'Count', 'First Seen']
+
+# Columns people maintain by hand (plus the original Date Added) — upserts never touch them
+USER_COLUMNS = {'Date Added', 'Tags', 'Notes', 'Status', 'Last Contact'}
+
+
+# gspread / google-auth are imported on first use, so runs (and cron
+# bootstraps) that never reach the Sheets stage don't pay for them.
+
+def rowcol_to_a1(row: int, col: int) -> str:
+    """A1 notation for a 1-based cell (same as gspread.utils.rowcol_to_a1)"""
+    letters = ''
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return f"{letters}{row}"
+
+
+# ── Process-wide caches: one authorized client per credential, and the
+# spreadsheet / worksheet handles opened through it. google-auth refreshes
+# the cached token itself when it expires.
+_clients: dict = {}   # credential hash → gspread.Client
+_handles = weakref.WeakKeyDictionary()   # client → {(sheet_id, tab or None): handle}
+_cache_lock = threading.Lock()
+
+
+def _credential_hash(service_account_json: str) -> str:
+    canonical = json.dumps(json.loads(service_account_json), sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
 
 
 def get_sheets_client(service_account_json: str):
-    """Initialize gspread client from service account JSON string"""
+    """gspread client for a service account JSON string, reused across calls"""
     try:
-        creds_dict = json.loads(service_account_json)
-        creds = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
-        return gspread.authorize(creds)
+        key = _credential_hash(service_account_json)
+        with _cache_lock:
+            if key in _clients:
+                return _clients[key]
+        import gspread
+        from google.oauth2.service_account import Credentials
+        creds = Credentials.from_service_account_info(json.loads(service_account_json), scopes=SCOPES)
+        gc = gspread.authorize(creds)
+        with _cache_lock:
+            return _clients.setdefault(key, gc)
     except Exception as e:
         logger.error(f"Sheets auth failed: {e}")
         return None
 
 
+def open_worksheet(gc, sheet_id: str, title: str, rows: int = 1000, cols: int = 30, setup=None):
+    """
+    Cached worksheet handle, created if missing. setup(ws) (header checks)
+    runs once, when the handle is first opened.
+    """
+    with _cache_lock:
+        handles = _handles.setdefault(gc, {})
+        ws = handles.get((sheet_id, title))
+        sh = handles.get((sheet_id, None))
+    if ws is not None:
+        return ws
+
+    if sh is None:
+        sh = gc.open_by_key(sheet_id)
+    from gspread.exceptions import WorksheetNotFound
+    try:
+        ws = sh.worksheet(title)
+    except WorksheetNotFound:
+        ws = sh.add_worksheet(title, rows=rows, cols=cols)
+    if setup:
+        setup(ws)
+    with _cache_lock:
+        handles.update({(sheet_id, None): sh, (sheet_id, title): ws})
+    return ws
+
+
+def forget_sheet(gc, sheet_id: str):
+    """Drop cached handles for a sheet (after errors — the tab may be gone)"""
+    with _cache_lock:
+        handles = _handles.get(gc) or {}
+        for key in [k for k in handles if k[0] == sheet_id]:
+            del handles[key]
+
+
 def ensure_sheet_headers(worksheet, headers: list):
     """Make sure headers exist in row 1 — NEVER deletes existing data"""
     try:
@@ -51,8 +126,23 @@ def ensure_sheet_headers(worksheet, headers: list):
         logger.error(f"Header setup error: {e}")
 
 
-def get_existing_leads(worksheet) -> set:
-    """Get set of (company_name, phone) tuples for dedup"""
+def dedup_key(lead: dict) -> tuple:
+    """(company_name, phone) key used for sheet dedup"""
+    return (str(lead.get('company_name') or '').strip().lower(), str(lead.get('phone') or '').strip())
+
+
+def get_existing_leads(worksheet, mirror=None) -> set:
+    """
+    Get set of (company_name, phone) tuples for dedup.
+    With a SheetMirror (core/mirror.py) only rows added since the last
+    sync are downloaded; keys are served from the local copy.
+    """
+    if mirror is not None:
+        try:
+            mirror.sync(worksheet)
+            return mirror.existing_keys()
+        except Exception as e:
+            logger.warning(f"Sheet mirror sync failed, reading full sheet: {e}")
     try:
         records = worksheet.get_all_values()
         if len(records) < 2:
@@ -69,6 +159,58 @@ def get_existing_leads(worksheet) -> set:
         return set()
 
 
+def get_existing_rows(worksheet, mirror=None) -> dict:
+    """(company_name, phone) → (row number, row values) for upserts"""
+    if mirror is not None:
+        try:
+            mirror.sync(worksheet)
+            return mirror.rows_by_key()
+        except Exception as e:
+            logger.warning(f"Sheet mirror sync failed, reading full sheet: {e}")
+    rows = {}
+    for row_num, row in enumerate(worksheet.get_all_values()[1:], start=2):
+        if len(row) >= 3:
+            rows.setdefault((row[0].strip().lower(), row[2].strip()), (row_num, row))
+    return rows
+
+
+def sheet_cell(value) -> str:
+    """Value as Sheets displays it after a RAW write (4.0 → '4', None → '')"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def diff_row_ranges(row_num: int, old_row: list, new_row: list) -> list:
+    """
+    batch_update entries for the columns that changed, one A1 range per
+    contiguous run. USER_COLUMNS are never overwritten.
+    """
+    old_row = list(old_row) + [''] * (len(new_row) - len(old_row))
+    changed = [
+        i for i, header in enumerate(LEADS_HEADERS)
+        if header not in USER_COLUMNS and sheet_cell(new_row[i]) != str(old_row[i])
+    ]
+    updates = []
+    run = []
+    for i in changed:
+        if run and i != run[-1] + 1:
+            updates.append(run)
+            run = []
+        run.append(i)
+    if run:
+        updates.append(run)
+    return [
+        {
+            'range': f"{rowcol_to_a1(row_num, cols[0] + 1)}:{rowcol_to_a1(row_num, cols[-1] + 1)}",
+            'values': [[new_row[i] for i in cols]],
+        }
+        for cols in updates
+    ]
+
+
 def lead_to_row(lead: dict) -> list:
     """Convert lead dict to sheet row"""
     return [
@@ -109,52 +251,392 @@ def lead_to_row(lead: dict) -> list:
     ]
 
 
-def save_leads_to_sheet(gc, sheet_id: str, leads: list) -> dict:
-    """Save qualified leads to Google Sheets, dedup by name+phone"""
-    stats = {'saved': 0, 'skipped_dup': 0, 'errors': 0}
+def _to_number(value, cast=float):
     try:
-        sh = gc.open_by_key(sheet_id)
+        return cast(value) if value not in ('', None) else None
+    except (TypeError, ValueError):
+        return None
+
+
+def row_to_lead(row: list) -> dict:
+    """Inverse of lead_to_row — sheet row back to a (partial) lead dict"""
+    row = list(row) + [''] * (len(LEADS_HEADERS) - len(row))
+    col = dict(zip(LEADS_HEADERS, row))
+    tick = lambda name: col[name] == '✓'
+    return {
+        'company_name': col['Company Name'],
+        'website': col['Website'],
+        'phone': str(col['Phone']),
+        'email': col['Email'],
+        'contact_name': col['Contact Name'],
+        'city': col['City'],
+        'address': col['Address'],
+        'country': col['Country'] or 'India',
+        'business_type': col['Business Type'],
+        'google_rating': _to_number(col['Google Rating']),
+        'google_reviews': _to_number(col['Google Reviews'], int) or 0,
+        'lead_score': _to_number(col['Lead Score'], int) or 0,
+        'urgency': col['Urgency'],
+        'estimated_deal_size': col['Deal Size'],
+        'scored_by': col['Scored By'],
+        'service_opportunity': col['Service Opportunity'],
+        'gaps_found': col['Gaps Found'],
+        'reasoning': col['Reasoning'],
+        'recommended_pitch': col['Recommended Pitch'],
+        'has_whatsapp': tick('Has WhatsApp'),
+        'has_booking_form': tick('Has Booking'),
+        'has_ssl': tick('Has SSL'),
+        'has_mobile_viewport': tick('Mobile Optimized'),
+        'has_online_payment': tick('Has Payment'),
+        'has_chatbot': tick('Has Chatbot'),
+        'has_contact_form': tick('Has Contact Form'),
+        'tech_stack_detected': [t.strip() for t in col['Tech Stack'].split(',') if t.strip()],
+        'copyright_year': _to_number(col['Copyright Year'], int),
+        'source': col['Source'],
+        'date_added': col['Date Added'],
+        'tags': col['Tags'],
+        'notes': col['Notes'],
+        'status': col['Status'],
+        'last_contact': col['Last Contact'],
+    }
+
+
+# ── Monthly partitions: leads go to Leads_YYYY_MM, and a compact index tab
+# maps every dedup key to its partition. Index rows keep the key in the
+# same columns as the Leads tab (name in A, phone in C), so the dedup
+# readers and SheetMirror work on it unchanged.
+INDEX_TAB = 'Leads_Index'
+INDEX_HEADERS = ['Company Key', 'Partition', 'Phone']
+
+
+def partition_tab(when: Optional[datetime] = None) -> str:
+    """Monthly partition tab name, e.g. Leads_2026_10"""
+    return f"Leads_{(when or datetime.now()).strftime('%Y_%m')}"
+
 
-        # Get or create Leads tab
+def leads_tab_for(partition: str = '') -> str:
+    """Tab new leads are appended to ('' = single Leads tab)"""
+    return partition_tab() if partition == 'monthly' else 'Leads'
+
+
+def setup_index_tab(ws):
+    """
+    Headers for a new index tab. When partitioning is switched on for an
+    existing sheet, the index is seeded from the legacy Leads tab so dedup
+    (and upserts) still see every lead saved before the switch.
+    """
+    try:
+        if ws.row_values(1):
+            return
+        from gspread.exceptions import WorksheetNotFound
         try:
-            ws = sh.worksheet('Leads')
-        except gspread.WorksheetNotFound:
-            ws = sh.add_worksheet('Leads', rows=1000, cols=30)
-
-        ensure_sheet_headers(ws, LEADS_HEADERS)
-        existing = get_existing_leads(ws)
-
-        rows_to_add = []
-        for lead in leads:
-            name_key = lead.get('company_name', '').strip().lower()
-            phone = lead.get('phone', '').strip()
-            if (name_key, phone) in existing:
-                stats['skipped_dup'] += 1
-                continue
-            existing.add((name_key, phone))
-            rows_to_add.append(lead_to_row(lead))
-
-        if rows_to_add:
-            ws.append_rows(rows_to_add, value_input_option='RAW')
-            stats['saved'] = len(rows_to_add)
+            legacy = ws.spreadsheet.worksheet('Leads')
+        except WorksheetNotFound:
+            legacy = None
+        keys = get_existing_rows(legacy) if legacy is not None else {}
+        rows = [[name, 'Leads', phone] for name, phone in keys]
+        for chunk in chunk_rows([INDEX_HEADERS] + rows):
+            ws.append_rows(chunk, value_input_option='RAW')
+        if rows:
+            logger.info(f"Seeded {INDEX_TAB} with {len(rows)} leads from the Leads tab")
+    except Exception as e:
+        logger.error(f"Index setup error: {e}")
+
+
+def _open_leads_tab(gc, sheet_id: str, title: str = 'Leads'):
+    return open_worksheet(gc, sheet_id, title, rows=1000, cols=len(LEADS_HEADERS),
+                          setup=lambda ws: ensure_sheet_headers(ws, LEADS_HEADERS))
+
+
+def _plan_update(row_num: int, old_row: list, lead: dict) -> Optional[tuple]:
+    """(merged row, ranges) if the lead changed any non-user column"""
+    new_row = lead_to_row(lead)
+    ranges = diff_row_ranges(row_num, old_row, new_row)
+    if not ranges:
+        return None
+    old_row = list(old_row) + [''] * (len(new_row) - len(old_row))
+    merged = [old if header in USER_COLUMNS else new
+              for header, old, new in zip(LEADS_HEADERS, old_row, new_row)]
+    return merged, ranges
+
+
+def _prepare_leads_sheet(gc, sheet_id: str, leads: list, mirror=None, mode: str = 'append',
+                         partition: str = '') -> dict:
+    """
+    Open the target tab and dedup. Returns a write plan:
+        ws          tab new rows are appended to
+        rows        rows to append
+        updates     [(ws, {row_num: (merged row, ranges)})] — 'upsert' mode only
+        skipped     duplicates left alone
+        index_ws / index_rows   partition index entries for the new rows
+    With partition='monthly' dedup reads only the index tab (mirror = index
+    mirror), and upserts read only the partitions holding the duplicates.
+    """
+    plan = {'ws': _open_leads_tab(gc, sheet_id, leads_tab_for(partition)),
+            'rows': [], 'updates': [], 'skipped': 0, 'index_ws': None, 'index_rows': []}
+
+    if partition == 'monthly':
+        index_ws = open_worksheet(gc, sheet_id, INDEX_TAB, rows=1000, cols=len(INDEX_HEADERS),
+                                  setup=setup_index_tab)
+        plan['index_ws'] = index_ws
+        index = {key: row[1] for key, (_, row) in get_existing_rows(index_ws, mirror=mirror).items()}
+    else:
+        index = None
+
+    # Existing keys, and (upsert) their current rows
+    existing_rows = {}
+    if index is not None:
+        existing = set(index)
+        if mode == 'upsert':
+            wanted = {index[dedup_key(lead)] for lead in leads if dedup_key(lead) in index}
+            for tab in sorted(wanted):
+                ws = _open_leads_tab(gc, sheet_id, tab)
+                for key, (row_num, row) in get_existing_rows(ws).items():
+                    if index.get(key) == tab:
+                        existing_rows[key] = (ws, row_num, row)
+    elif mode == 'upsert':
+        existing_rows = {key: (plan['ws'], row_num, row)
+                         for key, (row_num, row) in get_existing_rows(plan['ws'], mirror=mirror).items()}
+        existing = set(existing_rows)
+    else:
+        existing = get_existing_leads(plan['ws'], mirror=mirror)
+
+    updates = {}   # tab title → (ws, {row_num: (row, ranges)})
+    for lead in leads:
+        key = dedup_key(lead)
+        if key in existing:
+            if key in existing_rows:
+                ws, row_num, old_row = existing_rows.pop(key)
+                update = _plan_update(row_num, old_row, lead)
+                if update:
+                    updates.setdefault(ws.title, (ws, {}))[1][row_num] = update
+                    continue
+            plan['skipped'] += 1
+            continue
+        existing.add(key)
+        plan['rows'].append(lead_to_row(lead))
+        if index is not None:
+            plan['index_rows'].append([key[0], plan['ws'].title, key[1]])
+    plan['updates'] = list(updates.values())
+    return plan
+
+
+def _mirrors(mirror, ws) -> bool:
+    return mirror is not None and mirror.tab == ws.title
+
+
+def save_leads_to_sheet(gc, sheet_id: str, leads: list, mirror=None, mode: str = 'append',
+                        partition: str = '') -> dict:
+    """
+    Save qualified leads to Google Sheets, dedup by name+phone.
+    mode='upsert' refreshes changed columns of leads already in the sheet
+    with a single batch_update (Tags / Notes / Status / Last Contact untouched).
+    partition='monthly' writes to Leads_YYYY_MM tabs plus the Leads_Index tab.
+    """
+    stats = {'saved': 0, 'updated': 0, 'skipped_dup': 0, 'errors': 0}
+    try:
+        plan = _prepare_leads_sheet(gc, sheet_id, leads, mirror, mode, partition)
+        stats['skipped_dup'] = plan['skipped']
+
+        for ws, rows in plan['updates']:
+            ws.batch_update([r for _, ranges in rows.values() for r in ranges], value_input_option='RAW')
+            stats['updated'] += len(rows)
+            if _mirrors(mirror, ws):
+                mirror.record_updated({row_num: row for row_num, (row, _) in rows.items()})
+
+        if plan['rows']:
+            plan['ws'].append_rows(plan['rows'], value_input_option='RAW')
+            stats['saved'] = len(plan['rows'])
+            if _mirrors(mirror, plan['ws']):
+                mirror.record_appended(plan['rows'])
+        if plan['index_rows']:
+            plan['index_ws'].append_rows(plan['index_rows'], value_input_option='RAW')
+            if _mirrors(mirror, plan['index_ws']):
+                mirror.record_appended(plan['index_rows'])
 
     except Exception as e:
         logger.error(f"Sheet save error: {e}")
+        forget_sheet(gc, sheet_id)
         stats['errors'] += 1
 
     return stats
 
 
-def log_error_to_sheet(gc, sheet_id: str, error: str, node: str, lead_info: str = ''):
-    """Log errors to Errors tab"""
+# ─────────────────────────────────────────────
+# ASYNC CHUNKED WRITER
+# ─────────────────────────────────────────────
+
+# Sheets API: 60 write requests / minute / user, ~2 MB recommended payload
+SHEETS_WRITES_PER_MINUTE = 60
+SHEETS_CHUNK_ROWS = 500
+SHEETS_CHUNK_BYTES = 1_500_000
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def chunk_rows(rows: list, max_rows: int = SHEETS_CHUNK_ROWS, max_bytes: int = SHEETS_CHUNK_BYTES) -> list:
+    """Split rows so each append stays under both the row and request-size caps"""
+    chunks, current, size = [], [], 0
+    for row in rows:
+        row_size = len(json.dumps(row, default=str))
+        if current and (len(current) >= max_rows or size + row_size > max_bytes):
+            chunks.append(current)
+            current, size = [], 0
+        current.append(row)
+        size += row_size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _retryable(error: Exception) -> tuple[bool, Optional[float]]:
+    """(should retry, Retry-After seconds) for a failed Sheets call"""
+    from gspread.exceptions import APIError
+    if isinstance(error, APIError):
+        retry_after = parse_retry_after(error.response.headers.get('Retry-After')) if error.response is not None else None
+        return error.code in RETRYABLE_STATUS, retry_after
+    # Network-level failures (timeouts, resets) are worth another try
+    return isinstance(error, (ConnectionError, TimeoutError, OSError)), None
+
+
+async def save_leads_to_sheet_async(gc, sheet_id: str, leads: list, mirror=None, mode: str = 'append',
+                                    partition: str = '',
+                                    max_rows: int = SHEETS_CHUNK_ROWS,
+                                    writes_per_minute: int = SHEETS_WRITES_PER_MINUTE,
+                                    retries: int = 5, progress=None) -> dict:
+    """
+    Non-blocking save_leads_to_sheet: gspread calls run in worker threads,
+    rows go out in chunks paced under the write quota, and each chunk is
+    retried with backoff on 429 / 5xx. A failed chunk doesn't lose the rest.
+    mode='upsert': changed columns of existing leads go out first as one
+    batch_update per tab (see save_leads_to_sheet). partition='monthly':
+    index entries for the appended rows follow in one append.
+
+    progress: fn(chunks_done, chunks_total, message)
+    Returns stats + 'chunks': [{'chunk', 'rows', 'status', 'attempts', 'error'}]
+    """
+    stats = {'saved': 0, 'updated': 0, 'skipped_dup': 0, 'errors': 0, 'failed_rows': 0, 'chunks': []}
     try:
-        sh = gc.open_by_key(sheet_id)
+        plan = await asyncio.to_thread(_prepare_leads_sheet, gc, sheet_id, leads, mirror, mode, partition)
+        stats['skipped_dup'] = plan['skipped']
+    except Exception as e:
+        logger.error(f"Sheet save error: {e}")
+        forget_sheet(gc, sheet_id)
+        stats['errors'] += 1
+        return stats
+
+    limiter = RateLimiter('sheets', max_concurrent=1, per_second=writes_per_minute / 60)
+
+    async def write_with_retry(fn, *args, **kwargs) -> dict:
+        report = {'status': 'failed', 'attempts': 0, 'error': ''}
+        for attempt in range(retries):
+            report['attempts'] = attempt + 1
+            try:
+                async with limiter:
+                    await asyncio.to_thread(fn, *args, **kwargs)
+                report['status'] = 'ok'
+                report['error'] = ''
+                limiter.reset_backoff()
+                break
+            except Exception as e:
+                report['error'] = str(e)[:200]
+                retry, retry_after = _retryable(e)
+                if not retry or attempt == retries - 1:
+                    break
+                limiter.penalize(retry_after)
+        return report
+
+    for ws, rows in plan['updates']:
+        data = [r for _, ranges in rows.values() for r in ranges]
+        report = await write_with_retry(ws.batch_update, data, value_input_option='RAW')
+        stats['chunks'].append({'chunk': f'update {ws.title}', 'rows': len(rows), **report})
+        if report['status'] == 'ok':
+            stats['updated'] += len(rows)
+            if _mirrors(mirror, ws):
+                mirror.record_updated({row_num: row for row_num, (row, _) in rows.items()})
+        else:
+            logger.error(f"Sheet upsert batch_update failed for {ws.title}: {report['error']}")
+            stats['errors'] += 1
+
+    ws = plan['ws']
+    index_rows = []
+    chunks = chunk_rows(plan['rows'], max_rows=max_rows)
+    offset = 0
+    for i, chunk in enumerate(chunks):
+        report = {'chunk': i + 1, 'rows': len(chunk), **await write_with_retry(ws.append_rows, chunk, value_input_option='RAW')}
+        stats['chunks'].append(report)
+        if report['status'] == 'ok':
+            stats['saved'] += len(chunk)
+            if _mirrors(mirror, ws):
+                mirror.record_appended(chunk)
+            index_rows += plan['index_rows'][offset:offset + len(chunk)]
+        else:
+            logger.error(f"Sheet chunk {i + 1}/{len(chunks)} failed after {report['attempts']} attempts: {report['error']}")
+            stats['errors'] += 1
+            stats['failed_rows'] += len(chunk)
+        offset += len(chunk)
+        if progress:
+            progress(i + 1, len(chunks), f"Chunk {i + 1}/{len(chunks)}: {report['rows']} rows {report['status']}")
+
+    # Index entries only for rows that actually landed
+    if index_rows:
+        report = await write_with_retry(plan['index_ws'].append_rows, index_rows, value_input_option='RAW')
+        stats['chunks'].append({'chunk': 'index', 'rows': len(index_rows), **report})
+        if report['status'] == 'ok':
+            if _mirrors(mirror, plan['index_ws']):
+                mirror.record_appended(index_rows)
+        else:
+            logger.error(f"Sheet index append failed: {report['error']}")
+            stats['errors'] += 1
+
+    if stats['errors']:
+        forget_sheet(gc, sheet_id)
+    return stats
+
+
+def _setup_errors_tab(ws):
+    """Errors tab headers, upgrading older 4-column tabs in place"""
+    existing = ws.row_values(1)
+    if not existing:
+        ws.insert_row(ERRORS_HEADERS, index=1, value_input_option='RAW')
+    elif existing == ERRORS_HEADERS[:len(existing)] and len(existing) < len(ERRORS_HEADERS):
+        # Older 4-column tab — add the aggregate columns after the existing ones
+        start = rowcol_to_a1(1, len(existing) + 1)
+        ws.update(range_name=f"{start}:{rowcol_to_a1(1, len(ERRORS_HEADERS))}",
+                  values=[ERRORS_HEADERS[len(existing):]], value_input_option='RAW')
+
+
+def errors_tab_writer(gc, sheet_id: str):
+    """
+    fn(rows) for ErrorSink: the Errors tab handle is cached, so every
+    flush after the first is a single append_rows call.
+    """
+    def write(rows: list):
+        ws = open_worksheet(gc, sheet_id, 'Errors', rows=200, cols=len(ERRORS_HEADERS), setup=_setup_errors_tab)
         try:
-            ws = sh.worksheet('Errors')
-        except gspread.WorksheetNotFound:
-            ws = sh.add_worksheet('Errors', rows=200, cols=4)
-        ensure_sheet_headers(ws, ERRORS_HEADERS)
-        ws.append_row([datetime.now().isoformat(), error, node, lead_info])
+            ws.append_rows(rows, value_input_option='RAW')
+        except Exception:
+            forget_sheet(gc, sheet_id)
+            raise
+
+    return write
+
+
+def lazy_errors_tab_writer(service_account_json: str, sheet_id: str):
+    """errors_tab_writer that authorizes on the first flush — runs without errors never load gspread"""
+    def write(rows: list):
+        gc = get_sheets_client(service_account_json)
+        if gc is None:
+            raise RuntimeError('Google Sheets auth failed')
+        errors_tab_writer(gc, sheet_id)(rows)
+
+    return write
+
+
+def log_error_to_sheet(gc, sheet_id: str, error: str, node: str, lead_info: str = ''):
+    """Log one error to the Errors tab — pipeline runs use core.errorsink.ErrorSink instead"""
+    try:
+        now = datetime.now().isoformat()
+        errors_tab_writer(gc, sheet_id)([[now, error, node, lead_info, 1, now]])
     except Exception as e:
         logger.error(f"Error logging failed: {e}")
 
@@ -163,24 +645,46 @@ def log_error_to_sheet(gc, sheet_id: str, error: str, node: str, lead_info: str
 # HUNTER.IO EMAIL LOOKUP
 # ─────────────────────────────────────────────
 
-async def lookup_email_hunter(session: aiohttp.ClientSession, domain: str, api_key: str) -> dict:
-    """Look up email via Hunter.io domain search"""
+HUNTER_URL = 'https://api.hunter.io/v2/domain-search'
+
+
+async def lookup_email_hunter(session: aiohttp.ClientSession, domain: str, api_key: str,
+                              limiter=None, retries: int = 3, url: str = HUNTER_URL) -> Optional[dict]:
+    """
+    Look up email via Hunter.io domain search.
+    Returns the contact dict, {} when Hunter has no email for the domain,
+    or None when the lookup itself failed (so callers don't cache it).
+    """
     if not domain or not api_key:
         return {}
-    try:
-        params = {'domain': domain, 'api_key': api_key, 'limit': 3}
-        async with session.get('https://api.hunter.io/v2/domain-search',
-                                params=params,
-                                timeout=aiohttp.ClientTimeout(total=10)) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                emails = data.get('data', {}).get('emails', [])
-                if emails:
-                    best = emails[0]
-                    return {
-                        'email': best.get('value', ''),
-                        'contact_name': f"{best.get('first_name', '')} {best.get('last_name', '')}".strip(),
-                    }
-    except Exception as e:
-        logger.debug(f"Hunter lookup failed for {domain}: {e}")
-    return {}
\ No newline at end of file
+    params = {'domain': domain, 'api_key': api_key, 'limit': 3}
+    for attempt in range(retries):
+        try:
+            async with limiter or nullcontext():
+                async with session.get(url, params=params,
+                                        timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                    if resp.status == 429:
+                        if limiter:
+                            limiter.penalize(parse_retry_after(resp.headers.get('Retry-After')))
+                        else:
+                            await asyncio.sleep((attempt + 1) * 2)
+                        continue
+                    if resp.status != 200:
+                        logger.debug(f"Hunter error {resp.status} for {domain}")
+                        return None
+                    data = await resp.json()
+
+            if limiter:
+                limiter.reset_backoff()
+            emails = (data.get('data') or {}).get('emails') or []
+            if emails:
+                best = emails[0]
+                return {
+                    'email': best.get('value', ''),
+                    'contact_name': f"{best.get('first_name') or ''} {best.get('last_name') or ''}".strip(),
+                }
+            return {}
+        except Exception as e:
+            logger.debug(f"Hunter lookup failed for {domain}: {e}")
+            return None
+    return None
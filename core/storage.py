@@ -0,0 +1,395 @@
+"""
+Lead storage backends.
+
+SQLiteLeadStore (default) is the system of record: every qualified lead
+lands in leads.db first, keyed like the sheet dedup (company name +
+phone) and indexed for history / dashboard queries. Google Sheets is a
+sync target — leads are marked pending until a sync pushes them, so a
+Sheets outage delays the sheet without losing anything.
+
+SheetsLeadStore keeps the old Sheets-only behaviour (STORAGE_BACKEND=sheets).
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional
+
+from core.analytics import LeadAggregates
+from core.cache import data_path
+from core.scraper import extract_domain
+from core.sheets import (dedup_key, save_leads_to_sheet, save_leads_to_sheet_async, get_existing_leads,
+                         open_worksheet, ensure_sheet_headers, setup_index_tab, LEADS_HEADERS, INDEX_TAB)
+
+logger = logging.getLogger(__name__)
+
+# Lead fields people edit by hand (mirrors sheets.USER_COLUMNS) — upserts keep the stored value
+USER_FIELDS = ('date_added', 'tags', 'notes', 'status', 'last_contact')
+
+
+class LeadStore(ABC):
+    """Storage interface used by the pipeline, cron and dashboard"""
+
+    name = 'base'
+
+    @abstractmethod
+    def save_leads(self, leads: list, mode: str = 'append') -> dict:
+        """Persist leads, dedup by name+phone. Returns {'saved', 'updated', 'skipped_dup', 'errors'}."""
+
+    @abstractmethod
+    def existing_keys(self) -> set:
+        """(company_name, phone) dedup keys"""
+
+    @abstractmethod
+    def read_leads(self, limit: Optional[int] = None) -> list:
+        """Stored leads, newest first"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored leads"""
+
+    def close(self):
+        """Release local handles (the caller owns any mirror it passed in)"""
+
+
+class SQLiteLeadStore(LeadStore):
+    """Local primary store (WAL mode, safe to share across threads)"""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS leads (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name_key TEXT NOT NULL, phone TEXT NOT NULL,
+                domain TEXT, city TEXT, business_type TEXT, lead_score INTEGER,
+                created_at REAL NOT NULL, updated_at REAL NOT NULL,
+                synced_at REAL, data TEXT NOT NULL, needs_update INTEGER NOT NULL DEFAULT 0,
+                UNIQUE (name_key, phone));
+            CREATE INDEX IF NOT EXISTS idx_leads_domain ON leads (domain);
+            CREATE INDEX IF NOT EXISTS idx_leads_phone ON leads (phone);
+            CREATE INDEX IF NOT EXISTS idx_leads_city ON leads (city);
+            CREATE INDEX IF NOT EXISTS idx_leads_business_type ON leads (business_type);
+            CREATE INDEX IF NOT EXISTS idx_leads_score ON leads (lead_score);
+            CREATE INDEX IF NOT EXISTS idx_leads_pending ON leads (synced_at) WHERE synced_at IS NULL;
+            CREATE TABLE IF NOT EXISTS run_aggregates (
+                run_id TEXT PRIMARY KEY, finished_at REAL NOT NULL, data TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS idx_run_aggregates_time ON run_aggregates (finished_at);
+            CREATE TABLE IF NOT EXISTS lead_refresh (
+                lead_id INTEGER PRIMARY KEY, checked_at REAL NOT NULL, etag TEXT, last_modified TEXT,
+                content_hash TEXT, signal_hash TEXT, failures INTEGER NOT NULL DEFAULT 0, changed_at REAL);
+        """)
+        if 'needs_update' not in [row[1] for row in self._conn.execute("PRAGMA table_info(leads)")]:
+            # Pending leads changed since they were first stored are updates to existing sheet rows
+            self._conn.execute("ALTER TABLE leads ADD COLUMN needs_update INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE leads SET needs_update = 1 WHERE synced_at IS NULL AND updated_at > created_at")
+        self._conn.commit()
+        self._rebuild_run_aggregates()
+
+    @staticmethod
+    def _columns(lead: dict) -> tuple:
+        return (
+            extract_domain(lead.get('website') or lead.get('raw_url') or ''),
+            str(lead.get('city') or '').strip().lower(),
+            str(lead.get('business_type') or '').strip().lower(),
+            int(lead.get('lead_score') or 0),
+        )
+
+    def save_leads(self, leads: list, mode: str = 'append') -> dict:
+        """
+        New leads are inserted pending sheet sync. mode='upsert' also
+        rewrites changed existing leads (keeping USER_FIELDS) and marks
+        them pending as updates (see sync_to_sheets).
+        """
+        stats = {'saved': 0, 'updated': 0, 'skipped_dup': 0, 'errors': 0, 'inserted': []}
+        now = time.time()
+        with self._lock:
+            try:
+                for lead in leads:
+                    name_key, phone = dedup_key(lead)
+                    row = self._conn.execute(
+                        "SELECT id, data FROM leads WHERE name_key = ? AND phone = ?", (name_key, phone)
+                    ).fetchone()
+                    if row is None:
+                        lead.setdefault('date_added', datetime.now().strftime('%Y-%m-%d %H:%M'))
+                        self._conn.execute(
+                            "INSERT INTO leads (name_key, phone, domain, city, business_type, lead_score,"
+                            " created_at, updated_at, synced_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, ?)",
+                            (name_key, phone, *self._columns(lead), now, now, json.dumps(lead, default=str, sort_keys=True)),
+                        )
+                        stats['saved'] += 1
+                        stats['inserted'].append(lead)
+                        continue
+                    if mode != 'upsert':
+                        stats['skipped_dup'] += 1
+                        continue
+                    stored = json.loads(row[1])
+                    merged = {**lead, **{f: stored[f] for f in USER_FIELDS if stored.get(f)}}
+                    data = json.dumps(merged, default=str, sort_keys=True)
+                    if data == row[1]:
+                        stats['skipped_dup'] += 1
+                        continue
+                    self._conn.execute(
+                        "UPDATE leads SET domain = ?, city = ?, business_type = ?, lead_score = ?,"
+                        " updated_at = ?, synced_at = NULL, needs_update = 1, data = ? WHERE id = ?",
+                        (*self._columns(merged), now, data, row[0]),
+                    )
+                    stats['updated'] += 1
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                logger.error(f"Lead store save failed: {e}")
+                stats['errors'] += 1
+                stats['saved'] = stats['updated'] = 0
+                stats['inserted'] = []
+        return stats
+
+    def existing_keys(self) -> set:
+        with self._lock:
+            return set(self._conn.execute("SELECT name_key, phone FROM leads").fetchall())
+
+    def query(self, city: str = '', business_type: str = '', domain: str = '', phone: str = '',
+              min_score: Optional[int] = None, since: Optional[float] = None,
+              limit: Optional[int] = None) -> list:
+        """Indexed lookup — every filter is optional, results newest first"""
+        clauses, params = [], []
+        for column, value in (('city', city.lower()), ('business_type', business_type.lower()),
+                              ('domain', domain.lower()), ('phone', phone)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if min_score is not None:
+            clauses.append("lead_score >= ?")
+            params.append(min_score)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        sql = "SELECT data FROM leads"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def read_leads(self, limit: Optional[int] = None) -> list:
+        return self.query(limit=limit)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    # ── run analytics (core/analytics.py summaries) ──
+    # Each run's summary covers only the leads it inserted, so a business found
+    # again by a later run is counted once, in the run that first stored it.
+
+    def _rebuild_run_aggregates(self):
+        """
+        One-time migration: summaries from before that rule counted re-found
+        leads once per run. Replace them with per-day summaries of the
+        deduplicated leads table (marked 'backfill', not counted as runs).
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] >= 1:
+                self._conn.rollback()
+                return
+            days = {}
+            for created_at, data in self._conn.execute("SELECT created_at, data FROM leads"):
+                day = datetime.fromtimestamp(created_at).strftime('%Y-%m-%d')
+                agg, last = days.get(day, (LeadAggregates(), 0))
+                agg.add(json.loads(data))
+                days[day] = (agg, max(last, created_at))
+            self._conn.execute("DELETE FROM run_aggregates")
+            self._conn.executemany(
+                "INSERT INTO run_aggregates VALUES (?, ?, ?)",
+                [(f"backfill:{day}", last, json.dumps({**agg.to_dict(), 'backfill': True}))
+                 for day, (agg, last) in days.items()],
+            )
+            self._conn.execute("PRAGMA user_version = 1")
+            self._conn.commit()
+
+    def save_run_aggregates(self, run_id: str, aggregates: dict, finished_at: Optional[float] = None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO run_aggregates VALUES (?, ?, ?)",
+                (run_id, finished_at or time.time(), json.dumps(aggregates)),
+            )
+            self._conn.commit()
+
+    def run_aggregates(self, since: Optional[float] = None) -> list:
+        """Per-run summaries of newly stored leads, oldest first (since = unix time lower bound)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM run_aggregates WHERE finished_at >= ? ORDER BY finished_at",
+                (since or 0,),
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    # ── incremental re-scan (core/refresh.py) ──
+
+    def refresh_candidates(self, checked_before: float, limit: int, skip_statuses: tuple = ()) -> list:
+        """
+        [(id, lead, refresh state)] for leads with a site not checked (or
+        stored) since `checked_before`: highest score first, least recently
+        checked first; sites failing 3+ times in a row go last.
+        """
+        status_filter = (f" AND LOWER(COALESCE(json_extract(l.data, '$.status'), '')) NOT IN "
+                         f"({', '.join('?' for _ in skip_statuses)})") if skip_statuses else ''
+        sql = (
+            "SELECT l.id, l.data, r.checked_at, r.etag, r.last_modified, r.content_hash, r.signal_hash,"
+            " COALESCE(r.failures, 0) FROM leads l LEFT JOIN lead_refresh r ON r.lead_id = l.id"
+            f" WHERE l.domain != '' AND COALESCE(r.checked_at, l.updated_at) < ?{status_filter}"
+            " ORDER BY COALESCE(r.failures, 0) >= 3, l.lead_score DESC, COALESCE(r.checked_at, l.updated_at)"
+            " LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, (checked_before, *skip_statuses, limit)).fetchall()
+        names = ('checked_at', 'etag', 'last_modified', 'content_hash', 'signal_hash', 'failures')
+        return [(row[0], json.loads(row[1]), dict(zip(names, row[2:]))) for row in rows]
+
+    def record_refresh(self, lead_id: int, **state):
+        """Upsert a lead's refresh state (checked_at, validators, hashes, failures, changed_at)"""
+        columns = ', '.join(state)
+        updates = ', '.join(f"{k} = excluded.{k}" for k in state)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO lead_refresh (lead_id, {columns}) VALUES (?, {', '.join('?' for _ in state)})"
+                f" ON CONFLICT (lead_id) DO UPDATE SET {updates}",
+                (lead_id, *state.values()),
+            )
+            self._conn.commit()
+
+    def update_lead(self, lead_id: int, lead: dict) -> bool:
+        """Rewrite a stored lead in place (USER_FIELDS keep their stored values) and mark it pending as an update"""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM leads WHERE id = ?", (lead_id,)).fetchone()
+            if row is None:
+                return False
+            stored = json.loads(row[0])
+            merged = {**lead, **{f: stored[f] for f in USER_FIELDS if stored.get(f)}}
+            self._conn.execute(
+                "UPDATE leads SET domain = ?, city = ?, business_type = ?, lead_score = ?,"
+                " updated_at = ?, synced_at = NULL, needs_update = 1, data = ? WHERE id = ?",
+                (*self._columns(merged), time.time(), json.dumps(merged, default=str, sort_keys=True), lead_id),
+            )
+            self._conn.commit()
+        return True
+
+    # ── sheet sync bookkeeping ─────────────────
+
+    def pending_sync(self, limit: Optional[int] = None, updates: Optional[bool] = None) -> list:
+        """
+        [(id, lead)] not yet pushed to the sync target, oldest first.
+        updates=False: new leads only; True: changed leads already synced before.
+        """
+        sql = "SELECT id, data FROM leads WHERE synced_at IS NULL"
+        params = []
+        if updates is not None:
+            sql += " AND needs_update = ?"
+            params.append(int(updates))
+        sql += " ORDER BY id"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [(row_id, json.loads(data)) for row_id, data in rows]
+
+    def mark_synced(self, ids: list):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany("UPDATE leads SET synced_at = ?, needs_update = 0 WHERE id = ?",
+                                   [(now, i) for i in ids])
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SheetsLeadStore(LeadStore):
+    """Google Sheets as the only store (pre-SQLite behaviour)"""
+
+    name = 'sheets'
+
+    def __init__(self, gc, sheet_id: str, mirror=None, partition: str = ''):
+        self.gc = gc
+        self.sheet_id = sheet_id
+        self.mirror = mirror
+        self.partition = partition
+
+    def save_leads(self, leads: list, mode: str = 'append') -> dict:
+        return save_leads_to_sheet(self.gc, self.sheet_id, leads, mirror=self.mirror, mode=mode,
+                                   partition=self.partition)
+
+    def existing_keys(self) -> set:
+        if self.partition:
+            ws = open_worksheet(self.gc, self.sheet_id, INDEX_TAB, setup=setup_index_tab)
+        else:
+            ws = open_worksheet(self.gc, self.sheet_id, 'Leads', setup=lambda ws: ensure_sheet_headers(ws, LEADS_HEADERS))
+        return get_existing_leads(ws, mirror=self.mirror)
+
+    def read_leads(self, limit: Optional[int] = None) -> list:
+        # With partitions the mirror holds the index, not lead rows
+        return self.mirror.read_leads(limit) if self.mirror and not self.partition else []
+
+    def count(self) -> int:
+        status = self.mirror.status() if self.mirror and not self.partition else None
+        return max(status['row_count'] - 1, 0) if status else 0
+
+
+async def sync_to_sheets(store: SQLiteLeadStore, gc, sheet_id: str, mirror=None, mode: str = 'append',
+                         batch_size: int = 5000, **writer_kwargs) -> dict:
+    """
+    Push pending leads to the Leads tab with the async chunked writer.
+    New leads go out in `mode`; changed leads (upserts, refresh re-scores)
+    always go out as upserts, so an append-mode sync never dedup-skips them.
+    Leads are marked synced only when their whole batch went out — the
+    sheet-side dedup makes re-sending a partially written batch harmless.
+    """
+    totals = {'saved': 0, 'updated': 0, 'skipped_dup': 0, 'errors': 0, 'failed_rows': 0, 'pending': 0, 'chunks': []}
+    for updates, batch_mode in ((False, mode), (True, 'upsert')):
+        while not totals['errors']:
+            pending = store.pending_sync(limit=batch_size, updates=updates)
+            if not pending:
+                break
+            stats = await save_leads_to_sheet_async(gc, sheet_id, [lead for _, lead in pending],
+                                                    mirror=mirror, mode=batch_mode, **writer_kwargs)
+            for key in ('saved', 'updated', 'skipped_dup', 'errors', 'failed_rows'):
+                totals[key] += stats.get(key, 0)
+            totals['chunks'].extend(stats.get('chunks', []))
+            if stats['errors']:
+                break
+            store.mark_synced([row_id for row_id, _ in pending])
+            if len(pending) < batch_size:
+                break
+    totals['pending'] = len(store.pending_sync())
+    return totals
+
+
+def build_lead_store(config: dict, gc=None, mirror=None) -> Optional[LeadStore]:
+    """
+    Configured backend: 'sqlite' (default, local leads.db) or 'sheets'.
+    Falls back to Sheets if the local store can't be opened.
+    """
+    backend = config.get('storage_backend', 'sqlite')
+    if backend == 'sqlite':
+        try:
+            return SQLiteLeadStore(data_path(config, 'leads.db'))
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Local lead store unavailable, using Google Sheets only: {e}")
+    if gc and config.get('sheet_id'):
+        return SheetsLeadStore(gc, config['sheet_id'], mirror=mirror, partition=config.get('sheet_partitioning', ''))
+    return None
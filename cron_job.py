@@ -2,17 +2,22 @@
 """
 Cron job for daily lead generation.
 Schedule on Render: 0 6 * * * (6 AM IST daily)
+
+Bootstrap is kept minimal: only config is imported up front. The
+pipeline (or, with JOB_API_URL set, just the HTTP client) is imported
+in main(), and streamlit / pandas / gspread are never loaded before the
+first upstream request (python -m benchmarks.import_time checks this).
 """
 
 import asyncio
 import os
 import json
 import logging
+import signal
 from datetime import datetime
 import sys
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from pipeline import run_pipeline
 from config import get_config, validate_config
 
 logging.basicConfig(
@@ -25,6 +30,8 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # ── Rotating query schedule (different targets each day) ──
+# With ADAPTIVE_SCHEDULE on (default) this is the seed: core/scheduler.py plans
+# each day's queries from the yield history and falls back to it on a cold start
 WEEKLY_SCHEDULE = {
     0: [  # Monday
         ("dental clinic", "Mumbai"), ("skin clinic", "Delhi"),
@@ -64,6 +71,41 @@ WEEKLY_SCHEDULE = {
 }
 
 
+async def run_via_api(config: dict, queries: list, progress, cancel: asyncio.Event, deadline) -> dict:
+    """Thin-client mode: submit to the JOB_API_URL server, follow its SSE progress, fetch the result"""
+    from core.api_client import JobAPIClient
+
+    client = JobAPIClient(config['job_api_url'], config['job_api_token'])
+    job_id = await asyncio.to_thread(
+        client.submit, None, queries, owner='cron', min_score=config['min_score'],
+        max_concurrent_scrapes=config['max_concurrent_scrapes'], deadline=deadline,
+        neighborhood_fanout=config['neighborhood_fanout'], prune_overlap=config['overlap_pruning'],
+        budget_reserve_fraction=config['budget_reserve_fraction'],
+    )
+    logger.info(f"Submitted job {job_id} to {config['job_api_url']}")
+
+    async def cancel_on_signal():
+        await cancel.wait()
+        await asyncio.to_thread(client.cancel, job_id)
+
+    def follow():
+        for event, data in client.events(job_id):
+            if event == 'progress' and data['status'] == 'running':
+                progress(data['stage'] or '', data['current'] or 0, data['total'] or 0, data['message'] or '')
+            elif event == 'done':
+                return data
+
+    watcher = asyncio.create_task(cancel_on_signal())
+    try:
+        job = await asyncio.to_thread(follow)
+    finally:
+        watcher.cancel()
+    result = await asyncio.to_thread(client.result, job_id)
+    if result is None:
+        raise RuntimeError(f"Job {job_id} {job['status'] if job else 'lost'}: {(job or {}).get('error') or ''}")
+    return result
+
+
 async def main():
     start = datetime.now()
     day_of_week = start.weekday()
@@ -71,43 +113,97 @@ async def main():
 
     logger.info(f"=== CRON RUN STARTED ===")
     logger.info(f"Day: {start.strftime('%A %Y-%m-%d %H:%M')}")
-    logger.info(f"Queries: {queries}")
 
     # Load config from .env or environment
     config = get_config()
 
-    # Validate
-    errors = validate_config(config, require_sheets=True)
+    # Pick today's queries by expected new qualified leads per credit
+    from core.scheduler import open_query_scheduler
+    scheduler = open_query_scheduler(config, WEEKLY_SCHEDULE) if config['adaptive_schedule'] else None
+    if scheduler:
+        from core.overlap import load_overlap_model
+        overlap = load_overlap_model(config) if config['overlap_pruning'] else None
+        plan = scheduler.plan(start, n=len(queries), overlap=overlap, max_redundancy=config['overlap_max_redundancy'])
+        queries = [pick['query'] for pick in plan]
+        for pick in plan:
+            logger.info(f"Plan: {pick['reason']:<7} {pick['query'][0]} in {pick['query'][1]} "
+                        f"(≈{pick['expected']:.2f} new qualified / credit)")
+    logger.info(f"Queries: {queries}")
+
+    # Validate (a job API server holds the keys itself)
+    errors = [] if config['job_api_url'] else validate_config(config, require_sheets=True)
     if errors:
         logger.error("Configuration errors:")
         for err in errors:
             logger.error(f"  - {err}")
         sys.exit(1)
 
+    # The cron job may use the full budget — the reserve is for dashboard runs.
+    # The run estimates its own cost up front (pipeline logs it; result['budget'])
+    config['budget_reserve_fraction'] = 0
+
     def progress(stage, current, total, message):
         logger.info(f"[{stage.upper()}] {current}/{total} — {message}")
 
+    # Time box: stop with partial results well before the next scheduled run;
+    # SIGTERM (platform shutdown / redeploy) winds down the same way
+    deadline = config['cron_deadline_minutes'] * 60 or None
+    cancel = asyncio.Event()
     try:
-        result = await run_pipeline(
-            config,
-            queries=queries,
-            progress_callback=progress,
-            min_score=config['min_score'],
-            max_concurrent_scrapes=config['max_concurrent_scrapes'],
-        )
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, cancel.set)
+    except (NotImplementedError, RuntimeError):
+        pass  # no signal handlers on this platform
+    if deadline:
+        logger.info(f"Time box: {config['cron_deadline_minutes']:g} minutes")
+
+    try:
+        if config['job_api_url']:
+            result = await run_via_api(config, queries, progress, cancel, deadline)
+        else:
+            from pipeline import run_pipeline
+            result = await run_pipeline(
+                config,
+                queries=queries,
+                progress_callback=progress,
+                min_score=config['min_score'],
+                max_concurrent_scrapes=config['max_concurrent_scrapes'],
+                cancel_event=cancel,
+                deadline=deadline,
+                prune_overlap=config['overlap_pruning'],
+            )
+
+        if scheduler and config['job_api_url']:
+            # In-process runs record their own history; a job API server keeps it in its own data dir
+            try:
+                logger.info(f"Recorded yield for {scheduler.record(result)} queries")
+            except Exception as e:
+                logger.warning(f"Could not record query yield: {e}")
 
         elapsed = (datetime.now() - start).seconds
         logger.info(f"=== CRON RUN COMPLETE ===")
         logger.info(f"Time taken: {elapsed}s")
         logger.info(f"Scraped: {result['total_scraped']}")
         logger.info(f"Qualified: {len(result['qualified_leads'])}")
-        logger.info(f"Saved to Sheet: {result['saved_to_sheet']}")
+        logger.info(f"Saved to store: {result.get('saved_to_store', 0)}")
+        logger.info(f"Saved to Sheet: {result['saved_to_sheet']} ({result.get('sheet_pending', 0)} pending sync)")
         logger.info(f"Skipped (dup): {result['skipped_duplicates']}")
         logger.info(f"Errors: {len(result['errors'])}")
+        if config['job_api_url']:
+            # In-process runs log these as they start; a job API server logs them on its side
+            for warning in result.get('budget', {}).get('warnings', []):
+                logger.warning(f"Budget: {warning}")
+            for pruned in result.get('pruned_queries', []):
+                logger.info(f"Overlap: skipped {pruned['query']} — ~{pruned['redundancy']:.0%} covered by {pruned['covered_by']}")
+        if result.get('partial'):
+            logger.warning(f"Partial run ({result['partial']['reason']}): {result['partial']}")
+        for note in result.get('degraded', []):
+            logger.warning(f"Degraded: {note}")
 
         if result['errors']:
             for err in result['errors']:
                 logger.warning(f"Error: {err}")
+        for group in result.get('error_summary', []):
+            logger.warning(f"Error x{group['count']} [{group['node']}]: {group['message']}")
 
         # Print top 5 leads
         leads = result['qualified_leads'][:5]
@@ -116,6 +212,23 @@ async def main():
             for l in leads:
                 logger.info(f"  [{l.get('lead_score')}/10] {l.get('company_name')} | {l.get('city')} | {l.get('service_opportunity')}")
 
+        # Revalidate stored leads with what is left of the time box (core/refresh.py)
+        remaining = deadline - (datetime.now() - start).total_seconds() if deadline else None
+        if config['refresh_batch'] and not config['job_api_url'] and not cancel.is_set() and (remaining or 60) >= 60:
+            from core.refresh import refresh_leads
+            try:
+                refresh = await refresh_leads(config, progress_callback=progress, cancel_event=cancel, deadline=remaining)
+                logger.info(f"Refresh: {refresh['checked']} sites revalidated, {refresh['changed']} changed "
+                            f"({refresh['ai_calls']} AI calls), {refresh['not_modified']} not modified, "
+                            f"{refresh['unchanged']} unchanged, {refresh['failed']} failed")
+                for change in refresh['changes']:
+                    logger.info(f"  {change['company_name']}: {change['old_score']} → {change['new_score']} "
+                                f"({', '.join(change['changes'])})")
+                for err in refresh['errors']:
+                    logger.warning(f"Refresh: {err}")
+            except Exception as e:
+                logger.warning(f"Lead refresh failed: {e}")
+
     except Exception as e:
         logger.error(f"Pipeline failed: {e}", exc_info=True)
         sys.exit(1)
@@ -1,99 +1,315 @@
 """
 Enhanced features for LeadGen India Dashboard
 Features: Advanced filters, analytics, export, real-time progress
+
+pandas (and openpyxl) are imported inside the functions that need them,
+so the first page load doesn't pay for them until results are shown.
 """
-import pandas as pd
 import streamlit as st
 from datetime import datetime, timedelta
+import importlib.util
 import io
+import json
+
+# ── Results view: leads become one typed DataFrame per run; filters are
+# boolean masks over it and return row positions into the original list.
+CATEGORICAL_COLUMNS = ['city', 'business_type', 'urgency', 'estimated_deal_size', 'scored_by']
+URGENCY_ORDER = ['LOW', 'MEDIUM', 'HIGH']
+
+SORT_OPTIONS = {
+    "Lead Score (High to Low)": ('lead_score', False),
+    "Google Rating (High to Low)": ('google_rating', False),
+    "Reviews (Most to Least)": ('google_reviews', False),
+    "Urgency (High to Low)": ('urgency_rank', False),
+    "Date Added (Newest First)": ('date_added', False),
+}
+
+
+def leads_frame(leads):
+    """Typed, filter-ready frame — row i is leads[i]"""
+    import pandas as pd
+
+    def column(key, default=None):
+        return [l.get(key, default) for l in leads]
+
+    df = pd.DataFrame({
+        'lead_score': pd.to_numeric(pd.Series(column('lead_score', 0), dtype=object), errors='coerce').fillna(0).astype('int16'),
+        'google_rating': pd.to_numeric(pd.Series(column('google_rating'), dtype=object), errors='coerce').fillna(0).astype('float32'),
+        'google_reviews': pd.to_numeric(pd.Series(column('google_reviews', 0), dtype=object), errors='coerce').fillna(0).astype('int32'),
+        'has_website': [bool(l.get('website') or l.get('raw_url')) for l in leads],
+        'has_whatsapp': [bool(l.get('has_whatsapp')) for l in leads],
+        'has_email': [bool(l.get('email')) for l in leads],
+        'date_added': [str(l.get('date_added') or '') for l in leads],
+    })
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = pd.Categorical([l.get(col) or '' for l in leads])
+    df['urgency_rank'] = df['urgency'].map({u: i + 1 for i, u in enumerate(URGENCY_ORDER)}).astype('float32').fillna(0)
+    return df
+
+
+def filter_mask(df, filters):
+    """Boolean mask for the filter dict used by the dashboard / render_advanced_filters"""
+    import pandas as pd
+
+    mask = pd.Series(True, index=df.index)
 
-def apply_advanced_filters(leads, filters):
-    """Apply advanced filtering to leads"""
-    filtered = leads.copy()
-    
-    # Score range
     if 'score_range' in filters:
         min_score, max_score = filters['score_range']
-        filtered = [l for l in filtered if min_score <= l.get('lead_score', 0) <= max_score]
-    
-    # Urgency
+        mask &= df['lead_score'].between(min_score, max_score)
     if filters.get('urgency'):
-        filtered = [l for l in filtered if l.get('urgency') in filters['urgency']]
-    
-    # Google rating
+        mask &= df['urgency'].isin(filters['urgency'])
     if 'min_rating' in filters:
-        filtered = [l for l in filtered if (l.get('google_rating') or 0) >= filters['min_rating']]
-    
-    # Min reviews
+        mask &= df['google_rating'] >= filters['min_rating']
     if 'min_reviews' in filters:
-        filtered = [l for l in filtered if (l.get('google_reviews') or 0) >= filters['min_reviews']]
-    
-    # Must have website
+        mask &= df['google_reviews'] >= filters['min_reviews']
     if filters.get('must_have_website'):
-        filtered = [l for l in filtered if l.get('website') or l.get('raw_url')]
-    
-    # Must have WhatsApp
+        mask &= df['has_website']
     if filters.get('must_have_whatsapp'):
-        filtered = [l for l in filtered if l.get('has_whatsapp')]
-    
-    # Deal size
+        mask &= df['has_whatsapp']
     if filters.get('deal_size'):
-        filtered = [l for l in filtered if l.get('estimated_deal_size') in filters['deal_size']]
-    
-    # City filter
+        mask &= df['estimated_deal_size'].isin(filters['deal_size'])
     if filters.get('cities'):
-        filtered = [l for l in filtered if l.get('city') in filters['cities']]
-    
-    # Business type filter
+        mask &= df['city'].isin(filters['cities'])
     if filters.get('business_types'):
-        filtered = [l for l in filtered if l.get('business_type') in filters['business_types']]
-    
-    return filtered
+        mask &= df['business_type'].isin(filters['business_types'])
+    return mask
+
+
+def filtered_positions(df, filters, sort_by=None):
+    """Positions of matching leads, in display order (stable, like sorted())"""
+    view = df[filter_mask(df, filters)]
+    if sort_by in SORT_OPTIONS:
+        column, ascending = SORT_OPTIONS[sort_by]
+        view = view.sort_values(column, ascending=ascending, kind='mergesort')
+    return view.index.tolist()
+
+
+def filters_key(filters):
+    """Hashable, order-independent form of a filter dict (cache key)"""
+    return tuple(sorted((k, tuple(v) if isinstance(v, (list, tuple, set)) else v) for k, v in filters.items()))
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def cached_leads_frame(run_id, _leads):
+    """One frame per pipeline run (leads are not hashed — run_id identifies them)"""
+    return leads_frame(_leads)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_filtered_positions(run_id, filter_tuple, sort_by, _leads):
+    """Filter + sort result per (run, filters, sort) — reruns with unchanged inputs are free"""
+    return filtered_positions(cached_leads_frame(run_id, _leads), dict(filter_tuple), sort_by)
+
+
+def apply_advanced_filters(leads, filters):
+    """Apply advanced filtering to leads"""
+    return [leads[i] for i in filtered_positions(leads_frame(leads), filters)]
 
 
 def sort_leads(leads, sort_by):
     """Sort leads by specified criteria"""
-    if sort_by == "Lead Score (High to Low)":
-        return sorted(leads, key=lambda x: x.get('lead_score', 0), reverse=True)
-    elif sort_by == "Google Rating (High to Low)":
-        return sorted(leads, key=lambda x: x.get('google_rating', 0), reverse=True)
-    elif sort_by == "Reviews (Most to Least)":
-        return sorted(leads, key=lambda x: x.get('google_reviews', 0), reverse=True)
-    elif sort_by == "Urgency (High to Low)":
-        urgency_order = {'HIGH': 3, 'MEDIUM': 2, 'LOW': 1}
-        return sorted(leads, key=lambda x: urgency_order.get(x.get('urgency', 'LOW'), 0), reverse=True)
-    elif sort_by == "Date Added (Newest First)":
-        return sorted(leads, key=lambda x: x.get('date_added', ''), reverse=True)
-    return leads
+    if sort_by not in SORT_OPTIONS:
+        return leads
+    return [leads[i] for i in filtered_positions(leads_frame(leads), {}, sort_by)]
+
+
+# ── Results rendering: only one page of cards is built per rerun;
+# table mode hands the whole set to st.dataframe (virtualized in the browser)
+PAGE_SIZES = [10, 25, 50, 100]
+TABLE_COLUMNS = {
+    'company_name': 'Company', 'lead_score': 'Score', 'urgency': 'Urgency',
+    'city': 'City', 'business_type': 'Business Type', 'phone': 'Phone', 'whatsapp_number': 'WhatsApp', 'email': 'Email',
+    'website': 'Website', 'google_rating': 'Rating', 'google_reviews': 'Reviews',
+    'service_opportunity': 'Opportunity', 'estimated_deal_size': 'Deal Size',
+}
+
+
+def paginate(positions, page, page_size):
+    """(positions on this page, page count) — page is 1-based and clamped"""
+    pages = max(1, -(-len(positions) // page_size))
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+    return positions[start:start + page_size], pages
+
+
+def results_table(leads, positions):
+    """Compact one-row-per-lead frame for st.dataframe"""
+    import pandas as pd
+
+    rows = [{col: leads[i].get(key, '') for key, col in TABLE_COLUMNS.items()} for i in positions]
+    df = pd.DataFrame(rows, columns=list(TABLE_COLUMNS.values()))
+    for col in ('Urgency', 'City', 'Business Type', 'Deal Size'):
+        df[col] = df[col].astype('category')
+    return df
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_results_table(run_id, filter_tuple, sort_by, top_n, _leads):
+    positions = cached_filtered_positions(run_id, filter_tuple, sort_by, _leads)
+    return results_table(_leads, positions[:top_n] if top_n else positions)
+
+
+def render_results_view(leads, positions, run_id, filter_tuple, sort_by):
+    """Card pages or compact table for the filtered, sorted positions"""
+    c1, c2, c3, c4 = st.columns([1.2, 1, 1, 1])
+    with c1:
+        mode = st.radio("View", ["Cards", "Table"], horizontal=True, key="results_view_mode")
+    with c2:
+        top_n = st.number_input("Top N only (0 = all)", min_value=0, value=0, step=10, key="results_top_n")
+    shown = positions[:top_n] if top_n else positions
+
+    if mode == "Table":
+        st.caption(f"Showing {len(shown)} of {len(leads)} leads")
+        st.dataframe(
+            cached_results_table(run_id, filter_tuple, sort_by, top_n, leads),
+            use_container_width=True, hide_index=True,
+            column_config={'Score': st.column_config.ProgressColumn('Score', min_value=0, max_value=10, format='%d')},
+        )
+        return
+
+    with c3:
+        page_size = st.selectbox("Cards per page", PAGE_SIZES, index=1, key="results_page_size")
+    pages = max(1, -(-len(shown) // page_size))
+    if st.session_state.get("results_page", 1) > pages:
+        st.session_state["results_page"] = pages   # filters shrank the result set
+    with c4:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key="results_page")
+    page_positions, pages = paginate(shown, page, page_size)
+
+    first = (min(page, pages) - 1) * page_size
+    st.caption(f"Showing {first + 1 if shown else 0}–{first + len(page_positions)} of {len(shown)} "
+               f"({len(leads)} total) · page {min(page, pages)}/{pages}")
+    st.markdown("---")
+    # Widget keys use the lead's position in the run, so notes stay put across pages
+    for i in page_positions:
+        render_lead_card_enhanced(leads[i], i)
+
+
+def render_live_leads(leads):
+    """Qualified leads streamed from a running job — compact, sorted, filterable"""
+    if not leads:
+        st.caption("Qualified leads will appear here as they are scored and enriched.")
+        return
+    df = leads_frame(leads)
+    c1, c2, c3 = st.columns([1, 1, 2])
+    with c1:
+        sort_by = st.selectbox("Sort by", list(SORT_OPTIONS), key="live_sort")
+    with c2:
+        min_score = st.slider("Min Score", 1, 10, 1, key="live_min_score")
+    with c3:
+        cities = st.multiselect("City", sorted(c for c in df['city'].cat.categories if c), key="live_cities")
+    positions = filtered_positions(df, {'score_range': (min_score, 10), 'cities': cities}, sort_by)
+    st.caption(f"{len(positions)} of {len(leads)} qualified leads so far")
+    st.dataframe(
+        results_table(leads, positions), use_container_width=True, hide_index=True,
+        column_config={'Score': st.column_config.ProgressColumn('Score', min_value=0, max_value=10, format='%d')},
+    )
+
+
+# ── Exports: built only when asked for, cached per (run, filters, sort, format)
+EXPORT_FORMATS = {
+    'CSV': ('leads.csv', 'text/csv'),
+    'Excel': ('leads.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'JSONL': ('leads.jsonl', 'application/x-ndjson'),
+    'Parquet': ('leads.parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def parquet_available():
+    """Parquet needs pyarrow (optional — not in requirements.txt)"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def export_frame(leads):
+    """Flat frame for exports — list values (tech stack, email lists) joined"""
+    import pandas as pd
+
+    df = pd.DataFrame(leads)
+    for col in df.columns:
+        if df[col].map(lambda v: isinstance(v, (list, tuple, set))).any():
+            df[col] = df[col].map(lambda v: ', '.join(map(str, v)) if isinstance(v, (list, tuple, set)) else v)
+    return df
+
+
+def _excel_cell(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, (str, int, float, bool, datetime)):
+        return value
+    return str(value)
 
 
 def export_to_excel(leads):
-    """Export leads to Excel with multiple sheets"""
+    """Export leads to Excel with multiple sheets (openpyxl write-only / streaming)"""
+    from openpyxl import Workbook
+
+    df = export_frame(leads)
+    wb = Workbook(write_only=True)
+
+    # Main leads sheet
+    ws = wb.create_sheet('Leads')
+    ws.append(list(df.columns))
+    for row in df.itertuples(index=False, name=None):
+        ws.append([_excel_cell(v) for v in row])
+
+    # Summary sheet
+    summary = {
+        'Total Leads': len(leads),
+        'Avg Score': round(float(df['lead_score'].mean()), 2) if 'lead_score' in df else 0,
+        'High Urgency': len([l for l in leads if l.get('urgency') == 'HIGH']),
+        'With Website': len([l for l in leads if l.get('website')]),
+        'With Email': len([l for l in leads if l.get('email')]),
+    }
+    ws = wb.create_sheet('Summary')
+    ws.append(list(summary))
+    ws.append(list(summary.values()))
+
+    # By city
+    if 'city' in df.columns:
+        ws = wb.create_sheet('By City')
+        ws.append(['city', 'count'])
+        for city, count in df.groupby('city').size().items():
+            ws.append([city, int(count)])
+
     output = io.BytesIO()
-    
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        # Main leads sheet
-        df = pd.DataFrame(leads)
-        df.to_excel(writer, sheet_name='Leads', index=False)
-        
-        # Summary sheet
-        summary = {
-            'Total Leads': len(leads),
-            'Avg Score': round(df['lead_score'].mean(), 2) if 'lead_score' in df else 0,
-            'High Urgency': len([l for l in leads if l.get('urgency') == 'HIGH']),
-            'With Website': len([l for l in leads if l.get('website')]),
-            'With Email': len([l for l in leads if l.get('email')]),
-        }
-        pd.DataFrame([summary]).to_excel(writer, sheet_name='Summary', index=False)
-        
-        # By city
-        if 'city' in df.columns:
-            city_stats = df.groupby('city').size().reset_index(name='count')
-            city_stats.to_excel(writer, sheet_name='By City', index=False)
-    
+    wb.save(output)
     return output.getvalue()
 
 
+def export_leads(leads, fmt):
+    """Export bytes for one of EXPORT_FORMATS"""
+    if fmt == 'Excel':
+        return export_to_excel(leads)
+    if fmt == 'CSV':
+        return export_frame(leads).to_csv(index=False).encode()
+    if fmt == 'JSONL':
+        return ''.join(json.dumps(l, default=str, ensure_ascii=False) + '\n' for l in leads).encode()
+    if fmt == 'Parquet':
+        output = io.BytesIO()
+        export_frame(leads).to_parquet(output, index=False)
+        return output.getvalue()
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+@st.cache_data(max_entries=8, show_spinner="Preparing export...")
+def cached_export(run_id, filter_tuple, sort_by, fmt, _leads, _positions):
+    """Export of the current view — rebuilt only when the run, filters, sort or format change"""
+    return export_leads([_leads[i] for i in _positions], fmt)
+
+
+def render_export_controls(leads, positions, run_id, filter_tuple, sort_by):
+    """Format picker + on-demand build; browsing the results never pays for exports"""
+    formats = [f for f in EXPORT_FORMATS if f != 'Parquet' or parquet_available()]
+    fmt = st.selectbox("Format", formats, key="export_format", label_visibility="collapsed")
+    export_key = (run_id, filter_tuple, sort_by, fmt)
+    if st.button(f"⚙️ Prepare {fmt} ({len(positions)} leads)", use_container_width=True, disabled=not positions):
+        st.session_state.export_ready = export_key
+    if st.session_state.get('export_ready') == export_key:
+        file_name, mime = EXPORT_FORMATS[fmt]
+        data = cached_export(run_id, filter_tuple, sort_by, fmt, leads, positions)
+        st.download_button(f"📥 Download {fmt}", data, file_name, mime, use_container_width=True)
+
+
 def render_advanced_filters():
     """Render advanced filter sidebar"""
     with st.sidebar:
@@ -123,63 +339,85 @@ def render_advanced_filters():
         return filters
 
 
-def render_analytics_dashboard(leads):
-    """Render analytics dashboard"""
-    if not leads:
+HISTORY_WINDOWS = {"This run": None, "Last 7 days": 7, "Last 30 days": 30, "All time": 0}
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_history_aggregates(data_dir, days):
+    """(merged summary of leads first stored in the window, run count) from the local store"""
+    from core.analytics import merge_aggregates
+    from core.storage import build_lead_store, SQLiteLeadStore
+
+    store = build_lead_store({'data_dir': data_dir})
+    if not isinstance(store, SQLiteLeadStore):
+        return {}, 0
+    try:
+        since = (datetime.now() - timedelta(days=days)).timestamp() if days else None
+        runs = store.run_aggregates(since=since)
+    finally:
+        store.close()
+    return merge_aggregates(runs).to_dict(), sum(1 for run in runs if not run.get('backfill'))
+
+
+def render_analytics_dashboard(leads, aggregates=None):
+    """Render analytics dashboard from a run / history summary (core.analytics)"""
+    from core.analytics import LeadAggregates
+
+    if aggregates is None:
+        aggregates = LeadAggregates.from_leads(leads or []).to_dict()
+    total = aggregates.get('total', 0)
+    if not total:
         st.info("No data to display. Run the pipeline first.")
         return
-    
-    df = pd.DataFrame(leads)
-    
+
     st.markdown("### 📊 Performance Analytics")
-    
+
     # Key metrics
     col1, col2, col3, col4, col5 = st.columns(5)
     with col1:
-        st.metric("Total Leads", len(leads))
+        st.metric("Total Leads", total)
     with col2:
-        avg_score = round(df['lead_score'].mean(), 1) if 'lead_score' in df else 0
-        st.metric("Avg Score", f"{avg_score}/10")
+        st.metric("Avg Score", f"{aggregates.get('avg_score', 0)}/10")
     with col3:
-        high_urgency = len([l for l in leads if l.get('urgency') == 'HIGH'])
+        high_urgency = aggregates.get('high_urgency', 0)
         st.metric("High Urgency", high_urgency)
     with col4:
-        with_email = len([l for l in leads if l.get('email')])
-        st.metric("With Email", with_email)
+        st.metric("With Email", aggregates.get('with_email', 0))
     with col5:
-        conversion_rate = round((high_urgency / len(leads)) * 100, 1) if leads else 0
+        conversion_rate = round((high_urgency / total) * 100, 1)
         st.metric("Hot Lead %", f"{conversion_rate}%")
-    
+
     st.markdown("---")
-    
+
+    import pandas as pd
+
+    def counts(field, sort_index=False, top=None):
+        series = pd.Series(aggregates.get(field) or {}, dtype='int64')
+        if sort_index:
+            return series.rename(index=int).sort_index()
+        series = series.sort_values(ascending=False)
+        return series.head(top) if top else series
+
     # Charts
     col1, col2 = st.columns(2)
-    
+
     with col1:
         st.markdown("#### 🏙️ Leads by City")
-        if 'city' in df.columns:
-            city_counts = df['city'].value_counts()
-            st.bar_chart(city_counts)
-    
+        st.bar_chart(counts('by_city'))
+
     with col2:
         st.markdown("#### 💼 Leads by Business Type")
-        if 'business_type' in df.columns:
-            biz_counts = df['business_type'].value_counts().head(10)
-            st.bar_chart(biz_counts)
-    
+        st.bar_chart(counts('by_business_type', top=10))
+
     col3, col4 = st.columns(2)
-    
+
     with col3:
         st.markdown("#### 📊 Score Distribution")
-        if 'lead_score' in df.columns:
-            score_counts = df['lead_score'].value_counts().sort_index()
-            st.bar_chart(score_counts)
-    
+        st.bar_chart(counts('by_score', sort_index=True))
+
     with col4:
         st.markdown("#### 🚨 Urgency Breakdown")
-        if 'urgency' in df.columns:
-            urgency_counts = df['urgency'].value_counts()
-            st.bar_chart(urgency_counts)
+        st.bar_chart(counts('by_urgency'))
 
 
 def render_lead_card_enhanced(lead, idx):
@@ -206,7 +444,8 @@ def render_lead_card_enhanced(lead, idx):
         signals_html += f'<span class="signal-pill {cls}">{icon} {sig_name}</span>'
 
     website_display = lead.get('website') or lead.get('raw_url') or 'No website'
-    phone = lead.get('phone', 'N/A')
+    phone = lead.get('phone') or 'N/A'
+    whatsapp = lead.get('whatsapp_number', '')
     email = lead.get('email', '')
     pitch = lead.get('recommended_pitch', '')
     service = lead.get('service_opportunity', '')
@@ -218,7 +457,7 @@ def render_lead_card_enhanced(lead, idx):
         <div>
             <div class="lead-name">{lead.get('company_name', '')}</div>
             <div class="lead-meta">📍 {lead.get('city', '')} &nbsp;|&nbsp; 💼 {lead.get('business_type', '')} &nbsp;|&nbsp; {rated}</div>
-            <div class="lead-meta" style="margin-top:4px">🌐 {website_display} &nbsp;|&nbsp; 📞 {phone}{' | 📧 ' + email if email else ''}</div>
+            <div class="lead-meta" style="margin-top:4px">🌐 {website_display} &nbsp;|&nbsp; 📞 {phone}{' | 💬 ' + whatsapp if whatsapp and whatsapp != phone else ''}{' | 📧 ' + email if email else ''}</div>
         </div>
         <div style="text-align:right; flex-shrink:0; margin-left:1rem;">
             <span class="score-badge {badge_class}">{score}/10</span>
@@ -1,12 +1,23 @@
 import asyncio
 import aiohttp
 import logging
+import uuid
+from contextlib import nullcontext
 from typing import Optional, Callable
 from datetime import datetime
 
-from core.scraper import fetch_serpapi_results, scrape_website
-from core.scorer import score_lead
-from core.sheets import get_sheets_client, save_leads_to_sheet, lookup_email_hunter
+from core.scraper import fetch_serpapi_results, fan_out_neighborhoods, scrape_website, LOCATION_MODIFIERS
+from core.scorer import score_lead, apply_rule_fallback
+from core.sheets import get_sheets_client, lazy_errors_tab_writer, INDEX_TAB
+from core.enrichment import build_hunter_enricher, enrich_lead
+from core.budget import build_budget_manager, estimate_run_cost, check_run_budget
+from core.endpoints import resolve_endpoints
+from core.mirror import open_sheet_mirror
+from core.errorsink import open_error_sink
+from core.storage import build_lead_store, SQLiteLeadStore, sync_to_sheets
+from core.analytics import LeadAggregates
+from core.scheduler import tally_query_yield, open_query_scheduler
+from core.overlap import load_overlap_model, plan_queries
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +35,29 @@ DEFAULT_QUERIES = [
     ("coaching institute", "Lucknow"),
 ]
 
+# Once a run is cancelled / past its deadline, in-flight requests get this
+# long to finish before they are cancelled
+STOP_GRACE_SECONDS = 5.0
+
+
+async def gather_until_stopped(coros: list, stop_reason: Callable, grace: float = STOP_GRACE_SECONDS) -> list:
+    """
+    asyncio.gather() that honours cooperative cancellation: when
+    stop_reason() returns a reason, tasks still running get `grace`
+    seconds and are then cancelled. Cancelled slots come back as None.
+    """
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    pending = set(tasks)
+    while pending:
+        _, pending = await asyncio.wait(pending, timeout=0.5)
+        if pending and stop_reason():
+            _, pending = await asyncio.wait(pending, timeout=grace)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            break
+    return [None if task.cancelled() else task.result() for task in tasks]
+
 
 async def run_pipeline(
     config: dict,
@@ -31,6 +65,12 @@ async def run_pipeline(
     progress_callback: Optional[Callable] = None,
     min_score: int = 7,
     max_concurrent_scrapes: int = 5,
+    session: Optional[aiohttp.ClientSession] = None,
+    lead_callback: Optional[Callable] = None,
+    cancel_event: Optional[asyncio.Event] = None,
+    deadline: Optional[float] = None,
+    neighborhood_fanout: Optional[bool] = None,
+    prune_overlap: Optional[bool] = None,
 ) -> dict:
     """
     Full lead generation pipeline.
@@ -41,19 +81,48 @@ async def run_pipeline(
     
     queries: list of (business_type, city) tuples
     progress_callback: fn(stage, current, total, message)
+    session: shared aiohttp session (job manager) — otherwise the run opens its own
+    lead_callback: fn(lead), called with each qualified lead as soon as it is
+        scored and enriched (the returned qualified_leads is the same set, sorted)
+    cancel_event / deadline: stop early when the event is set or after `deadline`
+        seconds. In-flight work winds down, scraped leads not yet scored get
+        rule-based scores, finished leads are saved, and results['partial']
+        records the reason ('cancelled' / 'deadline').
+    neighborhood_fanout: also search each metro's neighborhoods
+        (core.scraper.LOCATION_MODIFIERS) until they stop turning up new
+        businesses; None = config 'neighborhood_fanout'.
+    prune_overlap: skip queries that earlier ones in the same city are predicted
+        to cover (core/overlap.py, listed in results['pruned_queries']). For
+        planned runs (cron); None = only when falling back to DEFAULT_QUERIES,
+        so queries a user picked are never dropped.
     """
 
     results = {
+        'run_id': uuid.uuid4().hex,
         'total_scraped': 0,
         'total_scored': 0,
         'qualified_leads': [],
+        'saved_to_store': 0,
         'saved_to_sheet': 0,
+        'updated_in_sheet': 0,
+        'sheet_pending': 0,
         'skipped_duplicates': 0,
+        'sheet_chunks': [],
         'errors': [],
+        'error_summary': [],
+        'enrichment': {},
+        'aggregates': {},
+        'query_stats': [],
+        'pruned_queries': [],
+        'budget': {},
+        'degraded': [],
+        'partial': None,
         'started_at': datetime.now().isoformat(),
         'finished_at': None,
     }
 
+    if prune_overlap is None:
+        prune_overlap = not queries
     if not queries:
         queries = DEFAULT_QUERIES
 
@@ -62,106 +131,328 @@ async def run_pipeline(
             progress_callback(stage, current, total, msg)
         logger.info(f"[{stage}] {current}/{total} — {msg}")
 
-    connector = aiohttp.TCPConnector(limit=10, ssl=False)
-    async with aiohttp.ClientSession(connector=connector) as session:
-
-        # ─── STAGE 1: Search ───────────────────────────
-        progress('search', 0, len(queries), 'Starting SerpAPI searches...')
-        all_leads = []
-        seen_names = set()
-
-        for i, (biz_type, city) in enumerate(queries):
-            query = f"{biz_type} in {city}"
-            progress('search', i + 1, len(queries), f"Searching: {query}")
-            leads = await fetch_serpapi_results(session, query, config['serpapi_key'])
-
-            # Global dedup by name
-            for lead in leads:
-                key = lead['company_name'].lower().replace(' ', '')[:30]
-                if key not in seen_names:
-                    seen_names.add(key)
-                    all_leads.append(lead)
-
-            await asyncio.sleep(0.5)  # polite delay
-
-        results['total_scraped'] = len(all_leads)
-        progress('search', len(queries), len(queries), f"Found {len(all_leads)} unique leads")
-
-        # ─── STAGE 2: Scrape websites ──────────────────
-        progress('scrape', 0, len(all_leads), 'Scraping websites...')
-        semaphore = asyncio.Semaphore(max_concurrent_scrapes)
-
-        async def scrape_one(i, lead):
-            async with semaphore:
-                url = lead.get('raw_url') or lead.get('website') or ''
-                signals = await scrape_website(session, url)
-                lead.update(signals)
-                progress('scrape', i + 1, len(all_leads), f"Scraped: {lead['company_name'][:40]}")
-                return lead
-
-        scrape_tasks = [scrape_one(i, lead) for i, lead in enumerate(all_leads)]
-        all_leads = await asyncio.gather(*scrape_tasks)
-
-        # ─── STAGE 3: Rule-based filter ────────────────
-        progress('score', 0, len(all_leads), 'Rule-based pre-filtering...')
-        from core.scorer import rule_based_score
-        pre_filtered = []
-        for lead in all_leads:
-            rule = rule_based_score(lead)
-            lead.update(rule)
-            if rule['rule_score'] >= 4:  # Only send decent candidates to AI
-                pre_filtered.append(lead)
-
-        progress('score', 0, len(pre_filtered), f"Pre-filter: {len(pre_filtered)} candidates for AI scoring")
-
-        # ─── STAGE 4: AI scoring ───────────────────────
-        ai_semaphore = asyncio.Semaphore(3)  # Max 3 concurrent AI calls
-
-        async def score_one(i, lead):
-            async with ai_semaphore:
-                scored = await score_lead(session, lead, config.get('openrouter_key', ''))
-                progress('score', i + 1, len(pre_filtered), f"Scored {lead['company_name'][:35]}: {scored.get('lead_score', '?')}/10")
-                await asyncio.sleep(0.3)
+    # ─── Cancellation: checked between units of work, never mid-request
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + deadline if deadline else None
+    partial = {'reason': None, 'queries_skipped': 0, 'unscraped': 0, 'rule_scored': 0}
+
+    def stop_reason() -> Optional[str]:
+        if not partial['reason']:
+            if cancel_event is not None and cancel_event.is_set():
+                partial['reason'] = 'cancelled'
+            elif stop_at is not None and loop.time() >= stop_at:
+                partial['reason'] = 'deadline'
+        return partial['reason']
+
+    # ─── Overlap: skip queries whose results earlier queries in the same city
+    # are predicted to return anyway (learned from past runs, core/overlap.py)
+    if prune_overlap and config.get('overlap_pruning', True) and len(queries) > 1:
+        model = load_overlap_model(config)
+        if model is not None:
+            plan = plan_queries(queries, model, float(config.get('overlap_max_redundancy', 0.7)))
+            results['pruned_queries'] = [
+                {'query': row['query'], 'covered_by': row['covered_by'], 'redundancy': row['redundancy']}
+                for row in plan if row['action'] == 'drop'
+            ]
+            queries = [row['query'] for row in plan if row['action'] == 'keep']
+            for pruned in results['pruned_queries']:
+                logger.info(f"Overlap: skipping {pruned['query']} — ~{pruned['redundancy']:.0%} covered by {pruned['covered_by']}")
+
+    if neighborhood_fanout is None:
+        neighborhood_fanout = bool(config.get('neighborhood_fanout', False))
+
+    # ─── Budget: estimate the run up front, degrade instead of failing
+    budget = build_budget_manager(config)
+    estimate = estimate_run_cost(queries, neighborhood_fanout=neighborhood_fanout)
+    results['budget']['estimate'] = estimate
+    results['budget']['warnings'] = check_run_budget(budget, estimate)
+    logger.info(f"Estimated cost: {estimate['serpapi']} searches, ~{estimate['groq']:,} Groq tokens, "
+                f"~{estimate['hunter']} Hunter lookups")
+    for warning in results['budget']['warnings']:
+        logger.warning(f"Budget: {warning}")
+
+    # ─── Errors: aggregated + spooled locally, one Errors-tab append per flush
+    # (Sheets auth happens at the first error flush or the save stage, not up front)
+    sheets_configured = bool(config.get('sheets_service_account_json') and config.get('sheet_id'))
+    errors = open_error_sink(config, writer=lazy_errors_tab_writer(
+        config['sheets_service_account_json'], config['sheet_id']) if sheets_configured else None,
+        run_id=results['run_id'])
+
+    store = mirror = None
+    try:
+        def record_error(node, message, lead_info=''):
+            results['errors'].append(message)
+            errors.add(node, message, lead_info)
+
+        # ─── Upstreams: live, or the local replay stand-in; optional recording
+        endpoints = resolve_endpoints(config)
+        archive, session_kwargs = None, {}
+        if config.get('record_fixtures'):
+            from core.replay import FixtureArchive, recording_session_kwargs
+            archive = FixtureArchive()
+            session_kwargs = recording_session_kwargs(archive)
+        search_delay = float(config.get('search_delay', 0.5))
+
+        if session is None or archive:
+            connector = aiohttp.TCPConnector(limit=10, ssl=False)
+            session_scope = aiohttp.ClientSession(connector=connector, **session_kwargs)
+        else:
+            session_scope = nullcontext(session)
+        async with session_scope as session:
+
+            # ─── STAGE 1: Search ───────────────────────────
+            progress('search', 0, len(queries), 'Starting SerpAPI searches...')
+            all_leads = []
+            seen_names = set()
+            searched = []   # (query index, lead) — each unique lead credited to the query that found it first
+            result_keys = []   # per query: every business it returned (overlap model)
+
+            def merge(leads, stats) -> int:
+                """Global dedup by name; returns how many leads were new to this run"""
+                new = 0
+                for lead in leads:
+                    key = lead['company_name'].lower().replace(' ', '')[:30]
+                    result_keys[-1].add(key)
+                    if key not in seen_names:
+                        seen_names.add(key)
+                        all_leads.append(lead)
+                        searched.append((len(results['query_stats']) - 1, lead))
+                        new += 1
+                stats['results'] += len(leads)
+                stats['unique'] += new
+                return new
+
+            def reserve_search() -> bool:
+                return not stop_reason() and budget.reserve('serpapi')
+
+            for i, (biz_type, city) in enumerate(queries):
+                query = f"{biz_type} in {city}"
+                if stop_reason():
+                    partial['queries_skipped'] = len(queries) - i
+                    progress('search', i, len(queries), f"Run {stop_reason()}, stopping search")
+                    break
+                if not budget.reserve('serpapi'):
+                    results['degraded'].append(f"SerpAPI budget exhausted — skipped {len(queries) - i} queries")
+                    progress('search', i, len(queries), 'SerpAPI budget exhausted, stopping search')
+                    break
+                progress('search', i + 1, len(queries), f"Searching: {query}")
+                leads = await fetch_serpapi_results(session, query, config['serpapi_key'], url=endpoints['serpapi'])
+                stats = {
+                    'business_type': biz_type, 'city': city, 'results': 0, 'unique': 0, 'new_unique': 0,
+                    'qualified': 0, 'new_qualified': 0, 'serpapi_credits': 1, 'ai_tokens': 0,
+                }
+                results['query_stats'].append(stats)
+                result_keys.append(set())
+                merge(leads, stats)
+
+                # Neighborhood fan-out: sub-queries count against the parent query
+                if neighborhood_fanout and city in LOCATION_MODIFIERS:
+                    fanout = await fan_out_neighborhoods(
+                        session, biz_type, city, config['serpapi_key'], merge=lambda batch: merge(batch, stats),
+                        reserve_search=reserve_search, concurrency=int(config.get('fanout_concurrency', 2)),
+                        min_new_per_search=float(config.get('fanout_min_new_per_search', 5)), url=endpoints['serpapi'],
+                    )
+                    stats['serpapi_credits'] += fanout['searches']
+                    stats['neighborhoods'] = fanout
+                    progress('search', i + 1, len(queries),
+                             f"{query}: {fanout['searches']} neighborhood searches, {fanout['new']} new businesses"
+                             + (' (saturated)' if fanout['saturated'] else ''))
+
+                await asyncio.sleep(search_delay)  # polite delay
+
+            results['total_scraped'] = len(all_leads)
+            progress('search', len(queries), len(queries), f"Found {len(all_leads)} unique leads")
+
+            # ─── STAGE 2: Scrape websites ──────────────────
+            progress('scrape', 0, len(all_leads), 'Scraping websites...')
+            semaphore = asyncio.Semaphore(max_concurrent_scrapes)
+
+            async def scrape_one(i, lead):
+                async with semaphore:
+                    if stop_reason():
+                        return None
+                    url = lead.get('raw_url') or lead.get('website') or ''
+                    signals = await scrape_website(session, url, fetch_contact_page=config.get('scrape_contact_page', True),
+                                                   web_base=endpoints['web'])
+                    lead.update(signals)
+                    progress('scrape', i + 1, len(all_leads), f"Scraped: {lead['company_name'][:40]}")
+                    return lead
+
+            scrape_tasks = [scrape_one(i, lead) for i, lead in enumerate(all_leads)]
+            scraped = await gather_until_stopped(scrape_tasks, stop_reason)
+            # Unscraped leads can't be rule-scored fairly (no site signals) — they are dropped
+            partial['unscraped'] = scraped.count(None)
+            all_leads = [lead for lead in scraped if lead is not None]
+            for lead in all_leads:
+                if lead.get('scrape_failed'):
+                    errors.add('scrape', lead.get('scrape_error') or 'HTTP error', lead.get('website', ''))
+            await errors.checkpoint()
+
+            # ─── STAGE 3: Rule-based filter ────────────────
+            progress('score', 0, len(all_leads), 'Rule-based pre-filtering...')
+            from core.scorer import rule_based_score
+            pre_filtered = []
+            for lead in all_leads:
+                rule = rule_based_score(lead)
+                lead.update(rule)
+                if rule['rule_score'] >= 4:  # Only send decent candidates to AI
+                    pre_filtered.append(lead)
+
+            progress('score', 0, len(pre_filtered), f"Pre-filter: {len(pre_filtered)} candidates for AI scoring")
+
+            # ─── STAGE 4-6: AI scoring → qualify → email enrichment ───
+            # Each lead goes straight from scoring to enrichment, so qualified
+            # leads reach lead_callback while the rest are still being scored.
+            # On-site emails first; Hunter.io is cached per domain, rate limited,
+            # and shared across leads on the same domain
+            ai_semaphore = asyncio.Semaphore(3)  # Max 3 concurrent AI calls
+            enricher = build_hunter_enricher(session, config, budget=budget, url=endpoints['hunter'])
+            aggregates = LeadAggregates()   # analytics summary, built as leads complete
+            scored_ids, published = set(), set()
+
+            def publish(i, lead):
+                aggregates.add(lead)
+                published.add(i)
+                if lead_callback:
+                    lead_callback(lead)
+
+            async def score_one(i, lead):
+                async with ai_semaphore:
+                    if stop_reason():
+                        return None
+                    scored = await score_lead(session, lead, config.get('openrouter_key', ''), budget=budget,
+                                              groq_url=endpoints['groq'])
+                    scored_ids.add(i)
+                    progress('score', i + 1, len(pre_filtered), f"Scored {lead['company_name'][:35]}: {scored.get('lead_score', '?')}/10")
+                    await asyncio.sleep(config.get('ai_delay', 0.3))
+                if scored.get('lead_score', 0) >= min_score and not stop_reason():
+                    await enrich_lead(enricher, scored)
+                if scored.get('lead_score', 0) >= min_score:
+                    publish(i, scored)
                 return scored
 
-        score_tasks = [score_one(i, lead) for i, lead in enumerate(pre_filtered)]
-        scored_leads = await asyncio.gather(*score_tasks)
-        results['total_scored'] = len(scored_leads)
-
-        # ─── STAGE 5: Filter qualified leads ──────────
-        qualified = [l for l in scored_leads if l.get('lead_score', 0) >= min_score]
-        # Sort by score desc, then by google reviews desc
-        qualified.sort(key=lambda x: (x.get('lead_score', 0), x.get('google_reviews', 0)), reverse=True)
-
-        progress('enrich', 0, len(qualified), f"Enriching {len(qualified)} qualified leads...")
-
-        # ─── STAGE 6: Hunter.io email enrichment ──────
-        async def enrich_one(i, lead):
-            if config.get('hunter_key') and lead.get('website'):
-                hunter_data = await lookup_email_hunter(session, lead['website'], config['hunter_key'])
-                if hunter_data:
-                    lead.update(hunter_data)
-            progress('enrich', i + 1, len(qualified), f"Enriched: {lead['company_name'][:40]}")
-            return lead
-
-        enrich_tasks = [enrich_one(i, lead) for i, lead in enumerate(qualified)]
-        qualified = await asyncio.gather(*enrich_tasks)
-        results['qualified_leads'] = list(qualified)
-
-        # ─── STAGE 7: Save to Google Sheets ───────────
-        if config.get('sheets_service_account_json') and config.get('sheet_id'):
-            progress('save', 0, 1, 'Saving to Google Sheets...')
-            gc = get_sheets_client(config['sheets_service_account_json'])
-            if gc:
-                stats = save_leads_to_sheet(gc, config['sheet_id'], qualified)
-                results['saved_to_sheet'] = stats['saved']
+            score_tasks = [score_one(i, lead) for i, lead in enumerate(pre_filtered)]
+            outcomes = await gather_until_stopped(score_tasks, stop_reason)
+            scored_leads = []
+            for i, (lead, scored) in enumerate(zip(pre_filtered, outcomes)):
+                if scored is None:
+                    # Stopped before (or while) scoring / enriching this lead
+                    if i not in scored_ids:
+                        apply_rule_fallback(lead, scored_by=f"RULE_{stop_reason().upper()}")
+                        partial['rule_scored'] += 1
+                    if lead.get('lead_score', 0) >= min_score and i not in published:
+                        publish(i, lead)
+                    scored = lead
+                scored_leads.append(scored)
+            results['total_scored'] = len(scored_leads)
+            rule_only = sum(1 for l in scored_leads if l.get('scored_by') == 'RULE_BUDGET')
+            if rule_only:
+                results['degraded'].append(f"Groq budget exhausted — {rule_only} leads scored rule-only")
+            for lead in scored_leads:
+                if lead.get('scored_by') == 'RULE_FALLBACK':
+                    errors.add('score', 'AI scoring failed — used rule-based score', lead.get('company_name', ''))
+
+            # Sort by score desc, then by google reviews desc
+            qualified = [l for l in scored_leads if l.get('lead_score', 0) >= min_score]
+            qualified.sort(key=lambda x: (x.get('lead_score', 0), x.get('google_reviews', 0)), reverse=True)
+            progress('enrich', len(qualified), len(qualified), f"Enriched {len(qualified)} qualified leads")
+            results['qualified_leads'] = list(qualified)
+            results['enrichment'] = dict(enricher.stats)
+            results['aggregates'] = aggregates.to_dict()
+            if enricher.stats['skipped_budget']:
+                results['degraded'].append(f"Hunter budget exhausted — skipped {enricher.stats['skipped_budget']} lookups")
+            if enricher.stats['api_failures']:
+                errors.add('enrich', f"Hunter lookups failed for {enricher.stats['api_failures']} domains")
+            await errors.checkpoint()
+
+            # ─── STAGE 7: Save ────────────────────────────
+            # Local store is the system of record; Google Sheets is a sync target
+            # (pending leads are retried on the next run if the sheet is down)
+            gc = await asyncio.to_thread(get_sheets_client, config['sheets_service_account_json']) if sheets_configured else None
+            write_mode = config.get('sheet_write_mode', 'append')
+            partition = config.get('sheet_partitioning', '')
+            mirror_tab = INDEX_TAB if partition else 'Leads'
+            mirror = open_sheet_mirror(config, config['sheet_id'], mirror_tab) if gc else None
+            store = build_lead_store(config, gc=gc, mirror=mirror)
+            known_keys = None
+            if store is not None:
+                progress('save', 0, 1, f'Saving to {store.name} store...')
+                try:
+                    # Per-query yield counts leads new to the store (core/scheduler.py)
+                    known_keys = await asyncio.to_thread(store.existing_keys)
+                except Exception as e:
+                    logger.warning(f"Could not read stored lead keys for query yield: {e}")
+                stats = await asyncio.to_thread(store.save_leads, qualified, write_mode)
+                results['saved_to_store'] = stats['saved']
                 results['skipped_duplicates'] = stats['skipped_dup']
-                progress('save', 1, 1, f"Saved {stats['saved']} leads, skipped {stats['skipped_dup']} duplicates")
-            else:
-                results['errors'].append('Google Sheets auth failed')
-
-    results['finished_at'] = datetime.now().isoformat()
-    return results
+                if store.name == 'sheets':
+                    results['saved_to_sheet'] = stats['saved']
+                    results['updated_in_sheet'] = stats['updated']
+                if stats['errors']:
+                    record_error('save', f'Lead store ({store.name}) save failed')
+                if isinstance(store, SQLiteLeadStore):
+                    # History windows merge these, so only count leads new to the store
+                    store.save_run_aggregates(results['run_id'], LeadAggregates.from_leads(stats['inserted']).to_dict())
+                progress('save', 1, 1, f"Stored {stats['saved']} leads, updated {stats['updated']}, skipped {stats['skipped_dup']} duplicates")
+            tally_query_yield(results['query_stats'], searched, qualified, known_keys)
+            for stats, keys in zip(results['query_stats'], result_keys):
+                stats['result_keys'] = sorted(keys)
+
+            # gspread runs in worker threads, chunked + retried, so the loop never blocks.
+            # A stopped run leaves new leads pending; the next run syncs them.
+            if sheets_configured and isinstance(store, SQLiteLeadStore) and stop_reason():
+                results['sheet_pending'] = len(store.pending_sync())
+            elif sheets_configured and isinstance(store, SQLiteLeadStore):
+                if gc:
+                    progress('sync', 0, 1, 'Syncing to Google Sheets...')
+                    sync = await sync_to_sheets(
+                        store, gc, config['sheet_id'], mirror=mirror, mode=write_mode, partition=partition,
+                        max_rows=int(config.get('sheets_chunk_rows', 500)),
+                        writes_per_minute=int(config.get('sheets_writes_per_minute', 60)),
+                        progress=lambda done, total, msg: progress('sync', done, total, msg),
+                    )
+                    results['saved_to_sheet'] = sync['saved']
+                    results['updated_in_sheet'] = sync['updated']
+                    results['sheet_chunks'] = sync['chunks']
+                    results['sheet_pending'] = sync['pending']
+                    if sync['failed_rows']:
+                        record_error('save', f"Google Sheets: {sync['failed_rows']} rows failed to sync ({sync['pending']} pending)")
+                    elif sync['errors']:
+                        record_error('save', 'Google Sheets sync failed')
+                    progress('sync', 1, 1, f"Synced {sync['saved']} leads to Sheets, updated {sync['updated']}, {sync['pending']} pending")
+                else:
+                    record_error('save', 'Google Sheets auth failed')
+
+        if stop_reason():
+            results['partial'] = partial
+            results['degraded'].append(
+                f"Run {partial['reason']} — {partial['queries_skipped']} queries skipped, "
+                f"{partial['unscraped']} leads not scraped, {partial['rule_scored']} leads rule-scored"
+            )
+        await errors.checkpoint()
+        results['error_summary'] = errors.summary()
+        if archive:
+            archive.save(config['record_fixtures'])
+        results['budget']['usage'] = budget.snapshot()
+        results['finished_at'] = datetime.now().isoformat()
+
+        # Per-query yield / result history for the cron scheduler and overlap planner
+        history = open_query_scheduler(config)
+        if history is not None:
+            try:
+                history.record(results)
+            except Exception as e:
+                logger.warning(f"Could not record query history: {e}")
+            finally:
+                history.close()
+        return results
+    finally:
+        await errors.close()
+        budget.close()
+        if store is not None:
+            store.close()
+        if mirror is not None:
+            mirror.close()
 
 
 # ─── Entry point for cron ─────────────────────